@@ -0,0 +1,91 @@
+"""Time the vectorized chain aggregates against a Python loop
+
+Usage: python benchmarks/bench_analytics.py [--transactions 10000000] [--addresses 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger.analytics import MINT_ADDRESS, TransactionColumnStore
+from ledger.compact import ADDRESSES
+
+BLOCK_SIZE = 1_000
+# Rows the Python loop baseline walks; its time is scaled up to the full chain
+LOOP_SAMPLE = 1_000_000
+
+
+def build_store(count: int, addresses: int) -> TransactionColumnStore:
+    rng = np.random.default_rng(42)
+    ids = np.array([ADDRESSES.intern(f"addr_{i}") for i in range(addresses)], dtype=np.uint32)
+    mint = ADDRESSES.intern(MINT_ADDRESS)
+
+    store = TransactionColumnStore(capacity=count)
+    senders = ids[rng.integers(0, addresses, count)]
+    receivers = ids[rng.integers(0, addresses, count)]
+    amounts = rng.uniform(0.01, 100.0, count).round(2)
+    timestamps = 1700000000.0 + np.arange(count, dtype=np.float64) * 0.5
+
+    for block, start in enumerate(range(0, count, BLOCK_SIZE)):
+        end = min(count, start + BLOCK_SIZE)
+        senders[start] = mint   # the block's reward transaction
+        amounts[start] = 6.25
+        store.extend(block, senders[start:end], receivers[start:end],
+                     amounts[start:end], timestamps[start:end])
+    return store
+
+
+def timed(function, repeat: int = 5) -> float:
+    """Median wall time of function() in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - started) * 1000)
+    return sorted(times)[len(times) // 2]
+
+
+def python_balances(senders, receivers, amounts, mint) -> dict:
+    """The pre-columnar approach: one dict update per transaction"""
+    balances = {}
+    for sender, receiver, amount in zip(senders, receivers, amounts):
+        balances[receiver] = balances.get(receiver, 0.0) + amount
+        if sender != mint:
+            balances[sender] = balances.get(sender, 0.0) - amount
+    return balances
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--transactions', type=int, default=10_000_000)
+    parser.add_argument('--addresses', type=int, default=10_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = build_store(args.transactions, args.addresses)
+    print(f"built {len(store):,} transactions in {time.perf_counter() - started:.1f}s")
+
+    queries = [
+        ('summary', store.summary),
+        ('richest (top 10)', lambda: store.richest(10)),
+        ('miner rewards (top 10)', lambda: store.miner_rewards(10)),
+        ('block volume (all blocks)', store.block_volume),
+        ('daily counts', store.daily_counts),
+    ]
+    for name, query in queries:
+        print(f"{name:>26}: {timed(query):8.1f} ms")
+
+    sample = min(LOOP_SAMPLE, args.transactions)
+    columns = store._columns()
+    senders, receivers, amounts = (column[:sample].tolist() for column in columns[1:4])
+    loop_ms = timed(lambda: python_balances(senders, receivers, amounts, store._mint_id), repeat=1)
+    print(f"{'Python loop balances':>26}: {loop_ms * args.transactions / sample:8.1f} ms "
+          f"(extrapolated from {sample:,} rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Measure how the full-chain audit scales with worker processes
+
+Usage: python benchmarks/bench_audit.py [--blocks 100000] [--tx-per-block 10] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate_chain
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--blocks', type=int, default=100_000)
+    parser.add_argument('--tx-per-block', type=int, default=10)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        started = time.perf_counter()
+        chain = generate_chain(args.blocks, args.tx_per_block, data_dir=data_dir)
+        print(f"generated {args.blocks:,} blocks x {args.tx_per_block} tx in "
+              f"{time.perf_counter() - started:.1f}s ({os.cpu_count()} CPUs)")
+
+        baseline = None
+        print(f"{'workers':>8} {'seconds':>9} {'blocks/s':>11} {'speedup':>8}")
+        for workers in args.workers:
+            result = chain.audit(workers=workers)
+            assert result.valid, result
+            baseline = baseline or result.elapsed
+            print(f"{workers:>8} {result.elapsed:>9.2f} {result.blocks_checked / result.elapsed:>11,.0f} "
+                  f"{baseline / result.elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
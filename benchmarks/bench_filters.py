@@ -0,0 +1,83 @@
+"""Measure the per-block address filters: false-positive rate and scan speedup
+
+Scans the synthetic chain for balances of random addresses, once reading
+every block and once skipping blocks whose filter rules the address out.
+
+Usage: python benchmarks/bench_filters.py [--blocks 20000] [--addresses 10000] [--data-dir DIR]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import address, generate_chain
+
+from ledger.filters import AddressProbe
+
+
+def scan_every_block(chain, wallet: str) -> float:
+    """scan_wallet_balance without the filters"""
+    balance = 0.0
+    for block in chain.chain:
+        for transaction in block.transactions:
+            if transaction.receiver == wallet:
+                balance += transaction.amount
+            if transaction.sender == wallet and transaction.sender != "0":
+                balance -= transaction.amount
+    return balance
+
+
+def timed(function, wallets) -> float:
+    started = time.perf_counter()
+    for wallet in wallets:
+        function(wallet)
+    return (time.perf_counter() - started) / len(wallets) * 1000
+
+
+def false_positive_rate(chain, wallets) -> float:
+    false_positives = negatives = 0
+    for wallet in wallets:
+        probe = AddressProbe(wallet)
+        for block in chain.chain:
+            if wallet not in block.addresses():
+                negatives += 1
+                false_positives += probe.might_contain(block.address_filter)
+    return false_positives / negatives if negatives else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=20_000)
+    parser.add_argument('--tx-per-block', type=int, default=10)
+    parser.add_argument('--addresses', type=int, default=10_000)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--data-dir', help='store the chain on disk here (must be empty); defaults to memory')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    wallets = [address(rng.randrange(args.addresses)) for _ in range(args.queries)]
+
+    started = time.perf_counter()
+    chain = generate_chain(args.blocks, args.tx_per_block, args.addresses, data_dir=args.data_dir)
+    print(f"generated {len(chain.chain):,} blocks x {args.tx_per_block} tx, "
+          f"{args.addresses:,} addresses in {time.perf_counter() - started:.1f}s")
+
+    for wallet in wallets:
+        assert chain.scan_wallet_balance(wallet) == scan_every_block(chain, wallet)
+
+    full_ms = timed(lambda wallet: scan_every_block(chain, wallet), wallets)
+    filtered_ms = timed(chain.scan_wallet_balance, wallets)
+    history_ms = timed(chain.scan_transaction_history, wallets)
+    rate = false_positive_rate(chain, wallets[:5])
+
+    print(f"false-positive rate: {rate:.2%}")
+    print(f"balance scan, every block: {full_ms:9.1f} ms/query")
+    print(f"balance scan, filtered:    {filtered_ms:9.1f} ms/query ({full_ms / filtered_ms:.1f}x)")
+    print(f"history scan, filtered:    {history_ms:9.1f} ms/query")
+
+
+if __name__ == '__main__':
+    main()
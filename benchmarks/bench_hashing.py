@@ -0,0 +1,76 @@
+"""Compare per-nonce hashing cost of the old and midstate mining paths
+
+Usage: python benchmarks/bench_hashing.py [--seconds 1.0]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger.blockchain_logic import Block, Transaction
+from ledger.mining import nonce_hasher
+
+BLOCK_SIZES = (10, 1_000, 10_000)
+
+
+def make_block(tx_count: int) -> Block:
+    transactions = [
+        Transaction(f"addr_{i % 97}", f"addr_{(i * 7) % 97}", 1.0 + i, timestamp=1700000000.0 + i)
+        for i in range(tx_count)
+    ]
+    return Block(1, transactions, "0" * 64, timestamp=1700000000.0)
+
+
+def legacy_hash(block: Block) -> str:
+    """The pre-midstate Block.calculate_hash: full json.dumps on every nonce"""
+    block_string = json.dumps({
+        'index': block.index,
+        'transactions': [tx.to_dict() for tx in block.transactions],
+        'timestamp': block.timestamp,
+        'previous_hash': block.previous_hash,
+        'nonce': block.nonce
+    }, sort_keys=True)
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+
+def measure(attempt, seconds: float) -> float:
+    """Run attempt(nonce) for roughly `seconds` and return attempts per second"""
+    nonce = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while True:
+        attempt(nonce)
+        nonce += 1
+        if nonce % 16 == 0 or nonce < 16:
+            now = time.perf_counter()
+            if now >= deadline:
+                return nonce / (now - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'transactions':>12} {'before H/s':>14} {'after H/s':>14} {'speedup':>9}")
+    for tx_count in BLOCK_SIZES:
+        block = make_block(tx_count)
+
+        def before(nonce):
+            block.nonce = nonce
+            legacy_hash(block)
+
+        hash_nonce = nonce_hasher(block.serialize_header())
+
+        before_rate = measure(before, args.seconds)
+        after_rate = measure(hash_nonce, args.seconds)
+        print(f"{tx_count:>12} {before_rate:>14,.0f} {after_rate:>14,.0f} "
+              f"{after_rate / before_rate:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
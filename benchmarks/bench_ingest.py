@@ -0,0 +1,58 @@
+"""Measure bulk transaction admission throughput on one core
+
+Usage: python benchmarks/bench_ingest.py [--count 100000] [--target 50000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger.blockchain_logic import Blockchain
+
+
+def make_items(count: int):
+    return [
+        {'sender': f'addr_{i % 1000}', 'receiver': f'addr_{(i * 7) % 1000}', 'amount': 1.0 + i}
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--target', type=int, default=50_000,
+                        help='admitted transactions per second to aim for')
+    args = parser.parse_args()
+
+    items = make_items(args.count)
+    ndjson = '\n'.join(json.dumps(item) for item in items).encode()
+
+    started = time.perf_counter()
+    parsed = [json.loads(line) for line in ndjson.splitlines()]
+    parse_time = time.perf_counter() - started
+
+    chain = Blockchain(difficulty=1, mempool_size=args.count)
+    started = time.perf_counter()
+    results = chain.add_transactions(parsed)
+    admit_time = time.perf_counter() - started
+
+    accepted = sum(result['success'] for result in results)
+    rate = accepted / admit_time
+    print(f"parsed {len(parsed):,} NDJSON lines in {parse_time:.3f}s "
+          f"({len(parsed) / parse_time:,.0f} lines/s)")
+    print(f"admitted {accepted:,}/{args.count:,} in {admit_time:.3f}s: {rate:,.0f} tx/s "
+          f"(target {args.target:,} tx/s: {'met' if rate >= args.target else 'missed'})")
+
+    single = Blockchain(difficulty=1, mempool_size=args.count)
+    started = time.perf_counter()
+    for item in items:
+        single.add_transaction(item['sender'], item['receiver'], item['amount'])
+    single_time = time.perf_counter() - started
+    print(f"one add_transaction call per tx: {args.count / single_time:,.0f} tx/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Compare bytes per mined transaction for the old and compact representations
+
+Usage: python benchmarks/bench_memory.py [--transactions 200000] [--addresses 1000]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger.blockchain_logic import MinedTransactions, Transaction
+
+BLOCK_SIZE = 1_000
+
+
+class LegacyTransaction:
+    """The pre-__slots__ Transaction: one instance dict per transaction"""
+
+    def __init__(self, transaction_id, sender, receiver, amount, timestamp):
+        self.sender = sender
+        self.receiver = receiver
+        self.amount = amount
+        self.timestamp = timestamp
+        self.transaction_id = transaction_id
+
+
+def make_blocks(count: int, addresses: int):
+    """Store records of `count` transactions, encoded as the store would hold them"""
+    blocks = []
+    for start in range(0, count, BLOCK_SIZE):
+        records = [
+            [Transaction(f"addr_{i % addresses}", f"addr_{(i * 7) % addresses}",
+                         1.0 + i, timestamp=1700000000.0 + i).transaction_id,
+             f"addr_{i % addresses}", f"addr_{(i * 7) % addresses}", 1.0 + i, 1700000000.0 + i]
+            for i in range(start, min(count, start + BLOCK_SIZE))
+        ]
+        blocks.append(json.dumps(records).encode())
+    return blocks
+
+
+def measure(decode, blocks) -> int:
+    """Bytes still allocated after decoding every block with decode(records)"""
+    gc.collect()
+    tracemalloc.start()
+    decoded = [decode(json.loads(block)) for block in blocks]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del decoded
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--transactions', type=int, default=200_000)
+    parser.add_argument('--addresses', type=int, default=1_000)
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.transactions, args.addresses)
+    representations = [
+        # Columns first, so the shared address table is counted against them
+        ('typed columns', MinedTransactions.pack),
+        ('dict objects', lambda records: [LegacyTransaction(*record) for record in records]),
+        ('__slots__ objects', lambda records: [Transaction.from_record(record) for record in records]),
+    ]
+
+    results = {name: measure(decode, blocks) for name, decode in representations}
+    before = results['dict objects']
+    print(f"{args.transactions:,} transactions, {args.addresses:,} addresses")
+    print(f"{'representation':>18} {'bytes/tx':>10} {'vs dict':>9}")
+    for name, size in results.items():
+        print(f"{name:>18} {size / args.transactions:>10.1f} {before / size:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
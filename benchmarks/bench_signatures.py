@@ -0,0 +1,64 @@
+"""Throughput of Ed25519 transaction signature verification
+
+Verifies the same signed transactions one at a time, in batches on the
+verifier's thread pool, and again from the verification cache.
+
+Usage: python benchmarks/bench_signatures.py [--transactions 100000] [--workers 1 2 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger.signatures import (SignatureVerifier, address_for, generate_keypair, sign,
+                               signing_message)
+
+SENDERS = 100
+
+
+def signed_messages(count: int):
+    """(public key, signature, message) for `count` transfers from SENDERS key pairs"""
+    keys = [generate_keypair() for _ in range(SENDERS)]
+    items = []
+    for i in range(count):
+        private_key, public_key = keys[i % SENDERS]
+        message = signing_message(address_for(public_key), f"addr_{i:06d}", 1.5, 1700000000.0 + i)
+        items.append((public_key, sign(private_key, message), message))
+    return items
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transactions', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    items = signed_messages(args.transactions)
+    print(f"signed {len(items):,} transactions in {time.perf_counter() - started:.1f}s "
+          f"({os.cpu_count()} CPUs)")
+
+    started = time.perf_counter()
+    assert all(SignatureVerifier._verify(item) for item in items)
+    baseline = time.perf_counter() - started
+    print(f"{'mode':>22} {'seconds':>8} {'verifications/s':>16} {'speedup':>8}")
+    print(f"{'one at a time':>22} {baseline:>8.2f} {len(items) / baseline:>16,.0f} {1:>7.2f}x")
+
+    for workers in args.workers:
+        verifier = SignatureVerifier(cache_size=len(items), workers=workers)
+        started = time.perf_counter()
+        assert all(verifier.verify_many(items))
+        elapsed = time.perf_counter() - started
+        print(f"{f'batched, {workers} threads':>22} {elapsed:>8.2f} {len(items) / elapsed:>16,.0f} "
+              f"{baseline / elapsed:>7.2f}x")
+
+    started = time.perf_counter()
+    assert all(verifier.verify_many(items))
+    elapsed = time.perf_counter() - started
+    print(f"{'cached':>22} {elapsed:>8.2f} {len(items) / elapsed:>16,.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
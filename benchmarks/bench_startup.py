@@ -0,0 +1,57 @@
+"""Time opening a stored chain with and without a balance checkpoint
+
+Also times the first transaction submitted right after opening, while the
+location indexes are still being rebuilt in the background, and how long
+that rebuild takes.
+
+Usage: python benchmarks/bench_startup.py [--blocks 10000 50000 100000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate_chain
+
+from ledger.blockchain_logic import Blockchain
+from ledger.checkpoints import CHECKPOINT_DIR
+
+
+def open_chain(data_dir: str):
+    """(seconds to open, seconds for the first submit, seconds until the location indexes are built)"""
+    started = time.perf_counter()
+    chain = Blockchain(difficulty=0, data_dir=data_dir)
+    opened = time.perf_counter()
+    chain.add_transaction('bench-sender', 'bench-receiver', 1.0)
+    submitted = time.perf_counter()
+    chain.ensure_location_indexes(wait=True)
+    built = time.perf_counter()
+    chain.chain.close()
+    return opened - started, submitted - opened, built - opened
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--blocks', type=int, nargs='+', default=[10_000, 50_000, 100_000])
+    parser.add_argument('--tx-per-block', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'blocks':>9} {'full replay s':>14} {'checkpoint s':>13} {'first submit ms':>16} "
+          f"{'index build s':>14}")
+    for blocks in args.blocks:
+        with tempfile.TemporaryDirectory() as data_dir:
+            generate_chain(blocks, args.tx_per_block, data_dir=data_dir).chain.close()
+            shutil.rmtree(os.path.join(data_dir, CHECKPOINT_DIR))
+            # Replays every block, then checkpoints the tip for the next start
+            replay, _, _ = open_chain(data_dir)
+            from_checkpoint, first_submit, index_build = open_chain(data_dir)
+        print(f"{blocks:>9,} {replay:>14.2f} {from_checkpoint:>13.3f} {first_submit * 1000:>16.1f} "
+              f"{index_build:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""Benchmark the ledger's hot paths on a deterministic synthetic chain
+
+Reports ops/sec, p50/p99 latency and peak traced memory for each
+benchmark and writes the results as JSON, so runs can be compared across
+commits:
+
+    python benchmarks/suite.py --blocks 10000 --output before.json
+    python benchmarks/suite.py --blocks 10000 --output after.json --compare before.json
+
+Chains of up to 1M blocks are supported; above ~100k blocks pass
+--data-dir so blocks are stored on disk rather than in memory.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import address, generate_chain
+
+from ledger.blockchain_logic import Block, Transaction
+
+
+def percentile(sorted_values, percent: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(1, -(-percent * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def run(name: str, operation, iterations: int, memory_iterations: int = 3) -> dict:
+    """Time `iterations` calls of operation(i), then trace memory over a few more"""
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        op_started = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - op_started)
+    total = time.perf_counter() - started
+
+    # Traced separately: tracemalloc slows allocation-heavy code several-fold
+    tracemalloc.start()
+    for i in range(min(memory_iterations, iterations)):
+        operation(i)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'name': name,
+        'iterations': iterations,
+        'ops_per_sec': iterations / total if total else float('inf'),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'peak_memory_bytes': peak,
+    }
+
+
+def benchmarks(chain, args):
+    """(name, operation, iterations) for every hot path"""
+    rng = random.Random(args.seed)
+    height = len(chain.chain)
+    addresses = [address(rng.randrange(args.addresses)) for _ in range(args.iterations)]
+    heights = [rng.randrange(height) for _ in range(args.iterations)]
+
+    def mine(i):
+        transactions = [
+            Transaction(address(j), address(j + 1), 1.0, timestamp=1700000000.0 + j)
+            for j in range(args.tx_per_block)
+        ]
+        Block(height + i, transactions, chain.snapshot.tip_hash,
+              timestamp=1800000000.0 + i).mine_block(args.mine_difficulty)
+
+    def validate_incremental(i):
+        chain.validated_height = height - 2
+        chain.is_chain_valid()
+
+    return [
+        (f'mine_block (difficulty {args.mine_difficulty})', mine, args.mine_iterations),
+        ('is_chain_valid (full audit)', lambda i: chain.is_chain_valid(full=True), args.audit_iterations),
+        ('is_chain_valid (new tip only)', validate_incremental, args.iterations),
+        ('publish snapshot (dashboard totals)', lambda i: chain._publish_snapshot(), args.iterations),
+        ('get_wallet_balance', lambda i: chain.get_wallet_balance(addresses[i]), args.iterations),
+        ('get_transaction_history (page of 50)',
+         lambda i: chain.get_transaction_history_page(addresses[i], limit=50), args.iterations),
+        ('get_transaction_history (full)',
+         lambda i: chain.get_transaction_history(addresses[i]), min(args.iterations, 200)),
+        ('get_chain_data (100 blocks)',
+         lambda i: chain.get_chain_data(max(0, heights[i] - 100), 100), args.iterations),
+        ('get_chain_data (100 headers)',
+         lambda i: chain.get_chain_data(max(0, heights[i] - 100), 100, headers_only=True), args.iterations),
+    ]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline_path: str) -> None:
+    with open(baseline_path) as baseline_file:
+        baseline = {result['name']: result for result in json.load(baseline_file)['results']}
+    print(f"\nvs {baseline_path}")
+    for result in results:
+        before = baseline.get(result['name'])
+        if before is None:
+            continue
+        print(f"{result['name']:>38}: ops/sec {result['ops_per_sec'] / before['ops_per_sec']:6.2f}x, "
+              f"p99 {before['p99_ms']:9.3f} -> {result['p99_ms']:9.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=1_000)
+    parser.add_argument('--tx-per-block', type=int, default=10)
+    parser.add_argument('--addresses', type=int, default=1_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', help='store the chain on disk here (must be empty); '
+                                           'defaults to memory')
+    parser.add_argument('--iterations', type=int, default=1_000)
+    parser.add_argument('--mine-difficulty', type=int, default=3)
+    parser.add_argument('--mine-iterations', type=int, default=20)
+    parser.add_argument('--audit-iterations', type=int, default=3)
+    parser.add_argument('--only', help='run only benchmarks whose name contains this')
+    parser.add_argument('--output', help='write JSON results here')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as scratch:
+        data_dir = args.data_dir or (scratch if args.blocks > 100_000 else None)
+        chain = generate_chain(args.blocks, args.tx_per_block, args.addresses,
+                               seed=args.seed, data_dir=data_dir)
+        print(f"generated {len(chain.chain):,} blocks x {args.tx_per_block} tx, "
+              f"{args.addresses:,} addresses in {time.perf_counter() - started:.1f}s")
+
+        results = []
+        print(f"{'benchmark':>38} {'ops/sec':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak MiB':>9}")
+        for name, operation, iterations in benchmarks(chain, args):
+            if args.only and args.only not in name:
+                continue
+            result = run(name, operation, iterations)
+            results.append(result)
+            print(f"{name:>38} {result['ops_per_sec']:>12,.1f} {result['p50_ms']:>10.3f} "
+                  f"{result['p99_ms']:>10.3f} {result['peak_memory_bytes'] / 2**20:>9.2f}")
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {key: value for key, value in vars(args).items()
+                       if key not in ('output', 'compare', 'only')},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Deterministic synthetic chains for benchmarks
+
+The same arguments always produce the same blocks, byte for byte: every
+timestamp, address and amount comes from the block height and a seeded
+random generator, so results can be compared across commits.
+
+Usage as a script (writes a persistent chain that the web app can load):
+    python benchmarks/synthetic.py --blocks 100000 --data-dir blockchain_data
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger.blockchain_logic import Block, Blockchain, Transaction
+from ledger.storage import BlockStore
+
+GENESIS_TIMESTAMP = 1700000000.0
+BLOCK_INTERVAL = 60.0
+REWARD = 6.25
+
+
+def address(number: int) -> str:
+    return f"addr_{number:06d}"
+
+
+def iter_blocks(blocks: int, tx_per_block: int = 10, addresses: int = 1000,
+                difficulty: int = 0, seed: int = 42):
+    """Yield `blocks` mined blocks, starting with a genesis block
+
+    Each block after genesis holds a reward to a random address plus
+    `tx_per_block` transfers between random addresses. With difficulty 0
+    every nonce is valid, so generation costs only the hashing needed to
+    build each block; higher difficulties run a real Proof of Work search.
+    """
+    rng = random.Random(seed)
+    genesis = Block(0, [Transaction("0", "Genesis", 0, timestamp=GENESIS_TIMESTAMP)],
+                    "0" * 64, timestamp=GENESIS_TIMESTAMP)
+    genesis.compact()
+    yield genesis
+
+    previous_hash = genesis.hash
+    for height in range(1, blocks):
+        block_time = GENESIS_TIMESTAMP + height * BLOCK_INTERVAL
+        transactions = [Transaction("0", address(rng.randrange(addresses)), REWARD,
+                                    timestamp=block_time)]
+        for position in range(tx_per_block):
+            transactions.append(Transaction(
+                address(rng.randrange(addresses)),
+                address(rng.randrange(addresses)),
+                round(rng.uniform(0.01, 10.0), 2),
+                timestamp=block_time - BLOCK_INTERVAL + position * BLOCK_INTERVAL / (tx_per_block + 1)
+            ))
+
+        block = Block(height, transactions, previous_hash, timestamp=block_time)
+        if difficulty:
+            hash_prefix = "0" * difficulty
+            while not block.hash.startswith(hash_prefix):
+                block.nonce += 1
+                block.hash = block.calculate_hash()
+        block.compact()
+        previous_hash = block.hash
+        yield block
+
+
+def generate_chain(blocks: int, tx_per_block: int = 10, addresses: int = 1000,
+                   difficulty: int = 0, seed: int = 42, data_dir: str = None) -> Blockchain:
+    """Build a Blockchain holding a synthetic chain
+
+    With data_dir the blocks are written to a BlockStore there first (the
+    directory must be empty) and the Blockchain loads it as it would at
+    startup; otherwise the chain lives in memory.
+    """
+    generated = iter_blocks(blocks, tx_per_block, addresses, difficulty, seed)
+
+    if data_dir:
+        store = BlockStore(data_dir, Block.from_record)
+        if len(store):
+            raise ValueError(f"{data_dir} already holds a chain")
+        for block in generated:
+            store.append(block)
+        store.close()
+        return Blockchain(difficulty=difficulty, data_dir=data_dir)
+
+    chain = Blockchain(difficulty=difficulty)
+    chain.chain = list(generated)
+    chain.rebuild_indexes()
+    chain.validated_height = len(chain.chain) - 1
+    return chain
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=1_000)
+    parser.add_argument('--tx-per-block', type=int, default=10)
+    parser.add_argument('--addresses', type=int, default=1_000)
+    parser.add_argument('--difficulty', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', required=True)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    chain = generate_chain(args.blocks, args.tx_per_block, args.addresses,
+                           args.difficulty, args.seed, args.data_dir)
+    print(f"wrote {len(chain.chain):,} blocks ({chain.get_total_transactions():,} transactions) "
+          f"to {args.data_dir} in {time.perf_counter() - started:.1f}s; tip {chain.snapshot.tip_hash}")
+
+
+if __name__ == '__main__':
+    main()
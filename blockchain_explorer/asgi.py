@@ -1,5 +1,8 @@
 """
 ASGI config for blockchain_explorer project.
+
+Serve with an ASGI server (e.g. `uvicorn blockchain_explorer.asgi:application`)
+for the live /api/events/ feed; under WSGI every open stream holds a thread.
 """
 
 import os
@@ -7,4 +10,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blockchain_explorer.settings')
 
-application = get_asgi_application()
\ No newline at end of file
+application = get_asgi_application()
+
+from ledger.apps import start_audits  # noqa: E402 (needs the app registry)
+
+start_audits()
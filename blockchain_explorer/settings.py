@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ledger.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -38,6 +39,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'ledger.middleware.ChainSyncMiddleware',
 ]
 
 ROOT_URLCONF = 'blockchain_explorer.urls'
@@ -104,4 +106,36 @@ LOGOUT_REDIRECT_URL = '/'
 
 # Crispy Forms
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
-CRISPY_TEMPLATE_PACK = "bootstrap5"
\ No newline at end of file
+CRISPY_TEMPLATE_PACK = "bootstrap5"
+
+# Blockchain
+# Seconds between background full-chain audits (0 disables them)
+BLOCKCHAIN_AUDIT_INTERVAL = config('BLOCKCHAIN_AUDIT_INTERVAL', default=300, cast=int)
+# Processes used by each audit (1 checks blocks in order on the audit thread)
+BLOCKCHAIN_AUDIT_WORKERS = config('BLOCKCHAIN_AUDIT_WORKERS', default=1, cast=int)
+# Bearer tokens accepted by the bulk ingestion API, comma separated
+LEDGER_API_TOKENS = [token for token in config('LEDGER_API_TOKENS', default='').split(',') if token]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'keyvalue': {
+            'format': 'time={asctime} level={levelname} logger={name} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'keyvalue',
+        },
+    },
+    'loggers': {
+        # INFO logs each mined block and full audit; DEBUG adds every transaction
+        'ledger': {
+            'handlers': ['console'],
+            'level': config('LEDGER_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
@@ -13,7 +13,19 @@ urlpatterns = [
     path('mine/', views.mine_block, name='mine_block'),
     path('wallet/', views.wallet_view, name='wallet'),
     path('api/blockchain/', views.api_blockchain, name='api_blockchain'),
+    path('api/wallets/<str:address>/history/', views.api_transaction_history, name='api_transaction_history'),
+    path('api/transactions/<str:transaction_id>/proof/', views.api_transaction_proof, name='api_transaction_proof'),
+    path('api/stats/', views.api_stats, name='api_stats'),
+    path('api/stats/richest/', views.api_stats_richest, name='api_stats_richest'),
+    path('api/stats/miners/', views.api_stats_miners, name='api_stats_miners'),
+    path('api/stats/blocks/', views.api_stats_block_volume, name='api_stats_block_volume'),
+    path('api/stats/daily/', views.api_stats_daily, name='api_stats_daily'),
+    path('api/events/', views.api_events, name='api_events'),
+    path('api/mine/', views.api_mine, name='api_mine'),
+    path('api/mine/<str:job_id>/', views.api_mining_job, name='api_mining_job'),
     path('api/create-transaction/', views.api_create_transaction, name='api_create_transaction'),
+    path('api/transactions/bulk/', views.api_bulk_create_transactions, name='api_bulk_create_transactions'),
+    path('metrics', views.metrics, name='metrics'),
     
     # Authentication URLs
     path('login/', auth_views.LoginView.as_view(template_name='login.html'), name='login'),
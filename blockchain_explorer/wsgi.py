@@ -7,4 +7,8 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blockchain_explorer.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+from ledger.apps import start_audits  # noqa: E402 (needs the app registry)
+
+start_audits()
@@ -0,0 +1,193 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .compact import ADDRESSES, TransactionColumns
+
+INITIAL_CAPACITY = 1024
+SECONDS_PER_DAY = 86_400
+# Sender of mining rewards (and the genesis transaction)
+MINT_ADDRESS = "0"
+
+
+class TransactionColumnStore:
+    """Every mined transaction as NumPy columns, for vectorized aggregates
+
+    Columns hold the block index, sender and receiver address IDs (from
+    the shared AddressTable), amount and timestamp. They grow by doubling
+    and are extended one block at a time as blocks are appended, so the
+    queries below never walk Python objects.
+
+    Appends must be serialized by the caller (Blockchain does them under
+    its writer lock). Each append publishes the new (row count, block
+    count) pair in one assignment and queries read only what that pair
+    covers, so they can run concurrently with an append.
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self._size = 0
+        self._published = (0, 0)
+        self._block_index = np.empty(capacity, dtype=np.int64)
+        # np.bincount works on intp; storing IDs that way saves a conversion per query
+        self._sender = np.empty(capacity, dtype=np.intp)
+        self._receiver = np.empty(capacity, dtype=np.intp)
+        self._amount = np.empty(capacity, dtype=np.float64)
+        self._timestamp = np.empty(capacity, dtype=np.float64)
+        self._block_starts: List[int] = []
+        self._mint_id = ADDRESSES.intern(MINT_ADDRESS)
+
+    def __len__(self) -> int:
+        return self._published[0]
+
+    def append_block(self, block) -> None:
+        """Add a mined block's transactions"""
+        transactions = block.transactions
+        if isinstance(transactions, TransactionColumns):
+            self.extend(
+                block.index,
+                np.frombuffer(transactions.senders, dtype=np.uint32),
+                np.frombuffer(transactions.receivers, dtype=np.uint32),
+                np.frombuffer(transactions.amounts, dtype=np.float64),
+                np.frombuffer(transactions.timestamps, dtype=np.float64),
+            )
+        else:
+            intern = ADDRESSES.intern
+            self.extend(
+                block.index,
+                np.array([intern(tx.sender) for tx in transactions], dtype=np.uint32),
+                np.array([intern(tx.receiver) for tx in transactions], dtype=np.uint32),
+                np.array([tx.amount for tx in transactions], dtype=np.float64),
+                np.array([tx.timestamp for tx in transactions], dtype=np.float64),
+            )
+
+    def extend(self, block_index: int, senders, receivers, amounts, timestamps) -> None:
+        """Add one block's columns (address IDs must come from ADDRESSES)"""
+        start = self._size
+        end = start + len(amounts)
+        if end > len(self._amount):
+            self._grow(end)
+
+        self._block_index[start:end] = block_index
+        self._sender[start:end] = senders
+        self._receiver[start:end] = receivers
+        self._amount[start:end] = amounts
+        self._timestamp[start:end] = timestamps
+        self._block_starts.append(start)
+        self._size = end
+        self._published = (end, len(self._block_starts))
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(needed, 2 * len(self._amount))
+        for name in ('_block_index', '_sender', '_receiver', '_amount', '_timestamp'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _columns(self):
+        size = self._published[0]
+        return (self._block_index[:size], self._sender[:size], self._receiver[:size],
+                self._amount[:size], self._timestamp[:size])
+
+    def balances(self) -> np.ndarray:
+        """Balance of every interned address, indexed by address ID"""
+        _, sender, receiver, amount, _ = self._columns()
+        length = len(ADDRESSES)
+        received = np.bincount(receiver, weights=amount, minlength=length)
+        sent = np.bincount(sender, weights=amount, minlength=length)
+        balances = received - sent
+        # Rewards are minted, not debited from the mint address
+        balances[self._mint_id] += sent[self._mint_id]
+        return balances
+
+    def summary(self) -> Dict:
+        """Totals over the whole chain"""
+        _, sender, receiver, amount, _ = self._columns()
+        minted = sender == self._mint_id
+        length = len(ADDRESSES)
+        active = np.bincount(sender, minlength=length) + np.bincount(receiver, minlength=length)
+        active[self._mint_id] = 0
+        return {
+            'blocks': self._published[1],
+            'transactions': int(len(amount)),
+            'transfers': int(len(amount) - np.count_nonzero(minted)),
+            'volume': float(amount.sum() - amount[minted].sum()),
+            'rewards': float(amount[minted].sum()),
+            'active_addresses': int(np.count_nonzero(active)),
+        }
+
+    def richest(self, limit: int = 10) -> List[Dict]:
+        """Addresses with the highest balances, richest first"""
+        balances = self.balances()
+        balances[self._mint_id] = -np.inf
+        return [
+            {'address': ADDRESSES[address_id], 'balance': float(balances[address_id])}
+            for address_id in self._top(balances, limit) if np.isfinite(balances[address_id])
+        ]
+
+    def miner_rewards(self, limit: int = 10) -> List[Dict]:
+        """Miners ranked by total rewards, with the number of blocks they mined"""
+        block_index, sender, receiver, amount, _ = self._columns()
+        rewards = (sender == self._mint_id) & (block_index > 0)
+        miners = receiver[rewards]
+        length = len(ADDRESSES)
+        totals = np.bincount(miners, weights=amount[rewards], minlength=length)
+        blocks = np.bincount(miners, minlength=length)
+        return [
+            {'address': ADDRESSES[address_id], 'rewards': float(totals[address_id]),
+             'blocks': int(blocks[address_id])}
+            for address_id in self._top(totals, limit) if blocks[address_id]
+        ]
+
+    def block_volume(self, from_height: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Per-block transfer count and volume, excluding mining rewards"""
+        size, blocks = self._published
+        stop = blocks if limit is None else min(blocks, from_height + limit)
+        starts = self._block_starts[from_height:stop]
+        if not starts:
+            return []
+        first = starts[0]
+        last = self._block_starts[stop] if stop < blocks else size
+        sender = self._sender[:size]
+        amount = self._amount[:size]
+        offsets = np.array(starts) - first
+        transfers = sender[first:last] != self._mint_id
+
+        counts = np.add.reduceat(transfers.astype(np.int64), offsets)
+        volumes = np.add.reduceat(np.where(transfers, amount[first:last], 0.0), offsets)
+        # reduceat returns the element itself for empty segments; blocks are never empty
+        return [
+            {'block_index': from_height + i, 'transfers': int(counts[i]), 'volume': float(volumes[i])}
+            for i in range(len(starts))
+        ]
+
+    def daily_counts(self) -> List[Dict]:
+        """Transaction count and transfer volume per UTC day, oldest first"""
+        _, sender, _, amount, timestamp = self._columns()
+        if not len(timestamp):
+            return []
+        # Truncating to whole seconds first is much faster than a float floor division
+        days = timestamp.astype(np.int64) // SECONDS_PER_DAY
+        first_day = int(days.min())
+        days -= first_day
+        counts = np.bincount(days)
+        volumes = np.bincount(days, weights=np.where(sender != self._mint_id, amount, 0.0))
+        return [
+            {
+                'date': datetime.fromtimestamp((first_day + day) * SECONDS_PER_DAY,
+                                               tz=timezone.utc).strftime('%Y-%m-%d'),
+                'transactions': int(counts[day]),
+                'volume': float(volumes[day]),
+            }
+            for day in np.flatnonzero(counts)
+        ]
+
+    @staticmethod
+    def _top(values: np.ndarray, limit: int) -> List[int]:
+        """Indexes of the `limit` largest values, largest first"""
+        limit = min(limit, len(values))
+        if limit <= 0:
+            return []
+        top = np.argpartition(values, -limit)[-limit:]
+        return [int(i) for i in top[np.argsort(-values[top], kind='stable')]]
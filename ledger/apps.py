@@ -2,4 +2,19 @@ from django.apps import AppConfig
 
 class LedgerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'ledger'
\ No newline at end of file
+    name = 'ledger'
+
+def start_audits():
+    """Start the periodic full-chain audit in a server process
+
+    Called by the ASGI and WSGI entrypoints rather than from ready(), so
+    management commands and tests never start it. Every server worker
+    runs the loop, but only one of them audits at a time (see
+    Blockchain.start_audit_thread).
+    """
+    from django.conf import settings
+    from .blockchain_logic import blockchain
+    
+    interval = getattr(settings, 'BLOCKCHAIN_AUDIT_INTERVAL', 0)
+    if interval > 0:
+        blockchain.start_audit_thread(interval, getattr(settings, 'BLOCKCHAIN_AUDIT_WORKERS', 1))
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import count, islice
+from typing import Dict, List, Optional, Tuple
+
+from .filters import build_filter
+from .merkle import merkle_root
+from .mining import POOL_CONTEXT, nonce_hasher
+from .signatures import VERIFIER, SignedMessage, authorization_error, signing_message
+from .storage import BlockStore
+
+# Ranges per worker; more ranges balance load better but cost more round trips
+RANGES_PER_WORKER = 8
+MIN_RANGE_SIZE = 256
+
+# Set in each audit worker process that reads blocks from a BlockStore
+_store: Optional[BlockStore] = None
+
+
+def transaction_id(sender: str, receiver: str, amount: float, timestamp: float) -> str:
+    """The ID a transaction with these fields must have"""
+    transaction_string = f"{sender}{receiver}{amount}{timestamp}"
+    return hashlib.sha256(transaction_string.encode()).hexdigest()[:16]
+
+
+def serialize_header(index: int, merkle_root: str, timestamp: float, previous_hash: str) -> bytes:
+    """Serialize every hashed block field except the nonce"""
+    return json.dumps({
+        'index': index,
+        'merkle_root': merkle_root,
+        'timestamp': timestamp,
+        'previous_hash': previous_hash
+    }, sort_keys=True).encode()
+
+
+def signed_messages(records: List[Dict]) -> List[SignedMessage]:
+    """(public key, signature, message) of every signed transaction in the records"""
+    return [
+        (tx[5], tx[6], signing_message(*tx[1:5]))
+        for record in records for tx in record['transactions'] if len(tx) == 7
+    ]
+
+
+def check_record(record: Dict, previous_hash: str, difficulty: int,
+                 require_signatures: bool = False,
+                 signatures_valid: Optional[bool] = None) -> Optional[str]:
+    """Check a Block.to_record() dict against its predecessor's hash
+
+    Returns None if the block is valid, otherwise the reason it is not.
+    Only stored fields are used, so a block can be checked without the
+    rest of the chain. Signatures already in the verification cache (from
+    mempool entry) are not verified again; a caller that has verified the
+    record's signatures itself passes the outcome as signatures_valid.
+    """
+    transactions = record['transactions']
+    if any(tx[0] != transaction_id(*tx[1:5]) for tx in transactions):
+        return "invalid transaction"
+    if len({tx[0] for tx in transactions}) != len(transactions):
+        return "duplicate transaction"
+
+    for tx in transactions:
+        reason = authorization_error(tx[1], *(tx[5:7] or (None, None)), require_signatures)
+        if reason is not None:
+            return reason
+    if signatures_valid is None:
+        signatures_valid = all(VERIFIER.verify_many(signed_messages([record])))
+    if not signatures_valid:
+        return "invalid signature"
+
+    if record['merkle_root'] != merkle_root([tx[0] for tx in transactions]):
+        return "invalid merkle root"
+
+    address_filter = record.get('address_filter')
+    if address_filter is not None and address_filter != build_filter(
+            address for tx in transactions for address in tx[1:3]).hex():
+        return "invalid address filter"
+
+    header = serialize_header(record['index'], record['merkle_root'],
+                              record['timestamp'], record['previous_hash'])
+    if record['hash'] != nonce_hasher(header)(record['nonce']):
+        return "invalid hash"
+
+    if record['previous_hash'] != previous_hash:
+        return "invalid previous hash"
+
+    if record['hash'][:difficulty] != "0" * difficulty:
+        return "invalid proof of work"
+
+    return None
+
+
+def check_records(records: List[Dict], start: int, previous_hash: str, difficulty: int,
+                  require_signatures: bool = False) -> Optional[Tuple[int, str]]:
+    """Check consecutive records starting at height `start`
+
+    All their signatures are verified up front in one batch, spread over
+    the verifier's thread pool, and each block is then checked against
+    its share of the results. Audit workers start with an empty cache, so
+    nothing is verified twice. Returns (height, reason) for the first
+    invalid block, or None.
+    """
+    messages = [signed_messages([record]) for record in records]
+    verified = iter(VERIFIER.verify_many([message for block in messages for message in block]))
+    for height, record, block in zip(count(start), records, messages):
+        signatures_valid = all(list(islice(verified, len(block))))
+        reason = check_record(record, previous_hash, difficulty, require_signatures,
+                              signatures_valid)
+        if reason is not None:
+            return height, reason
+        previous_hash = record['hash']
+    return None
+
+
+@dataclass
+class AuditResult:
+    """Outcome of a full-chain audit"""
+    valid: bool
+    blocks_checked: int
+    elapsed: float
+    workers: int
+    first_invalid_height: Optional[int] = None
+    reason: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'valid': self.valid,
+            'blocks_checked': self.blocks_checked,
+            'elapsed': self.elapsed,
+            'workers': self.workers,
+            'first_invalid_height': self.first_invalid_height,
+            'reason': self.reason,
+        }
+
+
+def _open_store(directory: str) -> None:
+    global _store
+    _store = BlockStore(directory, decode=None, readonly=True)
+
+
+def _check_stored_range(start: int, end: int, difficulty: int,
+                        require_signatures: bool) -> Optional[Tuple[int, str]]:
+    if end > len(_store):
+        _store.refresh()
+    records = [_store.read_record(height) for height in range(start, end)]
+    return check_records(records, start, _store.read_record(start - 1)['hash'], difficulty,
+                         require_signatures)
+
+
+def audit_chain(chain, difficulty: int, workers: Optional[int] = None,
+                range_size: Optional[int] = None, require_signatures: bool = False) -> AuditResult:
+    """Validate blocks 1..len(chain)-1 in parallel ranges on a process pool
+
+    Each range is checked independently: a block only depends on its
+    predecessor's stored hash. When `chain` is a BlockStore, workers map
+    its files themselves; otherwise the blocks' records are sent to them.
+    At most two ranges per worker are in flight, and once an invalid
+    block is found no later ranges are started. The lowest invalid height
+    and its reason are reported.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    height = len(chain)
+    range_size = range_size or max(MIN_RANGE_SIZE, -(-height // (workers * RANGES_PER_WORKER)))
+    ranges = iter(range(1, height, range_size))
+
+    directory = chain.directory if isinstance(chain, BlockStore) else None
+    pool_options = {'initializer': _open_store, 'initargs': (directory,)} if directory else {}
+    first_invalid: Optional[Tuple[int, str]] = None
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT, **pool_options) as pool:
+        def submit(start):
+            end = min(height, start + range_size)
+            if directory:
+                return pool.submit(_check_stored_range, start, end, difficulty, require_signatures)
+            records = [chain[h].to_record() for h in range(start, end)]
+            return pool.submit(check_records, records, start, chain[start - 1].hash, difficulty,
+                               require_signatures)
+
+        in_flight = {}
+        for start in ranges:
+            in_flight[submit(start)] = start
+            if len(in_flight) >= 2 * workers:
+                break
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                del in_flight[future]
+                found = future.result()
+                if found is not None and (first_invalid is None or found[0] < first_invalid[0]):
+                    first_invalid = found
+            for start in ranges:
+                if first_invalid is not None and start > first_invalid[0]:
+                    break
+                in_flight[submit(start)] = start
+                if len(in_flight) >= 2 * workers:
+                    break
+
+    return AuditResult(
+        valid=first_invalid is None,
+        blocks_checked=height if first_invalid is None else first_invalid[0] + 1,
+        elapsed=time.perf_counter() - started,
+        workers=workers,
+        first_invalid_height=first_invalid[0] if first_invalid else None,
+        reason=first_invalid[1] if first_invalid else None,
+    )
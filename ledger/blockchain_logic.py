@@ -1,39 +1,187 @@
-import hashlib
-import json
+import logging
+import math
+import threading
 import time
+from contextlib import nullcontext
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Set, Tuple
+
+from decouple import config
+
+from .audit import AuditResult, audit_chain, check_records, serialize_header, transaction_id
+from .cache import BlockSerializationCache
+from .checkpoints import BalanceCheckpoint, CheckpointStore
+from .compact import ADDRESSES, TransactionColumns
+from .events import CHAIN_EVENTS
+from .filters import AddressProbe, build_filter
+from .mempool import Mempool
+from .merkle import merkle_proof, merkle_root
+from .metrics import (BLOCKS_MINED, MINING_DURATION, MINING_HASHRATE, REGISTRY,
+                      TRANSACTIONS_ADDED, VALIDATION_DURATION)
+from .mining import MiningResult, ParallelMiner, ProgressCallback, WorkerStats, nonce_hasher
+from .shared_state import SharedState
+from .signatures import VERIFIER, authorization_error, signing_message
+from .storage import BlockStore
+
+logger = logging.getLogger(__name__)
+
+# Nonces between progress callbacks in the single-threaded miner
+PROGRESS_NONCES = 10_000
+# Blocks read and checked together during sequential validation
+VALIDATION_BATCH_BLOCKS = 1_024
+# Blocks a background location index build leaves to index under the writer lock
+LOCATION_CATCH_UP_BLOCKS = 64
 
 class Transaction:
-    """Represents a single blockchain transaction"""
+    """Represents a single blockchain transaction
+
+    A signed transaction carries the sender's Ed25519 public key and a
+    signature over signing_message(); see ledger.signatures.
+    """
+    __slots__ = ('sender', 'receiver', 'amount', 'timestamp', 'transaction_id',
+                 'public_key', 'signature')
     
-    def __init__(self, sender: str, receiver: str, amount: float, timestamp: float = None):
+    def __init__(self, sender: str, receiver: str, amount: float, timestamp: float = None,
+                 public_key: Optional[str] = None, signature: Optional[str] = None):
         self.sender = sender
         self.receiver = receiver
         self.amount = amount
         self.timestamp = timestamp or time.time()
+        self.public_key = public_key
+        self.signature = signature
         self.transaction_id = self.generate_id()
     
     def generate_id(self) -> str:
         """Generate unique transaction ID"""
-        transaction_string = f"{self.sender}{self.receiver}{self.amount}{self.timestamp}"
-        return hashlib.sha256(transaction_string.encode()).hexdigest()[:16]
+        return transaction_id(self.sender, self.receiver, self.amount, self.timestamp)
+    
+    def signing_message(self) -> bytes:
+        return signing_message(self.sender, self.receiver, self.amount, self.timestamp)
     
     def to_dict(self) -> Dict:
         """Convert transaction to dictionary"""
-        return {
+        data = {
             'transaction_id': self.transaction_id,
             'sender': self.sender,
             'receiver': self.receiver,
             'amount': self.amount,
             'timestamp': datetime.fromtimestamp(self.timestamp).strftime('%Y-%m-%d %H:%M:%S')
         }
+        if self.signature is not None:
+            data['public_key'] = self.public_key
+            data['signature'] = self.signature
+        return data
+    
+    def to_record(self) -> List:
+        """Compact, lossless form used by the block store"""
+        record = [self.transaction_id, self.sender, self.receiver, self.amount, self.timestamp]
+        if self.signature is not None:
+            record += [self.public_key, self.signature]
+        return record
+    
+    @classmethod
+    def from_record(cls, record: List) -> 'Transaction':
+        """Rebuild a transaction from to_record() output without rehashing"""
+        transaction = cls.__new__(cls)
+        (transaction.transaction_id, transaction.sender, transaction.receiver,
+         transaction.amount, transaction.timestamp) = record[:5]
+        transaction.public_key, transaction.signature = record[5:] or (None, None)
+        return transaction
     
     def __str__(self):
         return f"TX_{self.transaction_id}: {self.sender} → {self.receiver}: {self.amount} BTC"
 
+class TransactionView(Transaction):
+    """A mined transaction read from its block's columns
+
+    Fields are looked up when accessed and assignments write through to
+    the columns, so the view itself holds only a position.
+    """
+    __slots__ = ('_columns', '_position')
+    
+    def __init__(self, columns: 'MinedTransactions', position: int):
+        self._columns = columns
+        self._position = position
+    
+    @property
+    def transaction_id(self) -> str:
+        return self._columns.transaction_id(self._position)
+    
+    @transaction_id.setter
+    def transaction_id(self, value: str) -> None:
+        self._columns.set_transaction_id(self._position, value)
+    
+    @property
+    def sender(self) -> str:
+        return self._columns.sender(self._position)
+    
+    @sender.setter
+    def sender(self, value: str) -> None:
+        self._columns.senders[self._position] = ADDRESSES.intern(value)
+    
+    @property
+    def receiver(self) -> str:
+        return self._columns.receiver(self._position)
+    
+    @receiver.setter
+    def receiver(self, value: str) -> None:
+        self._columns.receivers[self._position] = ADDRESSES.intern(value)
+    
+    @property
+    def amount(self) -> float:
+        return self._columns.amounts[self._position]
+    
+    @amount.setter
+    def amount(self, value: float) -> None:
+        self._columns.amounts[self._position] = value
+    
+    @property
+    def timestamp(self) -> float:
+        return self._columns.timestamps[self._position]
+    
+    @timestamp.setter
+    def timestamp(self, value: float) -> None:
+        self._columns.timestamps[self._position] = value
+    
+    @property
+    def public_key(self) -> Optional[str]:
+        authorization = self._columns.authorization(self._position)
+        return authorization[0] if authorization else None
+    
+    @public_key.setter
+    def public_key(self, value: str) -> None:
+        self._columns.set_authorization(self._position, value, self.signature)
+    
+    @property
+    def signature(self) -> Optional[str]:
+        authorization = self._columns.authorization(self._position)
+        return authorization[1] if authorization else None
+    
+    @signature.setter
+    def signature(self, value: str) -> None:
+        self._columns.set_authorization(self._position, self.public_key, value)
+    
+    def to_record(self) -> List:
+        return self._columns.record(self._position)
+
+class MinedTransactions(TransactionColumns):
+    """Compact transaction list of a mined block; items are TransactionViews"""
+    __slots__ = ()
+    
+    def _view(self, position: int) -> TransactionView:
+        return TransactionView(self, position)
+
 class Block:
-    """Represents a single block in the blockchain"""
+    """Represents a single block in the blockchain
+
+    Hashes are kept as raw 32-byte values and exposed as hex strings.
+    Once mined, compact() moves the transactions into MinedTransactions
+    and builds the Bloom filter of the addresses they involve, which is
+    stored with the block so scans can skip blocks without reading them.
+    """
+    __slots__ = ('index', 'transactions', 'timestamp', 'nonce',
+                 '_previous_hash', '_merkle_root', '_hash', 'address_filter')
     
     def __init__(self, index: int, transactions: List[Transaction], 
                  previous_hash: str, timestamp: float = None):
@@ -42,58 +190,368 @@ class Block:
         self.timestamp = timestamp or time.time()
         self.previous_hash = previous_hash
         self.nonce = 0
+        self.address_filter: Optional[bytes] = None
+        self.merkle_root = self.calculate_merkle_root()
         self.hash = self.calculate_hash()
     
+    @property
+    def hash(self) -> str:
+        return self._hash.hex()
+    
+    @hash.setter
+    def hash(self, value: str) -> None:
+        self._hash = bytes.fromhex(value)
+    
+    @property
+    def previous_hash(self) -> str:
+        return self._previous_hash.hex()
+    
+    @previous_hash.setter
+    def previous_hash(self, value: str) -> None:
+        self._previous_hash = bytes.fromhex(value)
+    
+    @property
+    def merkle_root(self) -> str:
+        return self._merkle_root.hex()
+    
+    @merkle_root.setter
+    def merkle_root(self, value: str) -> None:
+        self._merkle_root = bytes.fromhex(value)
+    
+    def transaction_ids(self) -> List[str]:
+        """The block's transaction IDs, in order"""
+        if isinstance(self.transactions, TransactionColumns):
+            return self.transactions.transaction_ids()
+        return [tx.transaction_id for tx in self.transactions]
+    
+    def addresses(self) -> Set[str]:
+        """Every sender and receiver in the block"""
+        addresses = set()
+        for transaction in self.transactions:
+            addresses.add(transaction.sender)
+            addresses.add(transaction.receiver)
+        return addresses
+    
+    def compact(self) -> None:
+        """Build the address filter and pack the transactions into typed columns if they fit"""
+        if self.address_filter is None:
+            self.address_filter = build_filter(self.addresses())
+        if not isinstance(self.transactions, TransactionColumns):
+            packed = MinedTransactions.pack(tx.to_record() for tx in self.transactions)
+            if packed is not None:
+                self.transactions = packed
+    
+    def calculate_merkle_root(self) -> str:
+        """Calculate the Merkle root over the block's transaction IDs"""
+        return merkle_root(self.transaction_ids())
+    
+    def serialize_header(self) -> bytes:
+        """Serialize every hashed field except the nonce
+
+        Transactions are committed to through the Merkle root, so the
+        header stays the same size however many transactions the block has.
+        """
+        return serialize_header(self.index, self.merkle_root, self.timestamp, self.previous_hash)
+    
     def calculate_hash(self) -> str:
-        """Calculate SHA256 hash of the block"""
-        block_string = json.dumps({
-            'index': self.index,
-            'transactions': [tx.to_dict() for tx in self.transactions],
-            'timestamp': self.timestamp,
-            'previous_hash': self.previous_hash,
-            'nonce': self.nonce
-        }, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        """Calculate SHA256 hash of the block (header bytes followed by the nonce)"""
+        return nonce_hasher(self.serialize_header())(self.nonce)
     
-    def mine_block(self, difficulty: int = 2) -> None:
-        """Mine block using Proof of Work"""
-        print(f"Mining block {self.index}...")
+    def mine_block(self, difficulty: int = 2, miner: Optional[ParallelMiner] = None,
+                   progress: Optional[ProgressCallback] = None) -> MiningResult:
+        """Mine block using Proof of Work, optionally on a parallel miner
+
+        progress(hashes_tried, elapsed_seconds) is called periodically
+        while the search runs.
+        """
+        logger.debug("mining block index=%d difficulty=%d", self.index, difficulty)
         start_time = time.time()
         
-        target = "0" * difficulty
-        
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        if miner is not None:
+            result = miner.mine(self, difficulty, progress)
+        else:
+            # Serialize once; each attempt only hashes the nonce onto the midstate
+            hash_nonce = nonce_hasher(self.serialize_header())
+            target = "0" * difficulty
+            start_nonce = self.nonce
+            block_hash = self.hash
+            
+            while block_hash[:difficulty] != target:
+                self.nonce += 1
+                block_hash = hash_nonce(self.nonce)
+                if progress is not None and self.nonce % PROGRESS_NONCES == 0:
+                    progress(self.nonce - start_nonce, time.time() - start_time)
+            self.hash = block_hash
+            
+            elapsed = time.time() - start_time
+            result = MiningResult(
+                nonce=self.nonce,
+                hash=self.hash,
+                difficulty=difficulty,
+                elapsed=elapsed,
+                workers=[WorkerStats(0, self.nonce - start_nonce + 1, elapsed, self.nonce)]
+            )
         
         mining_time = time.time() - start_time
-        print(f"Block {self.index} mined in {mining_time:.2f} seconds")
-        print(f"   Nonce: {self.nonce}")
-        print(f"   Hash: {self.hash[:16]}...")
+        MINING_DURATION.observe(mining_time)
+        MINING_HASHRATE.set(result.hashrate)
+        logger.info("block mined index=%d nonce=%d hash=%s seconds=%.3f hashes=%d hashrate=%.0f",
+                    self.index, self.nonce, self.hash[:16], mining_time, result.hashes, result.hashrate)
+        if logger.isEnabledFor(logging.DEBUG):
+            for worker in result.workers:
+                logger.debug("mining worker=%d hashes=%d hashrate=%.0f",
+                             worker.worker_id, worker.hashes, worker.hashrate)
+        return result
     
-    def to_dict(self) -> Dict:
-        """Convert block to dictionary"""
-        return {
+    def to_dict(self, include_transactions: bool = True) -> Dict:
+        """Convert block to dictionary, optionally without the transaction list"""
+        data = {
             'index': self.index,
             'hash': self.hash,
             'previous_hash': self.previous_hash,
+            'merkle_root': self.merkle_root,
             'timestamp': datetime.fromtimestamp(self.timestamp).strftime('%Y-%m-%d %H:%M:%S'),
             'nonce': self.nonce,
             'transaction_count': len(self.transactions),
-            'transactions': [tx.to_dict() for tx in self.transactions]
         }
+        if include_transactions:
+            data['transactions'] = [tx.to_dict() for tx in self.transactions]
+        return data
+    
+    def to_record(self) -> Dict:
+        """Compact, lossless form used by the block store"""
+        record = {
+            'index': self.index,
+            'timestamp': self.timestamp,
+            'previous_hash': self.previous_hash,
+            'merkle_root': self.merkle_root,
+            'nonce': self.nonce,
+            'hash': self.hash,
+        }
+        if self.address_filter is not None:
+            record['address_filter'] = self.address_filter.hex()
+        record['transactions'] = [tx.to_record() for tx in self.transactions]
+        return record
+    
+    @classmethod
+    def from_record(cls, record: Dict) -> 'Block':
+        """Rebuild a mined block from to_record() output without rehashing"""
+        block = cls.__new__(cls)
+        block.index = record['index']
+        block.timestamp = record['timestamp']
+        block.previous_hash = record['previous_hash']
+        block.merkle_root = record['merkle_root']
+        block.nonce = record['nonce']
+        block.hash = record['hash']
+        address_filter = record.get('address_filter')
+        block.address_filter = bytes.fromhex(address_filter) if address_filter is not None else None
+        block.transactions = MinedTransactions.pack(record['transactions'])
+        if block.transactions is None:
+            block.transactions = [Transaction.from_record(tx) for tx in record['transactions']]
+        return block
     
     def __str__(self):
         return f"Block #{self.index} [{self.hash[:16]}...] - {len(self.transactions)} transactions"
 
+@dataclass(frozen=True)
+class ChainSnapshot:
+    """Immutable view of the chain's summary state
+
+    A new snapshot is published after every block append and mempool
+    change, so readers can use it without taking any lock. Every field is
+    a running total or comes from the tip, so publishing costs the same
+    at any chain height.
+    """
+    height: int
+    tip_hash: str
+    latest_block: Dict
+    total_transactions: int
+    pending_transactions: int
+    last_modified: float
+    total_volume: float = 0.0
+    total_rewards: float = 0.0
+    average_block_time: Optional[float] = None
+    
+    @property
+    def length(self) -> int:
+        return self.height + 1
+
+def add_locations(block: Block, transaction_index: Dict[str, Tuple[int, int]],
+                  address_history: Dict[str, List[Tuple[int, int]]]) -> None:
+    """Record where each of a block's transactions is, by ID and by address"""
+    for position, transaction in enumerate(block.transactions):
+        transaction_index[transaction.transaction_id] = (block.index, position)
+        address_history.setdefault(transaction.sender, []).append((block.index, position))
+        if transaction.receiver != transaction.sender:
+            address_history.setdefault(transaction.receiver, []).append((block.index, position))
+
 class Blockchain:
-    """Main blockchain class managing the chain"""
+    """Main blockchain class managing the chain
+
+    Concurrency model: appends to the chain and its indexes happen under
+    a single writer lock, and only one thread mines at a time. Proof of
+    Work runs on a copy of the mempool without holding the writer lock.
+    When the block is appended, exactly the transactions it contains leave
+    the mempool, so anything submitted during mining stays pending for the
+    next block. Readers use the published `snapshot` or the append-only
+    indexes and never wait on the miner.
+
+    With a data_dir, every worker process that opens the same directory
+    serves the same chain: a file lock (SharedState.writer) makes one
+    process at a time the miner, and sync() applies the blocks and pending
+    transactions other workers added since the last call. The balance
+    index is checkpointed every `checkpoint_interval` blocks, so startup
+    only replays the blocks above the latest checkpoint.
+
+    Signed transactions are verified when they enter the mempool and when
+    their block is validated. With require_signatures, every transaction
+    except mining rewards must be signed; otherwise only senders whose
+    address is derived from a public key must sign.
+    """
     
-    def __init__(self, difficulty: int = 2):
+    def __init__(self, difficulty: int = 2, miner: Optional[ParallelMiner] = None,
+                 data_dir: Optional[str] = None, mempool_size: int = 10_000,
+                 checkpoint_interval: int = 1_000, require_signatures: bool = False):
         self.chain: List[Block] = []
-        self.pending_transactions: List[Transaction] = []
+        self.pending_transactions = Mempool(mempool_size)
+        self.transaction_index: Dict[str, Tuple[int, int]] = {}
+        self.balances: Dict[str, float] = {}
+        self.address_history: Dict[str, List[Tuple[int, int]]] = {}
+        # Blocks covered by transaction_index and address_history
+        self.locations_height = 0
+        # Bumped whenever the indexes are reset, so a stale background build is discarded
+        self._locations_generation = 0
+        self._locations_builder: Optional[threading.Thread] = None
+        self.total_transactions = 0
+        self.total_volume = 0.0
+        self.total_rewards = 0.0
+        self.genesis_timestamp: Optional[float] = None
+        # Addresses touched by blocks this process appended, for ledger.models.sync_wallet_balances
+        self.dirty_addresses: Set[str] = set()
+        self.serialization_cache = BlockSerializationCache()
+        self.last_modified = time.time()
+        self.snapshot: Optional[ChainSnapshot] = None
+        self._snapshot_listeners: List[Callable[[ChainSnapshot], None]] = []
+        self._write_lock = threading.RLock()
+        self._mining_lock = threading.Lock()
         self.difficulty = difficulty
-        self.create_genesis_block()
+        self.require_signatures = require_signatures
+        self.miner = miner
+        self.last_mining_result: Optional[MiningResult] = None
+        self.validated_height = 0
+        self.last_full_audit: Optional[float] = None
+        self.last_audit: Optional[AuditResult] = None
+        self.audit_failed = False
+        self._audit_thread: Optional[threading.Thread] = None
+        self.shared: Optional[SharedState] = None
+        self.checkpoints: Optional[CheckpointStore] = None
+        self.checkpoint_interval = checkpoint_interval
+        self.analytics = None
+        
+        if data_dir:
+            self.open_store(data_dir)
+        else:
+            self.create_genesis_block()
+    
+    def open_store(self, data_dir: str) -> None:
+        """Keep the chain in an append-only BlockStore under data_dir
+
+        An existing store is loaded from the latest balance checkpoint that
+        matches it, replaying only the blocks above; blocks already on disk
+        are trusted up to the next full audit. The transaction and address
+        history indexes are then rebuilt in the background (see
+        ensure_location_indexes).
+        An empty store gets a fresh genesis block. Opening happens under the
+        shared writer lock, so of several workers starting at once exactly
+        one creates the genesis block and the rest load it.
+        """
+        self.shared = SharedState(data_dir)
+        self.checkpoints = CheckpointStore(data_dir)
+        
+        with self.shared.writer():
+            self.chain = BlockStore(data_dir, Block.from_record)
+            
+            if len(self.chain):
+                self.load_indexes()
+                self.validated_height = len(self.chain) - 1
+                logger.info("chain loaded blocks=%d data_dir=%s", len(self.chain), data_dir)
+            else:
+                self.create_genesis_block()
+        self.sync()
+    
+    def load_indexes(self) -> None:
+        """Restore the balance index from the latest checkpoint and replay the rest
+
+        Falls back to replaying the whole chain when no checkpoint matches
+        it, then writes one at the tip so the next start is fast.
+        """
+        with self._write_lock:
+            checkpoint = self.checkpoints.latest(self.chain)
+            if checkpoint is None:
+                self.rebuild_indexes()
+                if len(self.chain) > self.checkpoint_interval:
+                    self.write_checkpoint()
+                return
+            
+            self.balances = dict(checkpoint.balances)
+            self.total_transactions = checkpoint.total_transactions
+            self.total_volume = checkpoint.total_volume
+            self.total_rewards = checkpoint.total_rewards
+            self.transaction_index = {}
+            self.address_history = {}
+            self.locations_height = 0
+            self._locations_generation += 1
+            self.analytics = None
+            for height in range(checkpoint.height + 1, len(self.chain)):
+                self.index_block(self.chain[height])
+            self._publish_snapshot()
+            logger.info("checkpoint loaded height=%d replayed=%d",
+                        checkpoint.height, len(self.chain) - 1 - checkpoint.height)
+        self.ensure_location_indexes()
+    
+    def write_checkpoint(self) -> None:
+        """Checkpoint the balance index at the current tip"""
+        with self._write_lock:
+            tip = self.chain[-1]
+            checkpoint = BalanceCheckpoint(tip.index, tip.hash, self.total_transactions,
+                                           self.total_volume, self.total_rewards, dict(self.balances))
+        self.checkpoints.write(checkpoint)
+        logger.info("checkpoint written height=%d addresses=%d", checkpoint.height, len(checkpoint.balances))
+    
+    def sync(self) -> bool:
+        """Apply blocks and pending transactions added by other worker processes
+
+        Costs one fstat of the block index and one SQLite PRAGMA when
+        nothing changed, and only reads what is new otherwise. Returns
+        True if anything was applied.
+        """
+        if self.shared is None:
+            return False
+        
+        with self._write_lock:
+            known = len(self.chain)
+            added = self.chain.refresh()
+            for height in range(known, known + added):
+                self._apply_block(self.chain[height])
+            
+            admitted = 0
+            for record in self.shared.new_transactions():
+                tx_id = record[0]
+                if tx_id in self.pending_transactions or self._is_mined(tx_id, record[1]):
+                    continue
+                try:
+                    self.pending_transactions.add(Transaction.from_record(record))
+                    admitted += 1
+                except ValueError:
+                    pass
+            
+            if added or admitted:
+                self._publish_snapshot()
+        return bool(added or admitted)
+    
+    def _exclusive(self):
+        """Context manager held while mining: the cross-process writer lock if shared"""
+        return self.shared.writer() if self.shared is not None else nullcontext()
     
     def create_genesis_block(self) -> None:
         """Create the first block in the chain"""
@@ -110,94 +568,509 @@ class Blockchain:
             timestamp=time.time()
         )
         
-        self.chain.append(genesis_block)
-        print("Genesis block created")
+        self.append_block(genesis_block)
+        logger.info("genesis block created hash=%s", genesis_block.hash[:16])
+    
+    def append_block(self, block: Block) -> None:
+        """Append a block to the chain, index it and drop its transactions from the mempool"""
+        block.compact()
+        with self._write_lock:
+            self.chain.append(block)
+            self._apply_block(block)
+            self.dirty_addresses.update(block.addresses())
+            if self.shared is not None:
+                self.shared.remove_transactions(block.transaction_ids())
+            self._publish_snapshot()
+        if self.checkpoints is not None and block.index and block.index % self.checkpoint_interval == 0:
+            self.write_checkpoint()
+    
+    def take_dirty_addresses(self) -> Set[str]:
+        """Return and clear the addresses touched by blocks appended since the last call
+
+        Only blocks appended by this process are tracked, so with several
+        workers each block's wallets are written back once, by its miner.
+        """
+        with self._write_lock:
+            addresses, self.dirty_addresses = self.dirty_addresses, set()
+        return addresses
+    
+    def mark_addresses_dirty(self, addresses: Iterable[str]) -> None:
+        with self._write_lock:
+            self.dirty_addresses.update(addresses)
+    
+    def _apply_block(self, block: Block) -> None:
+        self.index_block(block)
+        if self.analytics is not None:
+            self.analytics.append_block(block)
+        self.pending_transactions.remove_many(block.transaction_ids())
+    
+    def _publish_snapshot(self) -> None:
+        with self._write_lock:
+            tip = self.chain[-1]
+            height = len(self.chain) - 1
+            if self.genesis_timestamp is None:
+                self.genesis_timestamp = self.chain[0].timestamp
+            self.last_modified = time.time()
+            self.snapshot = ChainSnapshot(
+                height=height,
+                tip_hash=tip.hash,
+                latest_block=self.serialization_cache.get(tip, include_transactions=False)[0],
+                total_transactions=self.total_transactions,
+                pending_transactions=len(self.pending_transactions),
+                last_modified=self.last_modified,
+                total_volume=self.total_volume,
+                total_rewards=self.total_rewards,
+                average_block_time=(tip.timestamp - self.genesis_timestamp) / height if height else None
+            )
+            for listener in self._snapshot_listeners:
+                try:
+                    listener(self.snapshot)
+                except Exception:
+                    logger.exception("snapshot listener failed")
+    
+    def add_snapshot_listener(self, listener: Callable[[ChainSnapshot], None]) -> None:
+        """Call listener(snapshot) now and whenever a new snapshot is published
+
+        Listeners run on the publishing thread with the writer lock held,
+        so they must be quick.
+        """
+        with self._write_lock:
+            self._snapshot_listeners.append(listener)
+            listener(self.snapshot)
+    
+    def index_block(self, block: Block) -> None:
+        """Apply a block's transactions to the in-memory indexes
+
+        The location indexes are only extended when they already cover
+        every block below this one; otherwise ensure_location_indexes()
+        catches them up when they are first needed.
+        """
+        if self.locations_height == block.index:
+            self._index_locations(block)
+        self.total_transactions += len(block.transactions)
+        for transaction in block.transactions:
+            self.balances[transaction.receiver] = (
+                self.balances.get(transaction.receiver, 0.0) + transaction.amount
+            )
+            if transaction.sender != "0":
+                self.balances[transaction.sender] = (
+                    self.balances.get(transaction.sender, 0.0) - transaction.amount
+                )
+                self.total_volume += transaction.amount
+            else:
+                self.total_rewards += transaction.amount
+    
+    def _index_locations(self, block: Block) -> None:
+        add_locations(block, self.transaction_index, self.address_history)
+        self.locations_height = block.index + 1
+    
+    def ensure_location_indexes(self, wait: bool = False) -> bool:
+        """Whether transaction_index and address_history cover the whole chain
+
+        After a start from a checkpoint they are rebuilt on a background
+        thread that takes the writer lock only to index the last few blocks
+        and swap the result in. Until then this returns False and callers
+        fall back to scanning the chain; wait=True blocks until the build
+        is done instead (never pass it while holding the writer lock).
+        """
+        while self.locations_height < len(self.chain):
+            with self._write_lock:
+                builder = self._locations_builder
+                if builder is None or not builder.is_alive():
+                    builder = self._locations_builder = threading.Thread(
+                        target=self._build_locations, name="location-indexes", daemon=True)
+                    builder.start()
+            if not wait:
+                return False
+            # A build discarded because the indexes were reset is started again
+            builder.join()
+        return True
+    
+    def _build_locations(self) -> None:
+        started = time.perf_counter()
+        generation = self._locations_generation
+        transaction_index: Dict[str, Tuple[int, int]] = {}
+        address_history: Dict[str, List[Tuple[int, int]]] = {}
+        indexed = 0
+        # Without the lock, until only the blocks appended during the last pass remain
+        while len(self.chain) - indexed > LOCATION_CATCH_UP_BLOCKS:
+            end = len(self.chain)
+            for height in range(indexed, end):
+                add_locations(self.chain[height], transaction_index, address_history)
+            indexed = end
+        
+        with self._write_lock:
+            if generation != self._locations_generation or self.locations_height >= len(self.chain):
+                return
+            for height in range(indexed, len(self.chain)):
+                add_locations(self.chain[height], transaction_index, address_history)
+            self.transaction_index = transaction_index
+            self.address_history = address_history
+            self.locations_height = len(self.chain)
+        logger.info("location indexes built blocks=%d seconds=%.3f",
+                    self.locations_height, time.perf_counter() - started)
+    
+    def _is_mined(self, transaction_id: str, sender: str) -> bool:
+        """Whether a transaction is in a mined block; call with the writer lock held
+
+        While the location indexes are being rebuilt, the blocks whose
+        address filters match the sender are searched instead.
+        """
+        if self.ensure_location_indexes():
+            return transaction_id in self.transaction_index
+        return any(transaction_id in block.transaction_ids() for block in self.blocks_involving(sender))
+    
+    def rebuild_indexes(self) -> None:
+        """Rebuild every in-memory index by replaying the chain"""
+        with self._write_lock:
+            self.transaction_index = {}
+            self.balances = {}
+            self.address_history = {}
+            self.locations_height = 0
+            self._locations_generation += 1
+            self.total_transactions = 0
+            self.total_volume = 0.0
+            self.total_rewards = 0.0
+            self.genesis_timestamp = None
+            self.analytics = None
+            for block in self.chain:
+                self.index_block(block)
+            self._publish_snapshot()
+    
+    def get_analytics(self):
+        """Columnar NumPy view of every mined transaction, built on first use
+
+        Once built it is extended on every append, so aggregate queries
+        (see ledger.analytics) always cover the whole chain.
+        """
+        if self.analytics is None:
+            from .analytics import TransactionColumnStore
+            
+            with self._write_lock:
+                if self.analytics is None:
+                    store = TransactionColumnStore()
+                    for block in self.chain:
+                        store.append_block(block)
+                    self.analytics = store
+        return self.analytics
     
     def get_latest_block(self) -> Block:
         """Get the most recent block"""
         return self.chain[-1]
     
-    def add_transaction(self, sender: str, receiver: str, amount: float) -> str:
-        """Add a new transaction to pending pool"""
-        if amount <= 0:
-            raise ValueError("Amount must be positive")
-        
-        transaction = Transaction(sender, receiver, amount)
-        self.pending_transactions.append(transaction)
+    def add_transaction(self, sender: str, receiver: str, amount: float, timestamp: Optional[float] = None,
+                        public_key: Optional[str] = None, signature: Optional[str] = None) -> str:
+        """Add a new transaction to pending pool
+
+        A signed transaction must be submitted with the timestamp that was
+        signed; unsigned ones are stamped with the current time.
+        """
+        transaction = self._new_transaction(sender, receiver, amount, timestamp, public_key, signature)
+        if transaction.signature is not None and not VERIFIER.verify(
+                transaction.public_key, transaction.signature, transaction.signing_message()):
+            raise ValueError("Invalid signature")
+        self._admit_transaction(transaction)
+        if self.shared is not None:
+            self.shared.publish_transactions([transaction])
+        self._publish_snapshot()
         
-        print(f"Transaction added: {transaction}")
+        TRANSACTIONS_ADDED.inc()
+        logger.debug("transaction added id=%s", transaction.transaction_id)
         return transaction.transaction_id
     
-    def mine_pending_transactions(self, miner_address: str = "System") -> Optional[Block]:
-        """Mine all pending transactions into a new block"""
-        if not self.pending_transactions:
-            print("No pending transactions to mine")
-            return None
-        
-        print(f"\nMining {len(self.pending_transactions)} pending transactions...")
-        
-        reward_transaction = Transaction(
-            sender="0",
-            receiver=miner_address,
-            amount=6.25
-        )
+    def add_transactions(self, items: Iterable[Dict]) -> List[Dict]:
+        """Validate and add many transactions in one pass
+
+        Each item is a dict with sender, receiver and amount, and for a
+        signed transaction timestamp, public_key and signature. Signatures
+        are verified together as one batch. Returns one result per item,
+        in order: {'success': True, 'transaction_id': ...} or
+        {'success': False, 'error': ...}. Invalid items do not stop the
+        rest of the batch.
+        """
+        results: List[Optional[Dict]] = []
+        candidates: List[Tuple[int, Transaction]] = []
         
-        transactions_to_mine = [reward_transaction] + self.pending_transactions
+        for item in items:
+            try:
+                timestamp = item.get('timestamp')
+                transaction = self._new_transaction(
+                    item['sender'], item['receiver'], float(item['amount']),
+                    float(timestamp) if timestamp is not None else None,
+                    item.get('public_key'), item.get('signature'))
+                candidates.append((len(results), transaction))
+                results.append(None)
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                error = f"Missing field {e}" if isinstance(e, KeyError) else str(e)
+                results.append({'success': False, 'error': error})
         
-        latest_block = self.get_latest_block()
-        new_block = Block(
-            index=len(self.chain),
-            transactions=transactions_to_mine,
-            previous_hash=latest_block.hash,
-            timestamp=time.time()
-        )
+        signed = [(i, tx) for i, tx in candidates if tx.signature is not None]
+        verified = VERIFIER.verify_many([(tx.public_key, tx.signature, tx.signing_message())
+                                         for _, tx in signed])
+        invalid = {i for (i, _), ok in zip(signed, verified) if not ok}
         
-        new_block.mine_block(self.difficulty)
-        self.chain.append(new_block)
-        self.pending_transactions = []
+        admitted = []
+        for i, transaction in candidates:
+            try:
+                if i in invalid:
+                    raise ValueError("Invalid signature")
+                self._admit_transaction(transaction)
+                admitted.append(transaction)
+                results[i] = {'success': True, 'transaction_id': transaction.transaction_id}
+            except ValueError as e:
+                results[i] = {'success': False, 'error': str(e)}
         
-        print(f"Block {new_block.index} added to blockchain!")
-        return new_block
+        if self.shared is not None:
+            self.shared.publish_transactions(admitted)
+        self._publish_snapshot()
+        TRANSACTIONS_ADDED.inc(len(admitted))
+        logger.debug("transactions added count=%d rejected=%d", len(admitted), len(results) - len(admitted))
+        return results
     
-    def is_chain_valid(self) -> bool:
-        """Validate the entire blockchain"""
-        print("\nValidating blockchain...")
+    def _new_transaction(self, sender: str, receiver: str, amount: float, timestamp: Optional[float] = None,
+                         public_key: Optional[str] = None, signature: Optional[str] = None) -> Transaction:
+        """Check a submitted transaction's fields; the signature itself is verified by the caller"""
+        if not sender or not receiver:
+            raise ValueError("Sender and receiver are required")
+        if not math.isfinite(amount) or amount <= 0:
+            raise ValueError("Amount must be a positive finite number")
+        if timestamp is not None and not math.isfinite(timestamp):
+            raise ValueError("Timestamp must be a finite number")
         
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i-1]
+        reason = authorization_error(sender, public_key, signature, self.require_signatures)
+        if reason is not None:
+            raise ValueError(reason.capitalize())
+        if signature is not None and timestamp is None:
+            raise ValueError("Signed transactions need the timestamp that was signed")
+        return Transaction(sender, receiver, amount, timestamp if signature is not None else None,
+                           public_key, signature)
+    
+    def _admit_transaction(self, transaction: Transaction) -> None:
+        """Put a validated transaction in the mempool
+
+        The check against mined transactions and the insert happen under
+        the writer lock, so a block appended in between cannot let an
+        already mined transaction back in.
+        """
+        with self._write_lock:
+            if self._is_mined(transaction.transaction_id, transaction.sender):
+                raise ValueError(f"Duplicate transaction {transaction.transaction_id}")
+            evicted = self.pending_transactions.add(transaction)
+        if evicted and self.shared is not None:
+            self.shared.remove_transactions(tx.transaction_id for tx in evicted)
+    
+    def mine_pending_transactions(self, miner_address: str = "System",
+                                  miner: Optional[ParallelMiner] = None,
+                                  progress: Optional[ProgressCallback] = None) -> Optional[Block]:
+        """Mine all pending transactions into a new block
+
+        Pass a ParallelMiner (or set Blockchain.miner) to spread the Proof
+        of Work search across processes; the default is the single-threaded
+        nonce loop in Block.mine_block. When the chain is shared, this
+        process holds the writer lock until the block is appended and mines
+        on top of whatever other workers appended before it.
+        """
+        with self._mining_lock, self._exclusive():
+            self.sync()
+            pending = list(self.pending_transactions)
+            if not pending:
+                logger.debug("no pending transactions to mine")
+                return None
             
-            if current_block.hash != current_block.calculate_hash():
-                print(f"Block {current_block.index}: Invalid hash")
-                return False
+            logger.debug("mining pending transactions count=%d", len(pending))
             
-            if current_block.previous_hash != previous_block.hash:
-                print(f"Block {current_block.index}: Invalid previous hash")
-                return False
+            reward_transaction = Transaction(
+                sender="0",
+                receiver=miner_address,
+                amount=6.25
+            )
             
-            if current_block.hash[:self.difficulty] != "0" * self.difficulty:
-                print(f"Block {current_block.index}: Invalid proof of work")
-                return False
+            transactions_to_mine = [reward_transaction] + pending
+            
+            latest_block = self.get_latest_block()
+            new_block = Block(
+                index=len(self.chain),
+                transactions=transactions_to_mine,
+                previous_hash=latest_block.hash,
+                timestamp=time.time()
+            )
+            
+            self.last_mining_result = new_block.mine_block(self.difficulty, miner or self.miner, progress)
+            self.append_block(new_block)
         
-        print("Blockchain is valid!")
+        BLOCKS_MINED.inc()
+        logger.info("block appended index=%d transactions=%d", new_block.index, len(new_block.transactions))
+        return new_block
+    
+    def is_chain_valid(self, full: bool = False) -> bool:
+        """Validate the blockchain
+
+        By default only blocks above validated_height are checked, since
+        mined blocks never change. full=True re-checks every block from
+        genesis; run_full_audit() does that periodically so tampering with
+        an already validated block is still caught.
+        """
+        if full:
+            return self.run_full_audit()
+        
+        if self.audit_failed:
+            return False
+        
+        height = len(self.chain) - 1
+        if self.validated_height > height:
+            self.validated_height = 0
+        if self.validated_height == height:
+            return True
+        
+        started = time.perf_counter()
+        valid = self._validate_range(self.validated_height + 1, height + 1)
+        VALIDATION_DURATION.labels('incremental').observe(time.perf_counter() - started)
+        if valid:
+            self.validated_height = height
+        return valid
+    
+    def run_full_audit(self, workers: Optional[int] = None) -> bool:
+        """Re-validate the whole chain from genesis and record the result"""
+        return self.audit(workers).valid
+    
+    def audit(self, workers: Optional[int] = None) -> AuditResult:
+        """Re-validate the whole chain from genesis, reporting the first invalid block
+
+        With workers > 1 the chain is split into ranges that are checked
+        on a process pool (see ledger.audit.audit_chain); otherwise blocks
+        are checked in order on this thread.
+        """
+        if workers is not None and workers > 1:
+            result = audit_chain(self.chain, self.difficulty, workers,
+                                 require_signatures=self.require_signatures)
+        else:
+            height = len(self.chain)
+            started = time.perf_counter()
+            found = self._first_invalid(1, height)
+            result = AuditResult(
+                valid=found is None,
+                blocks_checked=height if found is None else found[0] + 1,
+                elapsed=time.perf_counter() - started,
+                workers=1,
+                first_invalid_height=found[0] if found else None,
+                reason=found[1] if found else None,
+            )
+        VALIDATION_DURATION.labels('full').observe(result.elapsed)
+        
+        self._record_audit(result, time.time())
+        if self.shared is not None:
+            self.shared.publish_audit({'finished_at': self.last_full_audit, 'result': result.to_dict()})
+        
+        if result.valid:
+            logger.info("full audit passed blocks=%d workers=%d seconds=%.3f",
+                        result.blocks_checked, result.workers, result.elapsed)
+        else:
+            logger.error("full audit failed height=%d reason=%s workers=%d seconds=%.3f",
+                         result.first_invalid_height, result.reason, result.workers, result.elapsed)
+        return result
+    
+    def _record_audit(self, result: AuditResult, finished_at: float) -> None:
+        self.audit_failed = not result.valid
+        self.validated_height = result.blocks_checked - 1 if result.valid else 0
+        self.last_full_audit = finished_at
+        self.last_audit = result
+    
+    def follow_audit(self) -> bool:
+        """Take over a newer full audit result published by another worker"""
+        state = self.shared.audit() if self.shared is not None else None
+        if state is None or state['finished_at'] <= (self.last_full_audit or 0):
+            return False
+        self._record_audit(AuditResult(**state['result']), state['finished_at'])
         return True
     
-    def get_chain_data(self) -> List[Dict]:
-        """Get entire chain as list of dictionaries"""
-        return [block.to_dict() for block in self.chain]
+    def start_audit_thread(self, interval: float, workers: Optional[int] = None) -> None:
+        """Run run_full_audit every `interval` seconds on a daemon thread
+
+        When the chain is shared, only the worker holding the audit lock
+        (SharedState.claim_audits) audits; the others pick up its results,
+        and one of them takes over if it exits.
+        """
+        if self._audit_thread is not None and self._audit_thread.is_alive():
+            return
+        
+        def audit_loop():
+            while True:
+                time.sleep(interval)
+                if self.shared is None or self.shared.claim_audits():
+                    self.run_full_audit(workers)
+                else:
+                    self.follow_audit()
+        
+        self._audit_thread = threading.Thread(target=audit_loop, name="chain-audit", daemon=True)
+        self._audit_thread.start()
+    
+    def _validate_range(self, start: int, end: int) -> bool:
+        """Check hash, linkage and proof of work for blocks start..end-1"""
+        return self._first_invalid(start, end) is None
+    
+    def _first_invalid(self, start: int, end: int) -> Optional[Tuple[int, str]]:
+        """(height, reason) of the first invalid block in start..end-1, or None"""
+        if isinstance(self.chain, BlockStore):
+            # Check what is on disk, without decoding Block objects
+            read = self.chain.read_record
+        else:
+            read = lambda height: self.chain[height].to_record()
+        
+        start = max(start, 1)
+        previous_hash = self.chain[start - 1].hash if start < end else None
+        for batch_start in range(start, end, VALIDATION_BATCH_BLOCKS):
+            records = [read(i) for i in range(batch_start, min(end, batch_start + VALIDATION_BATCH_BLOCKS))]
+            found = check_records(records, batch_start, previous_hash, self.difficulty,
+                                  self.require_signatures)
+            if found is not None:
+                logger.warning("block invalid index=%d reason=%s", *found)
+                return found
+            previous_hash = records[-1]['hash']
+        return None
+    
+    def get_chain_data(self, from_height: int = 0, limit: Optional[int] = None,
+                       headers_only: bool = False) -> List[Dict]:
+        """Get the chain (or a range of it) as list of dictionaries"""
+        return list(self.iter_chain_data(from_height, limit, headers_only))
+    
+    def iter_chain_data(self, from_height: int = 0, limit: Optional[int] = None,
+                        headers_only: bool = False):
+        """Yield block dictionaries one at a time, starting at from_height"""
+        for block in self._iter_blocks(from_height, limit):
+            yield self.serialization_cache.get(block, not headers_only)[0]
+    
+    def iter_chain_json(self, from_height: int = 0, limit: Optional[int] = None,
+                        headers_only: bool = False):
+        """Yield each block's cached JSON encoding, starting at from_height"""
+        for block in self._iter_blocks(from_height, limit):
+            yield self.serialization_cache.get(block, not headers_only)[1]
+    
+    def get_block_data(self, height: int) -> Dict:
+        """Get one block as a (cached, read-only) dictionary"""
+        return self.serialization_cache.get(self.chain[height])[0]
+    
+    def _iter_blocks(self, from_height: int, limit: Optional[int]):
+        stop = len(self.chain) if limit is None else min(len(self.chain), from_height + limit)
+        for height in range(from_height, stop):
+            yield self.chain[height]
     
     def get_total_transactions(self) -> int:
         """Get total number of transactions in blockchain"""
-        total = 0
-        for block in self.chain:
-            total += len(block.transactions)
-        return total
+        return self.total_transactions
     
     def get_wallet_balance(self, address: str) -> float:
-        """Calculate balance for a wallet address"""
+        """Get balance for a wallet address from the balance index"""
+        return self.balances.get(address, 0.0)
+    
+    def get_wallet_balances(self, addresses: List[str]) -> Dict[str, float]:
+        """Get balances for many wallet addresses at once"""
+        return {address: self.balances.get(address, 0.0) for address in addresses}
+    
+    def scan_wallet_balance(self, address: str) -> float:
+        """Calculate balance for a wallet address by scanning the whole chain"""
         balance = 0.0
         
-        for block in self.chain:
+        for block in self.blocks_involving(address):
             for transaction in block.transactions:
                 if transaction.receiver == address:
                     balance += transaction.amount
@@ -206,19 +1079,159 @@ class Blockchain:
         
         return balance
     
+    def verify_balance_index(self) -> List[str]:
+        """Compare the balance index with a full chain scan
+
+        Returns the addresses whose indexed balance disagrees with the scan;
+        an empty list means the index is consistent.
+        """
+        scanned: Dict[str, float] = {}
+        with self._write_lock:
+            for block in self.chain:
+                for transaction in block.transactions:
+                    scanned[transaction.receiver] = scanned.get(transaction.receiver, 0.0) + transaction.amount
+                    if transaction.sender != "0":
+                        scanned[transaction.sender] = scanned.get(transaction.sender, 0.0) - transaction.amount
+            balances = dict(self.balances)
+        
+        return sorted(
+            address for address in set(scanned) | set(balances)
+            if scanned.get(address, 0.0) != balances.get(address, 0.0)
+        )
+    
+    def blocks_involving(self, address: str) -> Iterator[Block]:
+        """Blocks whose address filter says they may involve `address`
+
+        Blocks stored without a filter are always yielded. With a
+        BlockStore the filters come from its side file, so only the blocks
+        that match are read and decoded.
+        """
+        probe = AddressProbe(address)
+        if isinstance(self.chain, BlockStore):
+            for height, address_filter in enumerate(self.chain.address_filters()):
+                if address_filter is None or probe.might_contain(address_filter):
+                    yield Block.from_record(self.chain.read_record(height))
+        else:
+            for block in self.chain:
+                if block.address_filter is None or probe.might_contain(block.address_filter):
+                    yield block
+    
+    def scan_transaction_history(self, address: str) -> List[Dict]:
+        """Get all transactions for an address by scanning the chain, without the history index"""
+        return [
+            {'block_index': block.index, **transaction.to_dict()}
+            for block in self.blocks_involving(address)
+            for transaction in block.transactions
+            if address in (transaction.sender, transaction.receiver)
+        ]
+    
     def get_transaction_history(self, address: str) -> List[Dict]:
-        """Get all transactions for a specific address"""
-        history = []
+        """Get all transactions for a specific address
+
+        Uses the address history index once it has been built; until then
+        (after starting from a checkpoint) the chain is scanned instead.
+        """
+        if not self.ensure_location_indexes():
+            return self.scan_transaction_history(address)
+        return [
+            self._history_entry(block_index, position)
+            for block_index, position in self.address_history.get(address, [])
+        ]
+    
+    def get_transaction_history_page(self, address: str, cursor: Optional[int] = None,
+                                     limit: int = 50) -> Dict:
+        """Get one page of an address's transactions, newest first
+
+        The cursor is a position in the address's append-only posting list,
+        so it stays valid while new blocks are mined. Pass the returned
+        next_cursor to fetch the next (older) page; it is None on the last one.
+        While the history index is being rebuilt the page is cut from a scan,
+        which lists the same entries in the same order.
+        """
+        if self.ensure_location_indexes():
+            postings = self.address_history.get(address, [])
+            entry = lambda posting: self._history_entry(*posting)
+        else:
+            postings = self.scan_transaction_history(address)
+            entry = lambda scanned: scanned
+        end = len(postings) if cursor is None else max(0, min(cursor, len(postings)))
+        start = max(0, end - limit)
         
-        for block in self.chain:
-            for transaction in block.transactions:
-                if transaction.sender == address or transaction.receiver == address:
-                    history.append({
-                        'block_index': block.index,
-                        **transaction.to_dict()
-                    })
+        return {
+            'address': address,
+            'total': len(postings),
+            'transactions': [entry(posting) for posting in reversed(postings[start:end])],
+            'next_cursor': start if start > 0 else None,
+        }
+    
+    def _find_transaction(self, transaction_id: str) -> Optional[Tuple[int, int]]:
+        for height in range(len(self.chain) - 1, -1, -1):
+            transaction_ids = self.chain[height].transaction_ids()
+            if transaction_id in transaction_ids:
+                return height, transaction_ids.index(transaction_id)
+        return None
+    
+    def _history_entry(self, block_index: int, position: int) -> Dict:
+        return {
+            'block_index': block_index,
+            **self.chain[block_index].transactions[position].to_dict()
+        }
+    
+    def get_transaction_proof(self, transaction_id: str) -> Optional[Dict]:
+        """Get a Merkle inclusion proof for a mined transaction
+
+        While the transaction index is being rebuilt, blocks are searched
+        from the tip down.
+        """
+        if self.ensure_location_indexes():
+            location = self.transaction_index.get(transaction_id)
+        else:
+            location = self._find_transaction(transaction_id)
+        if location is None:
+            return None
         
-        return history
+        block_index, position = location
+        block = self.chain[block_index]
+        return {
+            'transaction_id': transaction_id,
+            'block_index': block.index,
+            'block_hash': block.hash,
+            'merkle_root': block.merkle_root,
+            'position': position,
+            'proof': merkle_proof(block.transaction_ids(), position)
+        }
+
+# Singleton blockchain instance, persisted when BLOCKCHAIN_DATA_DIR is set
+blockchain = Blockchain(
+    difficulty=2,
+    data_dir=config('BLOCKCHAIN_DATA_DIR', default=''),
+    mempool_size=config('BLOCKCHAIN_MEMPOOL_SIZE', default=10_000, cast=int),
+    checkpoint_interval=config('BLOCKCHAIN_CHECKPOINT_INTERVAL', default=1_000, cast=int),
+    require_signatures=config('BLOCKCHAIN_REQUIRE_SIGNATURES', default=False, cast=bool)
+)
+
+def publish_chain_event(snapshot: ChainSnapshot) -> None:
+    CHAIN_EVENTS.publish('chain', {
+        'height': snapshot.height,
+        'tip_hash': snapshot.tip_hash,
+        'total_transactions': snapshot.total_transactions,
+        'pending_transactions': snapshot.pending_transactions,
+    })
+
+# Streamed to /api/events/ subscribers whenever the snapshot changes
+blockchain.add_snapshot_listener(publish_chain_event)
+if blockchain.shared is not None:
+    # While anyone is subscribed, one thread per process applies other workers' changes
+    CHAIN_EVENTS.watch(blockchain.sync)
 
-# Singleton blockchain instance
-blockchain = Blockchain(difficulty=2)
\ No newline at end of file
+# Computed from the published snapshot only when /metrics is scraped
+REGISTRY.gauge('ledger_chain_height', 'Height of the chain tip',
+               function=lambda: blockchain.snapshot.height)
+REGISTRY.gauge('ledger_total_transactions', 'Transactions in mined blocks',
+               function=lambda: blockchain.snapshot.total_transactions)
+REGISTRY.gauge('ledger_mempool_transactions', 'Pending transactions in the mempool',
+               function=lambda: len(blockchain.pending_transactions))
+REGISTRY.gauge('ledger_mempool_bytes', 'Serialized size of the pending transactions',
+               function=lambda: blockchain.pending_transactions.stats()['bytes'])
+REGISTRY.gauge('ledger_chain_valid', '1 if the last validation passed',
+               function=lambda: 0 if blockchain.audit_failed else 1)
\ No newline at end of file
@@ -0,0 +1,48 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+
+class BlockSerializationCache:
+    """LRU cache of mined blocks' dictionaries and encoded JSON
+
+    Mined blocks never change, so entries are keyed on the block hash and
+    whether transactions are included, and never need invalidating. At
+    most `maxsize` entries are kept; the least recently used is dropped.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, block, include_transactions: bool = True) -> Tuple[Dict, bytes]:
+        """Return (dict, json bytes) for a mined block, serializing on a miss"""
+        key = (block.hash, include_transactions)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        data = block.to_dict(include_transactions=include_transactions)
+        entry = (data, json.dumps(data).encode())
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
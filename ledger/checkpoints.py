@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = 'checkpoints'
+CHECKPOINT_TEMPLATE = 'balances-{:012d}.json.z'
+CHECKPOINT_PATTERN = re.compile(r'^balances-(\d{12})\.json\.z$')
+
+
+@dataclass
+class BalanceCheckpoint:
+    """Balance index state after the block at `height`"""
+    height: int
+    tip_hash: str
+    total_transactions: int
+    total_volume: float
+    total_rewards: float
+    balances: Dict[str, float]
+
+    def encode(self) -> bytes:
+        return zlib.compress(json.dumps({
+            'height': self.height,
+            'tip_hash': self.tip_hash,
+            'total_transactions': self.total_transactions,
+            'total_volume': self.total_volume,
+            'total_rewards': self.total_rewards,
+            'balances': self.balances,
+        }, separators=(',', ':')).encode())
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'BalanceCheckpoint':
+        record = json.loads(zlib.decompress(data))
+        return cls(record['height'], record['tip_hash'], record['total_transactions'],
+                   record['total_volume'], record['total_rewards'], record['balances'])
+
+
+class CheckpointStore:
+    """Balance checkpoints kept next to a BlockStore
+
+    Each checkpoint is a zlib-compressed JSON file named after its height,
+    written to a temporary file and renamed into place so readers never
+    see a partial one. Only the `keep` most recent are kept, so a damaged
+    latest checkpoint still leaves an older one to fall back on.
+    """
+
+    def __init__(self, data_dir: str, keep: int = 2):
+        self.directory = os.path.join(data_dir, CHECKPOINT_DIR)
+        self.keep = keep
+        os.makedirs(self.directory, exist_ok=True)
+
+    def heights(self) -> List[int]:
+        """Heights of the stored checkpoints, newest first"""
+        matches = (CHECKPOINT_PATTERN.match(name) for name in os.listdir(self.directory))
+        return sorted((int(match.group(1)) for match in matches if match), reverse=True)
+
+    def _path(self, height: int) -> str:
+        return os.path.join(self.directory, CHECKPOINT_TEMPLATE.format(height))
+
+    def write(self, checkpoint: BalanceCheckpoint) -> None:
+        path = self._path(checkpoint.height)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as checkpoint_file:
+            checkpoint_file.write(checkpoint.encode())
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temporary, path)
+
+        for height in self.heights()[self.keep:]:
+            try:
+                os.remove(self._path(height))
+            except FileNotFoundError:
+                pass
+
+    def latest(self, chain) -> Optional[BalanceCheckpoint]:
+        """Newest checkpoint that matches `chain`, or None
+
+        A checkpoint matches if its height is on the chain and its tip hash
+        equals the hash of the block at that height. Unreadable or
+        mismatched checkpoints are skipped.
+        """
+        for height in self.heights():
+            if height >= len(chain):
+                logger.warning("checkpoint above chain tip height=%d", height)
+                continue
+            try:
+                with open(self._path(height), 'rb') as checkpoint_file:
+                    checkpoint = BalanceCheckpoint.decode(checkpoint_file.read())
+            except (OSError, ValueError, KeyError, zlib.error):
+                logger.warning("checkpoint unreadable height=%d", height)
+                continue
+            if checkpoint.height != height or checkpoint.tip_hash != chain[height].hash:
+                logger.warning("checkpoint does not match chain height=%d", height)
+                continue
+            return checkpoint
+        return None
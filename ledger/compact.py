@@ -0,0 +1,168 @@
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Transaction IDs are 16 hex characters, stored as 8 raw bytes
+ID_BYTES = 8
+# An Ed25519 public key and signature; all zeros marks an unsigned transaction
+AUTH_BYTES = 32 + 64
+
+
+class AddressTable:
+    """Interns addresses as small integer IDs shared by every block"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._addresses: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, address: str) -> int:
+        address_id = self._ids.get(address)
+        if address_id is None:
+            with self._lock:
+                address_id = self._ids.get(address)
+                if address_id is None:
+                    address_id = len(self._addresses)
+                    self._addresses.append(address)
+                    self._ids[address] = address_id
+        return address_id
+
+    def __getitem__(self, address_id: int) -> str:
+        return self._addresses[address_id]
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+
+ADDRESSES = AddressTable()
+
+
+class TransactionColumns:
+    """A block's transactions stored column-wise in typed arrays
+
+    IDs are packed into one bytearray, senders and receivers are interned
+    address IDs in unsigned int arrays, and amounts and timestamps are
+    doubles. A mined transaction then costs 32 bytes plus its share of the
+    address table, instead of a Python object and five field objects.
+    Blocks with signed transactions also get an `auth` column holding each
+    transaction's public key and signature (96 bytes).
+
+    Indexing returns the transaction's record ([id, sender, receiver,
+    amount, timestamp], plus [public_key, signature] if signed);
+    subclasses override _view to return objects.
+    """
+    __slots__ = ('ids', 'senders', 'receivers', 'amounts', 'timestamps', 'auth')
+
+    def __init__(self):
+        self.ids = bytearray()
+        self.senders = array('I')
+        self.receivers = array('I')
+        self.amounts = array('d')
+        self.timestamps = array('d')
+        self.auth: Optional[bytearray] = None
+
+    @classmethod
+    def pack(cls, records: Iterable[Sequence]) -> Optional['TransactionColumns']:
+        """Pack to_record()-style records, or return None if one does not fit
+
+        Only records whose ID round-trips through hex and whose amount and
+        timestamp are floats fit; anything else (such as the genesis
+        block's integer amount) would change the transaction's ID.
+        """
+        columns = cls()
+        intern = ADDRESSES.intern
+        for tx_id, sender, receiver, amount, timestamp, *authorization in records:
+            if type(amount) is not float or type(timestamp) is not float:
+                return None
+            try:
+                raw_id = bytes.fromhex(tx_id)
+                raw_auth = bytes.fromhex(''.join(authorization))
+            except (TypeError, ValueError):
+                return None
+            if len(raw_id) != ID_BYTES or raw_id.hex() != tx_id:
+                return None
+            if authorization:
+                if len(raw_auth) != AUTH_BYTES or raw_auth.hex() != ''.join(authorization):
+                    return None
+                if columns.auth is None:
+                    columns.auth = bytearray(AUTH_BYTES * len(columns))
+                columns.auth += raw_auth
+            elif columns.auth is not None:
+                columns.auth += bytes(AUTH_BYTES)
+            columns.ids += raw_id
+            columns.senders.append(intern(sender))
+            columns.receivers.append(intern(receiver))
+            columns.amounts.append(amount)
+            columns.timestamps.append(timestamp)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._view(position) for position in range(*key.indices(len(self)))]
+        position = key + len(self) if key < 0 else key
+        if not 0 <= position < len(self):
+            raise IndexError("transaction position out of range")
+        return self._view(position)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self._view(position)
+
+    def _view(self, position: int):
+        return self.record(position)
+
+    def transaction_id(self, position: int) -> str:
+        return self.ids[position * ID_BYTES:(position + 1) * ID_BYTES].hex()
+
+    def set_transaction_id(self, position: int, transaction_id: str) -> None:
+        self.ids[position * ID_BYTES:(position + 1) * ID_BYTES] = bytes.fromhex(transaction_id)
+
+    def sender(self, position: int) -> str:
+        return ADDRESSES[self.senders[position]]
+
+    def receiver(self, position: int) -> str:
+        return ADDRESSES[self.receivers[position]]
+
+    def authorization(self, position: int) -> Optional[List[str]]:
+        """[public_key, signature] in hex, or None if the transaction is unsigned"""
+        if self.auth is None:
+            return None
+        raw = self.auth[position * AUTH_BYTES:(position + 1) * AUTH_BYTES]
+        if not any(raw):
+            return None
+        return [raw[:32].hex(), raw[32:].hex()]
+
+    def set_authorization(self, position: int, public_key: str, signature: str) -> None:
+        if self.auth is None:
+            self.auth = bytearray(AUTH_BYTES * len(self))
+        self.auth[position * AUTH_BYTES:(position + 1) * AUTH_BYTES] = bytes.fromhex(public_key + signature)
+
+    def record(self, position: int) -> List:
+        record = [
+            self.transaction_id(position),
+            ADDRESSES[self.senders[position]],
+            ADDRESSES[self.receivers[position]],
+            self.amounts[position],
+            self.timestamps[position],
+        ]
+        authorization = self.authorization(position)
+        if authorization is not None:
+            record += authorization
+        return record
+
+    def transaction_ids(self) -> List[str]:
+        ids = self.ids.hex()
+        width = 2 * ID_BYTES
+        return [ids[i:i + width] for i in range(0, len(ids), width)]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns' buffers"""
+        return sum(
+            len(column) * getattr(column, 'itemsize', 1)
+            for column in (self.ids, self.senders, self.receivers, self.amounts, self.timestamps,
+                           self.auth or b'')
+        )
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between keepalive comments on an idle stream
+KEEPALIVE_INTERVAL = 15.0
+# Seconds a stream stays open before asking the browser to reconnect. Django
+# 4.2 does not notice a client disconnecting mid-stream, so this bounds how
+# long an abandoned stream keeps its coroutine (and the watcher) alive
+STREAM_LIFETIME = 300.0
+# Milliseconds the browser waits before reconnecting to an ended stream
+RECONNECT_DELAY_MS = 1000
+# Seconds between checks for changes made by other processes while streams are open
+WATCH_INTERVAL = 0.5
+
+
+class EventBroker:
+    """Fan-out of server-sent events to streaming responses
+
+    publish() may be called from any thread. Each event is encoded once,
+    and every event loop with waiting streams is woken with a single
+    callback, however many clients are connected. Only the latest event
+    is kept: a slow client skips straight to the current state.
+
+    Changes made by other processes are picked up by watch(): one thread
+    per process polls for them while at least one stream is open, however
+    many clients are connected.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.message = b''
+        self._signals: Dict[asyncio.AbstractEventLoop, asyncio.Event] = {}
+        self._streams = 0
+        self._poll: Optional[Callable[[], object]] = None
+        self._poll_interval = WATCH_INTERVAL
+        self._watcher: Optional[threading.Thread] = None
+
+    def watch(self, poll: Callable[[], object], interval: float = WATCH_INTERVAL) -> None:
+        """Call poll() every `interval` seconds while any stream is open
+
+        poll() is expected to publish() when it finds a change.
+        """
+        with self._lock:
+            self._poll = poll
+            self._poll_interval = interval
+            if self._streams:
+                self._start_watcher()
+
+    def _start_watcher(self) -> None:
+        # Called with _lock held
+        if self._poll is not None and (self._watcher is None or not self._watcher.is_alive()):
+            self._watcher = threading.Thread(target=self._watch_loop, name="event-watch", daemon=True)
+            self._watcher.start()
+
+    def _watch_loop(self) -> None:
+        while True:
+            time.sleep(self._poll_interval)
+            with self._lock:
+                if not self._streams:
+                    self._watcher = None
+                    return
+                poll = self._poll
+            try:
+                poll()
+            except Exception:
+                logger.exception("event watch poll failed")
+
+    def publish(self, event: str, data: Dict) -> None:
+        with self._lock:
+            self.version += 1
+            self.message = (f'id: {self.version}\nevent: {event}\n'
+                            f'data: {json.dumps(data)}\n\n').encode()
+            signals, self._signals = self._signals, {}
+        for loop, signal in signals.items():
+            try:
+                loop.call_soon_threadsafe(signal.set)
+            except RuntimeError:
+                pass  # the loop has been closed
+
+    async def wait(self, version: int) -> Tuple[int, bytes]:
+        """Wait for an event newer than `version`; returns (version, encoded event)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self.version > version:
+                    return self.version, self.message
+                signal = self._signals.get(loop)
+                if signal is None:
+                    signal = self._signals[loop] = asyncio.Event()
+            await signal.wait()
+
+    async def stream(self, keepalive: float = KEEPALIVE_INTERVAL, lifetime: float = STREAM_LIFETIME):
+        """Yield the current event, then every new one, as text/event-stream bytes
+
+        After `keepalive` seconds without an event a comment line is sent
+        so proxies keep the connection open. After `lifetime` seconds the
+        stream sends a retry field and ends; EventSource reconnects on its
+        own and is sent the current state again.
+        """
+        with self._lock:
+            self._streams += 1
+            self._start_watcher()
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + lifetime
+            version = 0
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    yield f'retry: {RECONNECT_DELAY_MS}\n\n'.encode()
+                    return
+                try:
+                    version, message = await asyncio.wait_for(self.wait(version), min(keepalive, remaining))
+                except asyncio.TimeoutError:
+                    if deadline > loop.time():
+                        yield b': keepalive\n\n'
+                    continue
+                yield message
+        finally:
+            with self._lock:
+                self._streams -= 1
+
+CHAIN_EVENTS = EventBroker()
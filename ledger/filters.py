@@ -0,0 +1,61 @@
+import hashlib
+from typing import Dict, Iterable, Tuple
+
+# About 1% false positives with 10 bits and 7 hash functions per address
+BITS_PER_ADDRESS = 10
+HASH_COUNT = 7
+MIN_BITS = 64
+
+
+def address_hashes(address: str) -> Tuple[int, int]:
+    """Two independent 64-bit hashes; the filter's k positions are derived from them"""
+    digest = hashlib.blake2b(address.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+def _mask(hashes: Tuple[int, int], hash_count: int, bits: int) -> int:
+    first, second = hashes
+    mask = 0
+    for i in range(hash_count):
+        mask |= 1 << ((first + i * second) % bits)
+    return mask
+
+
+def build_filter(addresses: Iterable[str]) -> bytes:
+    """Bloom filter of a block's addresses
+
+    The first byte holds the number of hash functions; the rest is the bit
+    array, sized to a power of two of at least BITS_PER_ADDRESS bits per
+    distinct address.
+    """
+    addresses = set(addresses)
+    bits = MIN_BITS
+    while bits < BITS_PER_ADDRESS * len(addresses):
+        bits *= 2
+
+    value = 0
+    for address in addresses:
+        value |= _mask(address_hashes(address), HASH_COUNT, bits)
+    return bytes([HASH_COUNT]) + value.to_bytes(bits // 8, 'little')
+
+
+class AddressProbe:
+    """Tests one address against many block filters
+
+    The address is hashed once, and its bit mask is computed once per
+    filter size, so each test is a single integer AND.
+    """
+
+    def __init__(self, address: str):
+        self.hashes = address_hashes(address)
+        self._masks: Dict[Tuple[int, int], int] = {}
+
+    def might_contain(self, address_filter: bytes) -> bool:
+        """False if the block certainly does not involve the address"""
+        key = (address_filter[0], len(address_filter))
+        mask = self._masks.get(key)
+        if mask is None:
+            # Shifted past the hash count byte, which is read along with the bits
+            mask = _mask(self.hashes, address_filter[0], (len(address_filter) - 1) * 8) << 8
+            self._masks[key] = mask
+        return int.from_bytes(address_filter, 'little') & mask == mask
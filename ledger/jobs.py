@@ -0,0 +1,185 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept around for status queries
+MAX_FINISHED_JOBS = 100
+# Seconds between progress updates written to the shared job table
+JOB_PUBLISH_INTERVAL = 1.0
+
+
+class MiningJob:
+    """A queued or running request to mine the pending transactions"""
+
+    def __init__(self, user_id: int, miner_address: str):
+        self.job_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.miner_address = miner_address
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.hashes = 0
+        self.hashrate = 0.0
+        self.eta: Optional[float] = None
+        self.block_index: Optional[int] = None
+        self.record: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.finished = threading.Event()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MiningJob':
+        """Rebuild a job another worker published (see to_dict)"""
+        job = cls.__new__(cls)
+        job.job_id = data['job_id']
+        job.user_id = None
+        job.miner_address = data['miner_address']
+        job.status = data['status']
+        job.created_at = data['created_at']
+        job.started_at = data['started_at']
+        job.finished_at = data['finished_at']
+        job.hashes = data['nonces_tried']
+        job.hashrate = data['hashrate']
+        job.eta = data['eta_seconds']
+        job.block_index = data['block_index']
+        job.record = data['record']
+        job.error = data['error']
+        job.finished = threading.Event()
+        if not job.active:
+            job.finished.set()
+        return job
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'miner_address': self.miner_address,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'nonces_tried': self.hashes,
+            'hashrate': self.hashrate,
+            'eta_seconds': self.eta,
+            'block_index': self.block_index,
+            'record': self.record,
+            'error': self.error,
+        }
+
+
+class MiningJobManager:
+    """Runs mining jobs one at a time on a background worker thread
+
+    submit() returns immediately. While a job is queued or running, further
+    submissions return that same job, so only one search ever runs against
+    the current tip. on_mined(job, block) is called on the worker thread
+    after a block is appended (the views use it to create the
+    MiningRecord) and may return a dict that is stored as job.record.
+
+    Each job runs in the worker process that accepted it. When the chain
+    is shared between workers, job states are also published to the
+    SharedState job table, so get() finds jobs started by any worker.
+    """
+
+    def __init__(self, blockchain, on_mined: Optional[Callable] = None):
+        self.blockchain = blockchain
+        self.on_mined = on_mined
+        self._jobs: OrderedDict = OrderedDict()
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(self, user_id: int, miner_address: str) -> MiningJob:
+        """Queue a mining job, or return the one already in progress"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.active:
+                    return job
+
+            job = MiningJob(user_id, miner_address)
+            self._jobs[job.job_id] = job
+            self._trim()
+            self._publish(job)
+            self._queue.put(job)
+
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="mining-jobs", daemon=True)
+                self._worker.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[MiningJob]:
+        job = self._jobs.get(job_id)
+        if job is None and self.blockchain.shared is not None:
+            state = self.blockchain.shared.job(job_id)
+            if state is not None:
+                job = MiningJob.from_dict(state)
+        return job
+
+    def _publish(self, job: MiningJob) -> None:
+        if self.blockchain.shared is not None:
+            self.blockchain.shared.publish_job(job.job_id, job.to_dict())
+
+    def _trim(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            self._mine(job)
+
+    def _mine(self, job: MiningJob) -> None:
+        job.status = 'running'
+        job.started_at = time.time()
+        self._publish(job)
+        published_at = job.started_at
+        # Expected attempts to find a valid hash; PoW is memoryless, so the
+        # expected remaining time is the same however long we have searched
+        expected_hashes = 16 ** self.blockchain.difficulty
+
+        def progress(hashes: int, elapsed: float) -> None:
+            nonlocal published_at
+            job.hashes = hashes
+            job.hashrate = hashes / elapsed if elapsed > 0 else 0.0
+            job.eta = expected_hashes / job.hashrate if job.hashrate else None
+            now = time.time()
+            if now - published_at >= JOB_PUBLISH_INTERVAL:
+                published_at = now
+                self._publish(job)
+
+        try:
+            block = self.blockchain.mine_pending_transactions(job.miner_address, progress=progress)
+            if block is None:
+                job.status = 'empty'
+            else:
+                result = self.blockchain.last_mining_result
+                job.hashes = result.hashes
+                job.hashrate = result.hashrate
+                job.eta = 0.0
+                job.block_index = block.index
+                if self.on_mined is not None:
+                    job.record = self.on_mined(job, block)
+                job.status = 'done'
+        except Exception as e:
+            logger.exception("mining job failed job_id=%s", job.job_id)
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            try:
+                self._publish(job)
+                if self.blockchain.shared is not None:
+                    self.blockchain.shared.trim_jobs(MAX_FINISHED_JOBS)
+            except Exception:
+                logger.exception("mining job state not published job_id=%s", job.job_id)
+            job.finished.set()
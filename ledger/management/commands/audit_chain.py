@@ -0,0 +1,33 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ledger.blockchain_logic import blockchain
+
+
+class Command(BaseCommand):
+    help = "Re-validate every block's hash, linkage and proof of work, in parallel by default"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='audit processes (default: one per CPU; 1 checks blocks in order)')
+        parser.add_argument('--json', action='store_true', help='print the result as JSON')
+
+    def handle(self, *args, **options):
+        if blockchain.shared is None:
+            raise CommandError("BLOCKCHAIN_DATA_DIR is not set, so there is no stored chain to audit")
+        result = blockchain.audit(workers=options['workers'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(result.to_dict()))
+        elif result.valid:
+            self.stdout.write(self.style.SUCCESS(
+                f"Chain valid: {result.blocks_checked} blocks checked by {result.workers} "
+                f"worker(s) in {result.elapsed:.2f}s"
+            ))
+
+        if not result.valid:
+            raise CommandError(
+                f"Block {result.first_invalid_height} is invalid: {result.reason}"
+            )
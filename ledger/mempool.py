@@ -0,0 +1,188 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Brackets, separating commas and the quotes around the three string fields
+RECORD_OVERHEAD = 12
+# Two more commas and quoted strings for a signed transaction's key and signature
+SIGNATURE_OVERHEAD = 6
+
+
+def record_size(transaction) -> int:
+    """Length of the transaction's JSON store record, without encoding it
+
+    Exact for ASCII fields that need no escaping, which covers the IDs and
+    addresses this chain produces.
+    """
+    size = (
+        RECORD_OVERHEAD
+        + len(transaction.transaction_id) + len(transaction.sender) + len(transaction.receiver)
+        + len(repr(transaction.amount)) + len(repr(transaction.timestamp))
+    )
+    if transaction.signature is not None:
+        size += SIGNATURE_OVERHEAD + len(transaction.public_key) + len(transaction.signature)
+    return size
+
+
+class Mempool:
+    """Pending transactions indexed by ID and sender, with a size cap
+
+    Transactions are kept in arrival order in a dict keyed by
+    transaction_id, which gives O(1) lookup and duplicate detection. When
+    the pool holds `max_size` transactions, adding another evicts the
+    lowest-priority one first. There are no fees in this chain, so the
+    amount transferred stands in as priority; among equal amounts the
+    newest transaction is evicted first.
+
+    stats() reads counters and a timestamp-sorted list maintained on every
+    change, so it never walks the pool.
+
+    All mutations and multi-step reads hold an internal lock, so request
+    threads can add transactions while the miner removes the ones it mined.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        self.evicted = 0
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop every pending transaction"""
+        with self._lock:
+            self._reset()
+
+    def _reset(self) -> None:
+        self._transactions: Dict[str, object] = {}
+        self._by_sender: Dict[str, Dict[str, object]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._sequence: Dict[str, int] = {}
+        self._timestamps: List[Tuple[float, str]] = []
+        self._eviction_heap: List[Tuple[float, int, str]] = []
+        self._next_sequence = 0
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def __contains__(self, transaction_id: str) -> bool:
+        return transaction_id in self._transactions
+
+    def __iter__(self) -> Iterator:
+        with self._lock:
+            return iter(list(self._transactions.values()))
+
+    def get(self, transaction_id: str):
+        """Get a pending transaction by ID, or None"""
+        return self._transactions.get(transaction_id)
+
+    def by_sender(self, sender: str) -> List:
+        """Get the pending transactions sent from an address"""
+        with self._lock:
+            return list(self._by_sender.get(sender, {}).values())
+
+    def add(self, transaction) -> List:
+        """Add a transaction, returning any transactions evicted to make room
+
+        Raises ValueError for a duplicate, or when the pool is full and the
+        new transaction would itself be the first to be evicted.
+        """
+        with self._lock:
+            return self._add(transaction)
+
+    def _add(self, transaction) -> List:
+        tx_id = transaction.transaction_id
+        if tx_id in self._transactions:
+            raise ValueError(f"Duplicate transaction {tx_id}")
+
+        evicted = []
+        if len(self._transactions) >= self.max_size:
+            lowest = self._lowest_priority()
+            if lowest is None or transaction.amount <= lowest.amount:
+                raise ValueError("Mempool is full")
+            self._remove(lowest.transaction_id)
+            self.evicted += 1
+            evicted.append(lowest)
+
+        size = record_size(transaction)
+        sequence = self._next_sequence
+        self._next_sequence += 1
+
+        self._transactions[tx_id] = transaction
+        self._by_sender.setdefault(transaction.sender, {})[tx_id] = transaction
+        self._sizes[tx_id] = size
+        self._sequence[tx_id] = sequence
+        self._bytes += size
+        insort(self._timestamps, (transaction.timestamp, tx_id))
+        heapq.heappush(self._eviction_heap, (transaction.amount, -sequence, tx_id))
+        return evicted
+
+    def remove(self, transaction_id: str) -> Optional[object]:
+        """Remove a transaction by ID, returning it (or None if absent)"""
+        with self._lock:
+            return self._remove(transaction_id)
+
+    def _remove(self, transaction_id: str) -> Optional[object]:
+        transaction = self._transactions.pop(transaction_id, None)
+        if transaction is None:
+            return None
+
+        sender_pool = self._by_sender[transaction.sender]
+        del sender_pool[transaction_id]
+        if not sender_pool:
+            del self._by_sender[transaction.sender]
+
+        self._bytes -= self._sizes.pop(transaction_id)
+        del self._sequence[transaction_id]
+        position = bisect_left(self._timestamps, (transaction.timestamp, transaction_id))
+        del self._timestamps[position]
+
+        # Heap entries are dropped lazily; compact once they dominate
+        if len(self._eviction_heap) > 2 * len(self._transactions) + 64:
+            self._eviction_heap = [
+                (tx.amount, -self._sequence[tx_id], tx_id)
+                for tx_id, tx in self._transactions.items()
+            ]
+            heapq.heapify(self._eviction_heap)
+        return transaction
+
+    def remove_many(self, transaction_ids: Iterable[str]) -> int:
+        """Remove every listed transaction that is still pending"""
+        with self._lock:
+            return sum(self._remove(tx_id) is not None for tx_id in transaction_ids)
+
+    def _lowest_priority(self):
+        while self._eviction_heap:
+            amount, negative_sequence, tx_id = self._eviction_heap[0]
+            if self._sequence.get(tx_id) == -negative_sequence:
+                return self._transactions[tx_id]
+            heapq.heappop(self._eviction_heap)
+        return None
+
+    def stats(self, now: Optional[float] = None) -> Dict:
+        """Count, serialized bytes and age percentiles of pending transactions"""
+        now = time.time() if now is None else now
+
+        with self._lock:
+            count = len(self._timestamps)
+
+            def age(percentile: int) -> float:
+                if not count:
+                    return 0.0
+                # Nearest rank over ages sorted ascending (timestamps descending)
+                rank = max(1, -(-percentile * count // 100))
+                return now - self._timestamps[count - rank][0]
+
+            return {
+                'count': count,
+                'bytes': self._bytes,
+                'max_size': self.max_size,
+                'evicted': self.evicted,
+                'age_p50': age(50),
+                'age_p90': age(90),
+                'age_p99': age(99),
+                'oldest_age': age(100),
+            }
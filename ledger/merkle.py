@@ -0,0 +1,66 @@
+import hashlib
+from typing import Dict, List
+
+# Domain separation between leaves and inner nodes (as in RFC 6962), so a
+# pair of child hashes can never be passed off as a transaction ID
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def hash_leaf(transaction_id: str) -> bytes:
+    """Hash a transaction ID into a Merkle leaf"""
+    return hashlib.sha256(LEAF_PREFIX + transaction_id.encode()).digest()
+
+
+def hash_pair(left: bytes, right: bytes) -> bytes:
+    """Hash two child nodes into their parent"""
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def merkle_levels(transaction_ids: List[str]) -> List[List[bytes]]:
+    """Build every level of the tree, leaves first and root last
+
+    The last node of an odd level is carried up unpaired. Pairing it with
+    itself, as Bitcoin does, would give [a, b, c] and [a, b, c, c] the
+    same root.
+    """
+    level = [hash_leaf(tx_id) for tx_id in transaction_ids] or [hashlib.sha256(b'').digest()]
+    levels = [level]
+
+    while len(level) > 1:
+        carried = [level[-1]] if len(level) % 2 else []
+        level = [hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)] + carried
+        levels.append(level)
+
+    return levels
+
+
+def merkle_root(transaction_ids: List[str]) -> str:
+    """Calculate the Merkle root over a list of transaction IDs"""
+    return merkle_levels(transaction_ids)[-1][0].hex()
+
+
+def merkle_proof(transaction_ids: List[str], position: int) -> List[Dict]:
+    """Return the sibling path from the leaf at `position` up to the root
+
+    Levels where the node is carried up unpaired add no step.
+    """
+    proof = []
+    for level in merkle_levels(transaction_ids)[:-1]:
+        sibling = position ^ 1
+        if sibling < len(level):
+            proof.append({
+                'hash': level[sibling].hex(),
+                'side': 'left' if sibling < position else 'right'
+            })
+        position //= 2
+    return proof
+
+
+def verify_merkle_proof(transaction_id: str, proof: List[Dict], root: str) -> bool:
+    """Check that a proof from merkle_proof links transaction_id to root"""
+    node = hash_leaf(transaction_id)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        node = hash_pair(sibling, node) if step['side'] == 'left' else hash_pair(node, sibling)
+    return node.hex() == root
@@ -0,0 +1,190 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Default histogram buckets (seconds), as in the Prometheus client libraries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [
+        '{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Metric:
+    """Base for metrics with optional labels
+
+    A metric declared with label names is a family: labels(...) returns
+    the child for one combination of label values, created on first use.
+    """
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], 'Metric'] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> 'Metric':
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> 'Metric':
+        return type(self)(self.name, self.documentation)
+
+    def _samples(self) -> List[Tuple[str, str, float]]:
+        """(suffix, extra label, value) for an unlabelled metric"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        if self.labelnames:
+            children = sorted(self._children.items())
+        else:
+            children = [((), self)]
+        for values, child in children:
+            for suffix, extra, value in child._samples():
+                labels = _format_labels(self.labelnames, values, extra)
+                lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def _samples(self):
+        return [('_total', '', self.value)]
+
+
+class Gauge(Metric):
+    """A value that is set directly, or computed by `function` at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+        self.function = function
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def _samples(self):
+        return [('', '', self.function() if self.function is not None else self.value)]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def _new_child(self) -> 'Histogram':
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value: float) -> None:
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[position] += 1
+            self._sum += value
+
+    def _samples(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            samples.append(('_bucket', f'le="{_format_value(bound)}"', cumulative))
+        samples.append(('_sum', '', total))
+        samples.append(('_count', '', cumulative))
+        return samples
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text format
+
+    Updating a counter or histogram is a lock and an addition; gauges
+    backed by a function cost nothing until render() is called, so the
+    registry adds negligible overhead when nobody scrapes it.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+TRANSACTIONS_ADDED = REGISTRY.counter(
+    'ledger_transactions_added', 'Transactions admitted to the mempool')
+BLOCKS_MINED = REGISTRY.counter(
+    'ledger_blocks_mined', 'Blocks mined and appended by this process')
+MINING_DURATION = REGISTRY.histogram(
+    'ledger_mining_duration_seconds', 'Wall time of each Proof of Work search',
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0))
+MINING_HASHRATE = REGISTRY.gauge(
+    'ledger_mining_hashrate', 'Hashes per second of the most recent Proof of Work search')
+VALIDATION_DURATION = REGISTRY.histogram(
+    'ledger_validation_duration_seconds', 'Wall time of chain validation runs', ['mode'],
+    buckets=(0.0001, 0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0))
+REQUEST_DURATION = REGISTRY.histogram(
+    'ledger_http_request_duration_seconds', 'Request latency by view', ['view'])
+SIGNATURES_VERIFIED = REGISTRY.counter(
+    'ledger_signatures_verified', 'Ed25519 signatures checked by the crypto backend')
+SIGNATURE_CACHE_HITS = REGISTRY.counter(
+    'ledger_signature_cache_hits', 'Signature checks answered from the verification cache')
@@ -0,0 +1,30 @@
+import time
+
+from .blockchain_logic import blockchain
+from .metrics import REQUEST_DURATION
+
+
+class ChainSyncMiddleware:
+    """Bring this worker's copy of a shared chain up to date before each request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        blockchain.sync()
+        return self.get_response(request)
+
+
+class RequestMetricsMiddleware:
+    """Record each request's latency in a histogram labelled by URL name"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match is not None else 'unmatched'
+        REQUEST_DURATION.labels(view).observe(time.perf_counter() - started)
+        return response
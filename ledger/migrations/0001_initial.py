@@ -0,0 +1,46 @@
+# Generated by Django 4.2
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Wallet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=100, unique=True)),
+                ('public_key', models.TextField(blank=True)),
+                ('private_key', models.TextField(blank=True)),
+                ('balance', models.DecimalField(decimal_places=8, default=0.0, max_digits=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='wallet', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MiningRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block_index', models.IntegerField()),
+                ('block_hash', models.CharField(max_length=64)),
+                ('difficulty', models.IntegerField()),
+                ('nonce', models.IntegerField()),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('reward', models.DecimalField(decimal_places=8, default=6.25, max_digits=20)),
+                ('miner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+            },
+        ),
+    ]
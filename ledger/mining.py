@@ -0,0 +1,162 @@
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ALL_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+# Sentinel stored in the shared "best nonce" slot until a worker finds a hash
+NOT_FOUND = 2 ** 63 - 1
+
+# How many nonces a worker tries between checks of the shared slot
+CHECK_INTERVAL = 1024
+
+# Seconds between progress reports while waiting on the pool
+PROGRESS_INTERVAL = 0.5
+
+# progress(hashes_tried, elapsed_seconds), called periodically while mining
+ProgressCallback = Callable[[int, float], None]
+
+# Pool workers (mining and audits) start from a clean process rather than
+# a fork of this one: pools run next to request, job and watcher threads,
+# and a fork taken while one of them holds a lock (metrics, caches, the
+# verifier) would inherit it locked forever
+POOL_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+_best_nonce = None
+_hashes_done = None
+
+
+@dataclass
+class WorkerStats:
+    """Hashing work done by a single mining worker"""
+    worker_id: int
+    hashes: int
+    elapsed: float
+    nonce: Optional[int] = None
+
+    @property
+    def hashrate(self) -> float:
+        return self.hashes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class MiningResult:
+    """Outcome of a Proof of Work search"""
+    nonce: int
+    hash: str
+    difficulty: int
+    elapsed: float
+    workers: List[WorkerStats] = field(default_factory=list)
+
+    @property
+    def hashes(self) -> int:
+        return sum(worker.hashes for worker in self.workers)
+
+    @property
+    def hashrate(self) -> float:
+        return self.hashes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def nonce_hasher(header: bytes):
+    """Return a function hashing header + nonce from a precomputed midstate
+
+    The header bytes are fed to SHA-256 once; each call only copies that
+    state and absorbs the decimal nonce, so the per-nonce cost no longer
+    depends on how many transactions the block carries.
+    """
+    midstate = hashlib.sha256(header)
+
+    def hash_nonce(nonce: int) -> str:
+        state = midstate.copy()
+        state.update(str(nonce).encode())
+        return state.hexdigest()
+
+    return hash_nonce
+
+
+def _init_worker(best_nonce, hashes_done) -> None:
+    """Keep the shared counters, which a fresh worker receives as initargs"""
+    global _best_nonce, _hashes_done
+    _best_nonce = best_nonce
+    _hashes_done = hashes_done
+
+
+def _search(header: bytes, difficulty: int, worker_id: int, workers: int,
+            start_nonce: int, chunk_size: int) -> WorkerStats:
+    """Scan every `workers`-th chunk of the nonce space, lowest first"""
+    hash_nonce = nonce_hasher(header)
+    target = "0" * difficulty
+    hashes = 0
+    started = time.perf_counter()
+    chunk_start = start_nonce + worker_id * chunk_size
+
+    while chunk_start < _best_nonce.value:
+        for nonce in range(chunk_start, chunk_start + chunk_size):
+            if hashes % CHECK_INTERVAL == 0:
+                if nonce >= _best_nonce.value:
+                    # A lower nonce already won, nothing left to find here
+                    return WorkerStats(worker_id, hashes, time.perf_counter() - started)
+                if hashes:
+                    with _hashes_done.get_lock():
+                        _hashes_done.value += CHECK_INTERVAL
+
+            hashes += 1
+            if hash_nonce(nonce)[:difficulty] == target:
+                with _best_nonce.get_lock():
+                    if nonce < _best_nonce.value:
+                        _best_nonce.value = nonce
+                return WorkerStats(worker_id, hashes, time.perf_counter() - started, nonce)
+
+        chunk_start += workers * chunk_size
+
+    return WorkerStats(worker_id, hashes, time.perf_counter() - started)
+
+
+class ParallelMiner:
+    """Proof of Work miner that splits the nonce space across processes
+
+    Chunks of `chunk_size` nonces are dealt round-robin to the workers. A
+    worker only stops once its next nonce is above the lowest valid nonce
+    found so far, so the winning nonce is always the smallest valid one -
+    the same nonce the single-threaded `Block.mine_block` loop returns.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 10_000):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def mine(self, block, difficulty: int,
+             progress: Optional[ProgressCallback] = None) -> MiningResult:
+        """Find the lowest valid nonce for block and store it on the block"""
+        start_time = time.perf_counter()
+        start_nonce = block.nonce
+        header = block.serialize_header()
+        best_nonce = POOL_CONTEXT.Value('q', NOT_FOUND)
+        hashes_done = POOL_CONTEXT.Value('q', 0)
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=POOL_CONTEXT,
+                                 initializer=_init_worker,
+                                 initargs=(best_nonce, hashes_done)) as pool:
+            futures = [
+                pool.submit(_search, header, difficulty, worker_id,
+                            self.workers, start_nonce, self.chunk_size)
+                for worker_id in range(self.workers)
+            ]
+            while wait(futures, timeout=PROGRESS_INTERVAL, return_when=ALL_COMPLETED).not_done:
+                if progress is not None:
+                    progress(hashes_done.value, time.perf_counter() - start_time)
+            stats = [future.result() for future in futures]
+
+        block.nonce = best_nonce.value
+        block.hash = nonce_hasher(header)(block.nonce)
+
+        return MiningResult(
+            nonce=block.nonce,
+            hash=block.hash,
+            difficulty=difficulty,
+            elapsed=time.perf_counter() - start_time,
+            workers=stats,
+        )
@@ -1,6 +1,15 @@
-from django.db import models
+import logging
+import time
+
+from django.db import DatabaseError, models
 from django.contrib.auth.models import User
 from .blockchain_logic import blockchain
+from .signatures import ADDRESS_PREFIX, address_for, generate_keypair, sign, signing_message
+
+logger = logging.getLogger(__name__)
+
+# Wallets per UPDATE when writing balances back
+WALLET_SYNC_BATCH_SIZE = 500
 
 class Wallet(models.Model):
     """User wallet for the blockchain"""
@@ -15,14 +24,53 @@ class Wallet(models.Model):
     def __str__(self):
         return f"Wallet: {self.address[:10]}... ({self.user.username})"
     
-    def update_balance(self):
-        """Update balance from blockchain"""
+    @classmethod
+    def create_for(cls, user):
+        """Create a wallet with a new Ed25519 key pair; its address is derived from the public key"""
+        private_key, public_key = generate_keypair()
+        address = address_for(public_key)
+        return cls.objects.create(
+            user=user,
+            address=address,
+            public_key=public_key,
+            private_key=private_key,
+            balance=blockchain.get_wallet_balance(address),
+        )
+    
+    @property
+    def can_sign(self):
+        """True if the address belongs to the stored key pair (older wallets have placeholder keys)"""
+        return self.address.startswith(ADDRESS_PREFIX) and bool(self.private_key)
+    
+    def send(self, receiver, amount):
+        """Sign a transfer from this wallet with its stored key and submit it"""
+        if not self.can_sign:
+            return blockchain.add_transaction(self.address, receiver, amount)
+        timestamp = time.time()
+        signature = sign(self.private_key, signing_message(self.address, receiver, amount, timestamp))
+        return blockchain.add_transaction(self.address, receiver, amount, timestamp,
+                                          self.public_key, signature)
+    
+    def refresh_balance(self):
+        """Read the current balance from the blockchain's balance index, without saving
+
+        The stored balance is written back by sync_wallet_balances() when
+        a block touches the wallet, so page views never need to write it.
+        """
         self.balance = blockchain.get_wallet_balance(self.address)
-        self.save()
+    
+    def update_balance(self):
+        """Update balance from blockchain and save it"""
+        self.refresh_balance()
+        self.save(update_fields=['balance', 'updated_at'])
     
     def get_transaction_history(self):
         """Get transaction history from blockchain"""
         return blockchain.get_transaction_history(self.address)
+    
+    def get_transaction_history_page(self, cursor=None, limit=50):
+        """Get one page of transaction history, newest first"""
+        return blockchain.get_transaction_history_page(self.address, cursor, limit)
 
 class MiningRecord(models.Model):
     """Record of mined blocks"""
@@ -38,4 +86,28 @@ class MiningRecord(models.Model):
         ordering = ['-timestamp']
     
     def __str__(self):
-        return f"Block #{self.block_index} mined by {self.miner.username}"
\ No newline at end of file
+        return f"Block #{self.block_index} mined by {self.miner.username}"
+
+def sync_wallet_balances():
+    """Write back the balances of wallets touched by blocks appended since the last call
+
+    Issues one bulk UPDATE of the balance column per batch of wallets, and
+    nothing at all when no block was appended. Returns the number of
+    wallets written. Called after mining (see ledger.views.record_mining),
+    never while serving a page. If the database refuses the write, the
+    error is logged and the wallets stay dirty for the next call.
+    """
+    addresses = list(blockchain.take_dirty_addresses())
+    written = 0
+    try:
+        for start in range(0, len(addresses), WALLET_SYNC_BATCH_SIZE):
+            wallets = list(Wallet.objects.filter(
+                address__in=addresses[start:start + WALLET_SYNC_BATCH_SIZE]
+            ).only('id', 'address', 'balance'))
+            for wallet in wallets:
+                wallet.refresh_balance()
+            written += Wallet.objects.bulk_update(wallets, ['balance'])
+    except DatabaseError:
+        blockchain.mark_addresses_dirty(addresses)
+        logger.exception("wallet balance sync failed addresses=%d", len(addresses))
+    return written
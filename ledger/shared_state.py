@@ -0,0 +1,160 @@
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+LOCK_FILE = 'writer.lock'
+AUDIT_LOCK_FILE = 'audit.lock'
+MEMPOOL_DB = 'mempool.sqlite3'
+
+
+class SharedState:
+    """Coordination between worker processes that share one data directory
+
+    Blocks are shared through the BlockStore files themselves; this class
+    adds the two pieces the store cannot provide on its own:
+
+    * writer(): an exclusive flock, so only one process at a time mines
+      and appends blocks.
+    * A SQLite journal of pending transactions. Every worker inserts the
+      transactions it admits, and pulls the ones other workers admitted.
+      SQLite's data_version changes only when another connection commits,
+      so checking for news costs one PRAGMA when nothing has happened.
+    * A table of mining job states, so a status poll answered by any
+      worker sees the job the mining worker is running.
+    * claim_audits(): a second flock that elects the one worker running
+      periodic full audits; it publishes each result for the others.
+    """
+
+    def __init__(self, data_dir: str):
+        os.makedirs(data_dir, exist_ok=True)
+        self._lock_file = open(os.path.join(data_dir, LOCK_FILE), 'a+')
+        self._audit_lock_path = os.path.join(data_dir, AUDIT_LOCK_FILE)
+        self._audit_lock_file = None
+        self._thread_lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(data_dir, MEMPOOL_DB),
+                                   isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS pending ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'transaction_id TEXT UNIQUE NOT NULL, '
+            'record TEXT NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'job_id TEXT UNIQUE NOT NULL, '
+            'state TEXT NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS audit ('
+            'id INTEGER PRIMARY KEY CHECK (id = 0), '
+            'state TEXT NOT NULL)'
+        )
+        self._last_seq = 0
+        self._data_version = None
+
+    @contextmanager
+    def writer(self):
+        """Hold the cross-process (and cross-thread) writer lock"""
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def publish_transactions(self, transactions: Iterable) -> None:
+        """Journal newly admitted transactions for the other workers
+
+        IDs hash the transaction's contents, so an ID that is already
+        journaled is the same transaction and is skipped.
+        """
+        with self._db_lock:
+            self._db.execute('BEGIN')
+            self._db.executemany(
+                'INSERT OR IGNORE INTO pending (transaction_id, record) VALUES (?, ?)',
+                ((tx.transaction_id, json.dumps(tx.to_record())) for tx in transactions)
+            )
+            self._db.execute('COMMIT')
+
+    def new_transactions(self) -> List[List]:
+        """Records journaled since the last call that saw another worker's commit
+
+        May include this worker's own transactions; callers skip IDs they
+        already hold.
+        """
+        with self._db_lock:
+            data_version = self._db.execute('PRAGMA data_version').fetchone()[0]
+            if data_version == self._data_version:
+                return []
+            self._data_version = data_version
+
+            rows = self._db.execute(
+                'SELECT seq, record FROM pending WHERE seq > ? ORDER BY seq', (self._last_seq,)
+            ).fetchall()
+        if rows:
+            self._last_seq = rows[-1][0]
+        return [json.loads(record) for _, record in rows]
+
+    def remove_transactions(self, transaction_ids: Iterable[str]) -> None:
+        """Drop mined transactions from the journal"""
+        with self._db_lock:
+            self._db.execute('BEGIN')
+            self._db.executemany('DELETE FROM pending WHERE transaction_id = ?',
+                                 ((tx_id,) for tx_id in transaction_ids))
+            self._db.execute('COMMIT')
+
+    def publish_job(self, job_id: str, state: Dict) -> None:
+        """Record a mining job's latest state for the other workers"""
+        with self._db_lock:
+            self._db.execute(
+                'INSERT INTO jobs (job_id, state) VALUES (?, ?) '
+                'ON CONFLICT (job_id) DO UPDATE SET state = excluded.state',
+                (job_id, json.dumps(state))
+            )
+
+    def job(self, job_id: str) -> Optional[Dict]:
+        """A mining job's last published state, if any worker published it"""
+        with self._db_lock:
+            row = self._db.execute('SELECT state FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def trim_jobs(self, keep: int) -> None:
+        """Forget all but the newest keep jobs"""
+        with self._db_lock:
+            self._db.execute(
+                'DELETE FROM jobs WHERE seq <= (SELECT seq FROM jobs ORDER BY seq DESC LIMIT 1 OFFSET ?)',
+                (keep,)
+            )
+
+    def claim_audits(self) -> bool:
+        """Whether this process runs the periodic audits
+
+        The first process to ask takes the audit flock without waiting and
+        keeps it until it exits; everyone else gets False until then.
+        """
+        if self._audit_lock_file is None:
+            self._audit_lock_file = open(self._audit_lock_path, 'a+')
+        try:
+            fcntl.flock(self._audit_lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def publish_audit(self, state: Dict) -> None:
+        """Record the latest full audit's result for the other workers"""
+        with self._db_lock:
+            self._db.execute('INSERT OR REPLACE INTO audit (id, state) VALUES (0, ?)',
+                             (json.dumps(state),))
+
+    def audit(self) -> Optional[Dict]:
+        """The last published full audit result, if any"""
+        with self._db_lock:
+            row = self._db.execute('SELECT state FROM audit WHERE id = 0').fetchone()
+        return json.loads(row[0]) if row else None
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+from .metrics import SIGNATURE_CACHE_HITS, SIGNATURES_VERIFIED
+
+# Sender of mining rewards, which are the only transactions never signed
+MINT_SENDER = "0"
+
+# Addresses derived from a public key; spending from one always needs a signature
+ADDRESS_PREFIX = 'ed25519_'
+PUBLIC_KEY_BYTES = 32
+SIGNATURE_BYTES = 64
+
+CACHE_SIZE = 100_000
+# Signatures per thread pool task; smaller batches are verified inline
+BATCH_SIZE = 256
+
+# (public key, signature, signed message), keys and signatures in hex
+SignedMessage = Tuple[str, str, bytes]
+
+
+def generate_keypair() -> Tuple[str, str]:
+    """A new (private key, public key) pair, both raw bytes in hex"""
+    private_key = Ed25519PrivateKey.generate()
+    return (
+        private_key.private_bytes(serialization.Encoding.Raw, serialization.PrivateFormat.Raw,
+                                  serialization.NoEncryption()).hex(),
+        private_key.public_key().public_bytes(serialization.Encoding.Raw,
+                                              serialization.PublicFormat.Raw).hex(),
+    )
+
+
+def address_for(public_key: str) -> str:
+    """The address owned by a public key"""
+    return ADDRESS_PREFIX + hashlib.sha256(bytes.fromhex(public_key)).hexdigest()[:40]
+
+
+def signing_message(sender: str, receiver: str, amount: float, timestamp: float) -> bytes:
+    """The bytes a sender signs: every field the transaction ID is derived from"""
+    return json.dumps([sender, receiver, amount, timestamp]).encode()
+
+
+def sign(private_key: str, message: bytes) -> str:
+    return Ed25519PrivateKey.from_private_bytes(bytes.fromhex(private_key)).sign(message).hex()
+
+
+def authorization_error(sender: str, public_key: Optional[str], signature: Optional[str],
+                        require_signatures: bool = False) -> Optional[str]:
+    """Why a transaction's signature fields are unacceptable, or None
+
+    Checks everything except the signature itself: unsigned transactions
+    are allowed for mining rewards and, unless require_signatures is set,
+    for senders whose address is not derived from a key. A signed
+    transaction's public key must own the sender address.
+    """
+    if public_key is None and signature is None:
+        if sender != MINT_SENDER and (require_signatures or sender.startswith(ADDRESS_PREFIX)):
+            return "unsigned transaction"
+        return None
+    if public_key is None or signature is None:
+        return "incomplete signature"
+    try:
+        if address_for(public_key) != sender:
+            return "public key does not match sender"
+    except ValueError:
+        return "invalid public key"
+    return None
+
+
+class SignatureVerifier:
+    """Ed25519 verification with a bounded cache and batches on a thread pool
+
+    Signatures that verify are remembered (least recently used first out,
+    `cache_size` entries), so a transaction checked when it entered the
+    mempool is not checked again when its block is validated or audited.
+    Failures are never cached. Large batches are split across `workers`
+    threads, since the crypto backend does not hold the GIL while
+    verifying.
+    """
+
+    def __init__(self, cache_size: int = CACHE_SIZE, workers: Optional[int] = None):
+        self.cache_size = cache_size
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # Processes forked from this one (such as pre-forked server workers)
+        # keep the cache but not the pool's threads; pool workers start fresh
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._pool = None
+
+    @staticmethod
+    def _cache_key(item: SignedMessage) -> bytes:
+        public_key, signature, message = item
+        return hashlib.blake2b(f'{public_key}:{signature}:'.encode() + message, digest_size=16).digest()
+
+    @staticmethod
+    def _verify(item: SignedMessage) -> bool:
+        public_key, signature, message = item
+        try:
+            Ed25519PublicKey.from_public_bytes(bytes.fromhex(public_key)).verify(
+                bytes.fromhex(signature), message)
+        except (InvalidSignature, ValueError):
+            return False
+        return True
+
+    def _verify_batch(self, items: Sequence[SignedMessage]) -> List[bool]:
+        return [self._verify(item) for item in items]
+
+    def _cached(self, key: bytes) -> bool:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return True
+        return False
+
+    def _remember(self, keys: Sequence[bytes]) -> None:
+        with self._lock:
+            for key in keys:
+                self._cache[key] = None
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def verify(self, public_key: str, signature: str, message: bytes) -> bool:
+        return self.verify_many([(public_key, signature, message)])[0]
+
+    def verify_many(self, items: Sequence[SignedMessage]) -> List[bool]:
+        """Verify signatures, in order; cached ones cost a hash and a dict lookup"""
+        keys = [self._cache_key(item) for item in items]
+        results = [True] * len(items)
+        misses = [i for i, key in enumerate(keys) if not self._cached(key)]
+        SIGNATURE_CACHE_HITS.inc(len(items) - len(misses))
+        if not misses:
+            return results
+
+        pending = [items[i] for i in misses]
+        if len(pending) <= BATCH_SIZE or self.workers == 1:
+            verified = self._verify_batch(pending)
+        else:
+            if self._pool is None:
+                with self._lock:
+                    if self._pool is None:
+                        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='verify')
+            batches = [pending[i:i + BATCH_SIZE] for i in range(0, len(pending), BATCH_SIZE)]
+            verified = [ok for batch in self._pool.map(self._verify_batch, batches) for ok in batch]
+        SIGNATURES_VERIFIED.inc(len(pending))
+
+        for i, ok in zip(misses, verified):
+            results[i] = ok
+        self._remember([keys[i] for i, ok in zip(misses, verified) if ok])
+        return results
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+VERIFIER = SignatureVerifier()
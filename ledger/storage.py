@@ -0,0 +1,322 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+# One index entry per height: segment number, byte offset, record length
+INDEX_ENTRY = struct.Struct('<IQI')
+# Each filters file entry is its length followed by the raw address filter (length 0: none)
+FILTER_LENGTH = struct.Struct('<I')
+
+INDEX_FILE = 'blocks.idx'
+FILTER_FILE = 'filters.dat'
+SEGMENT_TEMPLATE = 'blocks-{:06d}.seg'
+
+
+def record_filter(record: Dict) -> Optional[bytes]:
+    """The raw address filter stored in a block record, if any"""
+    address_filter = record.get('address_filter')
+    return bytes.fromhex(address_filter) if address_filter is not None else None
+
+
+class BlockStore:
+    """Append-only, memory-mapped block storage
+
+    Blocks are serialized with Block.to_record() and appended to segment
+    files of at most `segment_size` bytes. A fixed-width index file maps
+    each height to (segment, offset, length), so opening a store only
+    reads the index; block bodies are decoded straight from the mapped
+    segments when they are accessed, and only the `cache_size` most
+    recently used Block objects are kept alive.
+
+    Writes are flushed to the OS on every append and fsynced every
+    `sync_every` appends (and on flush()/close()).
+
+    The store behaves like the list it replaces in Blockchain.chain:
+    it supports len(), indexing (including negative indexes), slicing,
+    iteration and append().
+
+    Several processes may open the same directory as long as only one of
+    them appends at a time (and opens it while no one is appending, since
+    opening truncates torn writes). The others call refresh() to pick up
+    new blocks, which reads only the index entries added since.
+
+    Each block's address filter is also appended to a side file, one
+    length-prefixed entry per height. address_filters() returns them all
+    from memory, so a scan for an address reads only the few kilobytes
+    per thousand blocks of the filters and decodes just the blocks that
+    match. Stores written before the side file existed get it backfilled
+    from their records when opened for writing.
+
+    readonly=True opens an existing store without recovering, locking or
+    opening anything for writing, so other processes (such as audit
+    workers) can read it while it is being appended to.
+
+    Within a process, any number of threads may read while one appends:
+    the segment maps and the block cache are guarded by an internal lock,
+    held only to look up, remap or copy, never while decoding.
+    """
+
+    def __init__(self, directory: str, decode: Callable[[Dict], object],
+                 segment_size: int = 64 * 1024 * 1024, sync_every: int = 64,
+                 cache_size: int = 256, readonly: bool = False):
+        self.directory = directory
+        self.decode = decode
+        self.segment_size = segment_size
+        self.sync_every = sync_every
+        self.cache_size = cache_size
+        self.readonly = readonly
+        self._cache: OrderedDict = OrderedDict()
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        # Address filters by height, read from the filters file on first use
+        self._filters: Optional[List[Optional[bytes]]] = None
+        self._filters_read = 0
+
+        if readonly:
+            self._index = bytearray(self._read_index())
+            self._drop_torn_entries()
+            self._index_file = self._segment_file = self._filter_file = None
+            self._segment = self._last_entry()[0] if len(self) else 0
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        self._index = bytearray(self._read_index())
+        self._recover()
+
+        self._index_file = open(os.path.join(directory, INDEX_FILE), 'ab')
+        self._segment = self._last_entry()[0] if len(self) else 0
+        self._segment_file = open(self._segment_path(self._segment), 'ab')
+        self._filter_file = open(os.path.join(directory, FILTER_FILE), 'ab')
+        self._repair_filters()
+
+    def _read_index(self) -> bytes:
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            return b''
+        with open(path, 'rb') as index_file:
+            data = index_file.read()
+        # Drop a partially written trailing entry
+        return data[:len(data) - len(data) % INDEX_ENTRY.size]
+
+    def _drop_torn_entries(self) -> None:
+        """Forget trailing index entries whose segment bytes are missing"""
+        while len(self):
+            segment, offset, length = self._last_entry()
+            path = self._segment_path(segment)
+            if os.path.exists(path) and os.path.getsize(path) >= offset + length:
+                break
+            del self._index[-INDEX_ENTRY.size:]
+
+    def _recover(self) -> None:
+        """Discard index entries and segment bytes left by an interrupted append"""
+        self._drop_torn_entries()
+
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            os.truncate(index_path, len(self._index))
+
+        segment, offset, length = self._last_entry() if len(self) else (0, 0, 0)
+        if os.path.exists(self._segment_path(segment)):
+            os.truncate(self._segment_path(segment), offset + length)
+
+    def _read_filters(self, limit: int) -> None:
+        """Load filters file entries past those already read, up to `limit` heights
+
+        Called with _lock held. A trailing partial entry is left for later.
+        """
+        path = os.path.join(self.directory, FILTER_FILE)
+        if self._filters is None:
+            self._filters, self._filters_read = [], 0
+        if len(self._filters) >= limit or not os.path.exists(path):
+            return
+        with open(path, 'rb') as filter_file:
+            filter_file.seek(self._filters_read)
+            data = filter_file.read()
+        position = 0
+        while len(self._filters) < limit and position + FILTER_LENGTH.size <= len(data):
+            (length,) = FILTER_LENGTH.unpack_from(data, position)
+            end = position + FILTER_LENGTH.size + length
+            if end > len(data):
+                break
+            self._filters.append(data[position + FILTER_LENGTH.size:end] or None)
+            position = end
+        self._filters_read += position
+
+    def _repair_filters(self) -> None:
+        """Make the filters file hold exactly one entry per stored block
+
+        Called by the one process allowed to append, when it opens the
+        store and before each append. Drops bytes left by an interrupted
+        append and backfills missing entries (such as for a store written
+        before the file existed) from the block records.
+        """
+        with self._lock:
+            self._read_filters(len(self))
+            if os.fstat(self._filter_file.fileno()).st_size != self._filters_read:
+                os.truncate(os.path.join(self.directory, FILTER_FILE), self._filters_read)
+        for height in range(len(self._filters), len(self)):
+            self._append_filter(record_filter(self.read_record(height)))
+
+    def _append_filter(self, address_filter: Optional[bytes]) -> None:
+        address_filter = address_filter or b''
+        self._filter_file.write(FILTER_LENGTH.pack(len(address_filter)) + address_filter)
+        with self._lock:
+            self._filters.append(address_filter or None)
+            self._filters_read += FILTER_LENGTH.size + len(address_filter)
+
+    def address_filters(self) -> List[Optional[bytes]]:
+        """Every block's address filter (None where it has none), by height
+
+        Entries another process has not finished writing yet are taken
+        from the block records instead.
+        """
+        height = len(self)
+        with self._lock:
+            self._read_filters(height)
+            filters = self._filters[:height]
+        for missing in range(len(filters), height):
+            filters.append(record_filter(self.read_record(missing)))
+        return filters
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, SEGMENT_TEMPLATE.format(segment))
+
+    def _entry(self, height: int):
+        return INDEX_ENTRY.unpack_from(self._index, height * INDEX_ENTRY.size)
+
+    def _last_entry(self):
+        return self._entry(len(self) - 1)
+
+    def _view(self, segment: int, end: int) -> mmap.mmap:
+        """Return a read-only map of a segment covering at least `end` bytes
+
+        Must be called with _lock held: a map that is too short is closed
+        and replaced, so it may only be sliced under the same lock.
+        """
+        view = self._maps.get(segment)
+        if view is None or len(view) < end:
+            if view is not None:
+                view.close()
+            with open(self._segment_path(segment), 'rb') as segment_file:
+                view = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = view
+        return view
+
+    def read_record(self, height: int) -> Dict:
+        """Read the raw record stored at a height"""
+        segment, offset, length = self._entry(height)
+        with self._lock:
+            data = self._view(segment, offset + length)[offset:offset + length]
+        return json.loads(data)
+
+    def refresh(self) -> int:
+        """Load index entries appended by another process; returns how many"""
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        if self.readonly:
+            size = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+        else:
+            size = os.fstat(self._index_file.fileno()).st_size
+        size -= size % INDEX_ENTRY.size
+        if size <= len(self._index):
+            return 0
+
+        with open(index_path, 'rb') as index_file:
+            index_file.seek(len(self._index))
+            added = index_file.read(size - len(self._index))
+        added = added[:len(added) - len(added) % INDEX_ENTRY.size]
+        self._index.extend(added)
+
+        segment = self._last_entry()[0]
+        if segment != self._segment and not self.readonly:
+            self._segment_file.close()
+            self._segment = segment
+            self._segment_file = open(self._segment_path(segment), 'ab')
+        return len(added) // INDEX_ENTRY.size
+
+    def __len__(self) -> int:
+        return len(self._index) // INDEX_ENTRY.size
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return [self[height] for height in range(*key.indices(len(self)))]
+
+        height = key + len(self) if key < 0 else key
+        if not 0 <= height < len(self):
+            raise IndexError("block height out of range")
+
+        with self._lock:
+            block = self._cache.get(height)
+            if block is not None:
+                self._cache.move_to_end(height)
+                return block
+
+        block = self.decode(self.read_record(height))
+        self._remember(height, block)
+        return block
+
+    def _remember(self, height: int, block) -> None:
+        with self._lock:
+            self._cache[height] = block
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def __iter__(self) -> Iterator:
+        for height in range(len(self)):
+            yield self[height]
+
+    def append(self, block) -> None:
+        """Append a block after the current tip"""
+        if self.readonly:
+            raise PermissionError("BlockStore was opened read-only")
+        record = block.to_record()
+        data = json.dumps(record, separators=(',', ':')).encode()
+        # The file size, not tell(): another process may have appended since we opened it
+        offset = os.fstat(self._segment_file.fileno()).st_size
+
+        if offset and offset + len(data) > self.segment_size:
+            self._segment_file.close()
+            self._segment += 1
+            self._segment_file = open(self._segment_path(self._segment), 'ab')
+            offset = 0
+
+        self._segment_file.write(data)
+        self._segment_file.flush()
+        # Before the index entry, so a block that is visible always has its filter
+        self._repair_filters()
+        self._append_filter(record_filter(record))
+        self._filter_file.flush()
+
+        entry = INDEX_ENTRY.pack(self._segment, offset, len(data))
+        self._index_file.write(entry)
+        self._index_file.flush()
+        self._index.extend(entry)
+        self._remember(len(self) - 1, block)
+
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """fsync appended blocks and index entries to disk"""
+        if self.readonly:
+            return
+        os.fsync(self._segment_file.fileno())
+        os.fsync(self._filter_file.fileno())
+        os.fsync(self._index_file.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        self.flush()
+        if not self.readonly:
+            self._segment_file.close()
+            self._filter_file.close()
+            self._index_file.close()
+        with self._lock:
+            for view in self._maps.values():
+                view.close()
+            self._maps = {}
@@ -1,33 +1,156 @@
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from asgiref.sync import sync_to_async
 from .blockchain_logic import blockchain
-from .models import Wallet, MiningRecord
+from .events import CHAIN_EVENTS
+from .jobs import MiningJobManager
+from .metrics import CONTENT_TYPE, REGISTRY
+from .models import Wallet, MiningRecord, sync_wallet_balances
+from datetime import datetime, timezone
+from itertools import islice
+import hmac
 import json
 
+HISTORY_PAGE_SIZE = 25
+MAX_HISTORY_PAGE_SIZE = 500
+CHAIN_PAGE_SIZE = 100
+MAX_CHAIN_PAGE_SIZE = 1000
+# Blocks read per thread hop when streaming NDJSON to an ASGI client
+NDJSON_CHUNK_BLOCKS = 256
+STATS_TOP_SIZE = 10
+MAX_STATS_TOP_SIZE = 1000
+# How often browsers reconnect to /api/events/ when it cannot stream (WSGI)
+EVENTS_RETRY_MS = 30000
+
+def parse_cursor(value):
+    """Parse an optional non-negative integer query parameter"""
+    if value in (None, ''):
+        return None
+    cursor = int(value)
+    if cursor < 0:
+        raise ValueError("Cursor must not be negative")
+    return cursor
+
+def audit_time(timestamp):
+    """Format the time of the last full chain audit, if any"""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+async def ndjson_chunks(blocks):
+    """Stream encoded blocks to an ASGI client, one line per block
+
+    Blocks are read off the event loop NDJSON_CHUNK_BLOCKS at a time, so
+    a large export neither blocks the loop nor gets buffered whole.
+    """
+    read_chunk = sync_to_async(lambda: list(islice(blocks, NDJSON_CHUNK_BLOCKS)),
+                               thread_sensitive=False)
+    while True:
+        chunk = await read_chunk()
+        if not chunk:
+            return
+        yield b''.join(block + b'\n' for block in chunk)
+
+def api_auth_error(request):
+    """Error response for an API request that is not authenticated, else None
+
+    Scripts send one of settings.LEDGER_API_TOKENS as a bearer token.
+    Requests carrying the session cookie of a logged-in user are accepted
+    too, but only with a valid CSRF token, since a browser would send
+    that cookie on a cross-site form post as well.
+    """
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        token = authorization[len('Bearer '):].encode()
+        if any(hmac.compare_digest(token, allowed.encode()) for allowed in settings.LEDGER_API_TOKENS):
+            return None
+        return JsonResponse({'error': 'Invalid API token'}, status=401)
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    return CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {})
+
+def miner_address_for(user):
+    """Address that receives the mining reward for a user"""
+    if hasattr(user, 'wallet'):
+        return user.wallet.address
+    return user.username
+
+def record_mining(job, block):
+    """Store a MiningRecord for a finished mining job and write back wallet balances
+
+    Runs on the job thread, so page views never write balances.
+    """
+    try:
+        sync_wallet_balances()
+        record = MiningRecord.objects.create(
+            miner_id=job.user_id,
+            block_index=block.index,
+            block_hash=block.hash,
+            difficulty=blockchain.difficulty,
+            nonce=block.nonce
+        )
+        return {
+            'id': record.id,
+            'block_index': record.block_index,
+            'block_hash': record.block_hash,
+            'difficulty': record.difficulty,
+            'nonce': record.nonce,
+            'reward': str(record.reward),
+        }
+    finally:
+        connection.close()
+
+mining_jobs = MiningJobManager(blockchain, on_mined=record_mining)
+
+def chain_etag(request, *args, **kwargs):
+    """ETag for API responses derived from the chain tip and mempool size"""
+    snapshot = blockchain.snapshot
+    return (
+        f'"{snapshot.height}-{snapshot.tip_hash[:16]}-{snapshot.pending_transactions}'
+        f'-{int(blockchain.is_chain_valid())}-{blockchain.last_full_audit or 0:.0f}"'
+    )
+
+def chain_last_modified(request, *args, **kwargs):
+    """Last-Modified for API responses: the last block or mempool change"""
+    return datetime.fromtimestamp(blockchain.snapshot.last_modified, tz=timezone.utc)
+
+# Clients revalidate on every poll; unchanged state is answered with 304
+chain_conditional = condition(etag_func=chain_etag, last_modified_func=chain_last_modified)
+
 def index(request):
     """Home page with blockchain overview"""
-    chain_data = blockchain.get_chain_data()
-    total_blocks = len(chain_data)
-    total_transactions = blockchain.get_total_transactions()
-    pending_transactions = len(blockchain.pending_transactions)
+    snapshot = blockchain.snapshot
     
     context = {
-        'total_blocks': total_blocks,
-        'total_transactions': total_transactions,
-        'pending_transactions': pending_transactions,
+        'total_blocks': snapshot.length,
+        'total_transactions': snapshot.total_transactions,
+        'pending_transactions': snapshot.pending_transactions,
+        'total_volume': snapshot.total_volume,
+        'total_rewards': snapshot.total_rewards,
+        'average_block_time': snapshot.average_block_time,
+        'mempool': blockchain.pending_transactions.stats(),
         'difficulty': blockchain.difficulty,
-        'latest_block': chain_data[-1] if chain_data else None,
+        'latest_block': snapshot.latest_block,
         'chain_valid': blockchain.is_chain_valid(),
+        'last_full_audit': audit_time(blockchain.last_full_audit),
     }
     
     if request.user.is_authenticated:
         try:
             wallet = request.user.wallet
-            wallet.update_balance()
+            wallet.refresh_balance()
             context['wallet'] = wallet
             context['wallet_balance'] = wallet.balance
         except:
@@ -50,7 +173,7 @@ def block_detail(request, block_index):
     try:
         block = blockchain.chain[block_index]
         context = {
-            'block': block.to_dict(),
+            'block': blockchain.get_block_data(block_index),
             'transactions': block.transactions,
         }
         return render(request, 'block_detail.html', context)
@@ -75,7 +198,12 @@ def create_transaction(request):
                 messages.error(request, "Amount must be positive")
                 return redirect('create_transaction')
             
-            tx_id = blockchain.add_transaction(sender, receiver, amount)
+            wallet = getattr(request.user, 'wallet', None)
+            if wallet is not None and sender == wallet.address:
+                # Signed with the wallet's stored key
+                tx_id = wallet.send(receiver, amount)
+            else:
+                tx_id = blockchain.add_transaction(sender, receiver, amount)
             
             messages.success(request, f"Transaction created! TX ID: {tx_id}")
             return redirect('index')
@@ -96,43 +224,24 @@ def create_transaction(request):
 
 @login_required
 def mine_block(request):
-    """Mine a new block"""
+    """Start a background job mining the pending transactions"""
     if request.method == 'POST':
-        try:
-            miner_address = "Anonymous"
-            if hasattr(request.user, 'wallet'):
-                miner_address = request.user.wallet.address
-            else:
-                miner_address = request.user.username
-            
-            new_block = blockchain.mine_pending_transactions(miner_address)
-            
-            if new_block:
-                MiningRecord.objects.create(
-                    miner=request.user,
-                    block_index=new_block.index,
-                    block_hash=new_block.hash,
-                    difficulty=blockchain.difficulty,
-                    nonce=new_block.nonce
-                )
-                
-                messages.success(request, 
-                    f"Block #{new_block.index} mined successfully! "
-                    f"Reward: 6.25 coins"
-                )
-            else:
-                messages.warning(request, "No pending transactions to mine")
-                
+        if not blockchain.pending_transactions:
+            messages.warning(request, "No pending transactions to mine")
             return redirect('index')
-            
-        except Exception as e:
-            messages.error(request, f"Mining failed: {str(e)}")
+        
+        job = mining_jobs.submit(request.user.id, miner_address_for(request.user))
+        messages.info(request, f"Mining job {job.job_id[:8]} is {job.status}. "
+                               f"The block will appear once Proof of Work completes.")
+        return redirect('index')
     
     pending_tx_count = len(blockchain.pending_transactions)
     
     context = {
         'pending_tx_count': pending_tx_count,
+        'mempool': blockchain.pending_transactions.stats(),
         'difficulty': blockchain.difficulty,
+        'target_prefix': '0' * blockchain.difficulty,
         'block_reward': 6.25,
     }
     return render(request, 'mine_block.html', context)
@@ -142,54 +251,199 @@ def wallet_view(request):
     """Display user wallet"""
     try:
         wallet = request.user.wallet
-        wallet.update_balance()
+        wallet.refresh_balance()
         
-        tx_history = wallet.get_transaction_history()
+        try:
+            cursor = parse_cursor(request.GET.get('cursor'))
+        except ValueError:
+            cursor = None
+        history_page = wallet.get_transaction_history_page(cursor, HISTORY_PAGE_SIZE)
         
         context = {
             'wallet': wallet,
             'balance': wallet.balance,
-            'transaction_history': tx_history,
-            'total_transactions': len(tx_history),
+            'transaction_history': history_page['transactions'],
+            'total_transactions': history_page['total'],
+            'next_cursor': history_page['next_cursor'],
+            'is_first_page': cursor is None,
         }
         
     except Wallet.DoesNotExist:
         messages.info(request, "You don't have a wallet yet. One will be created for you.")
-        wallet = Wallet.objects.create(
-            user=request.user,
-            address=f"user_{request.user.id}_{request.user.username}",
-            public_key=f"pubkey_{request.user.id}",
-            private_key=f"privkey_{request.user.id}",
-        )
-        wallet.update_balance()
+        Wallet.create_for(request.user)
         return redirect('wallet')
     
     return render(request, 'wallet.html', context)
 
+@cache_control(no_cache=True)
+@chain_conditional
 def api_blockchain(request):
-    """API endpoint for blockchain data"""
-    chain_data = blockchain.get_chain_data()
+    """API endpoint for blockchain data
+
+    Query parameters: from_height (default 0), limit, headers_only=1 to
+    drop transaction lists, and format=ndjson to stream one block per line
+    (limit defaults to the rest of the chain in that mode).
+    """
+    try:
+        from_height = parse_cursor(request.GET.get('from_height')) or 0
+        limit = parse_cursor(request.GET.get('limit'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    headers_only = request.GET.get('headers_only') in ('1', 'true')
+    snapshot = blockchain.snapshot
+    length = snapshot.length
+    
+    if request.GET.get('format') == 'ndjson':
+        blocks = blockchain.iter_chain_json(from_height, limit, headers_only)
+        if isinstance(request, ASGIRequest):
+            content = ndjson_chunks(blocks)
+        else:
+            content = (block + b'\n' for block in blocks)
+        response = StreamingHttpResponse(content, content_type='application/x-ndjson')
+        response['X-Chain-Length'] = length
+        return response
+    
+    limit = min(CHAIN_PAGE_SIZE if limit is None else limit, MAX_CHAIN_PAGE_SIZE)
+    chain_json = list(blockchain.iter_chain_json(from_height, limit, headers_only))
+    next_height = from_height + len(chain_json)
     
     data = {
-        'chain': chain_data,
-        'length': len(chain_data),
-        'pending_transactions': len(blockchain.pending_transactions),
+        'length': length,
+        'from_height': from_height,
+        'next_from_height': next_height if next_height < length else None,
+        'total_transactions': snapshot.total_transactions,
+        'pending_transactions': snapshot.pending_transactions,
+        'total_volume': snapshot.total_volume,
+        'total_rewards': snapshot.total_rewards,
+        'average_block_time': snapshot.average_block_time,
         'difficulty': blockchain.difficulty,
         'valid': blockchain.is_chain_valid(),
+        'last_full_audit': audit_time(blockchain.last_full_audit),
     }
     
-    return JsonResponse(data)
+    # Splice the blocks' cached JSON in rather than re-encoding them
+    body = json.dumps(data)[:-1].encode() + b', "chain": [' + b', '.join(chain_json) + b']}'
+    return HttpResponse(body, content_type='application/json')
+
+@cache_control(no_cache=True)
+@chain_conditional
+def api_transaction_history(request, address):
+    """API endpoint for one page of an address's transaction history"""
+    try:
+        cursor = parse_cursor(request.GET.get('cursor'))
+        limit = int(request.GET.get('limit', HISTORY_PAGE_SIZE))
+        if limit <= 0:
+            raise ValueError("Limit must be positive")
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    page = blockchain.get_transaction_history_page(
+        address, cursor, min(limit, MAX_HISTORY_PAGE_SIZE)
+    )
+    return JsonResponse(page)
+
+@cache_control(no_cache=True)
+@chain_conditional
+def api_transaction_proof(request, transaction_id):
+    """API endpoint for a transaction's Merkle inclusion proof"""
+    proof = blockchain.get_transaction_proof(transaction_id)
+    
+    if proof is None:
+        return JsonResponse({'error': 'Transaction not found'}, status=404)
+    
+    return JsonResponse(proof)
+
+def stats_limit(request, default, maximum):
+    """Parse the limit query parameter of a stats endpoint"""
+    limit = parse_cursor(request.GET.get('limit'))
+    return min(default if limit is None else limit, maximum)
+
+@cache_control(no_cache=True)
+@chain_conditional
+def api_stats(request):
+    """API endpoint for whole-chain totals"""
+    return JsonResponse(blockchain.get_analytics().summary())
+
+@cache_control(no_cache=True)
+@chain_conditional
+def api_stats_richest(request):
+    """API endpoint for the addresses with the highest balances"""
+    try:
+        limit = stats_limit(request, STATS_TOP_SIZE, MAX_STATS_TOP_SIZE)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'addresses': blockchain.get_analytics().richest(limit)})
+
+@cache_control(no_cache=True)
+@chain_conditional
+def api_stats_miners(request):
+    """API endpoint for miners ranked by total rewards"""
+    try:
+        limit = stats_limit(request, STATS_TOP_SIZE, MAX_STATS_TOP_SIZE)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'miners': blockchain.get_analytics().miner_rewards(limit)})
+
+@cache_control(no_cache=True)
+@chain_conditional
+def api_stats_block_volume(request):
+    """API endpoint for per-block transfer counts and volume, from_height onwards"""
+    try:
+        from_height = parse_cursor(request.GET.get('from_height')) or 0
+        limit = stats_limit(request, CHAIN_PAGE_SIZE, MAX_CHAIN_PAGE_SIZE)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({
+        'from_height': from_height,
+        'blocks': blockchain.get_analytics().block_volume(from_height, limit),
+    })
+
+@cache_control(no_cache=True)
+@chain_conditional
+def api_stats_daily(request):
+    """API endpoint for transaction counts and volume per UTC day"""
+    return JsonResponse({'days': blockchain.get_analytics().daily_counts()})
+
+def api_mine(request):
+    """API endpoint to start a mining job; returns its ID immediately"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if not blockchain.pending_transactions:
+        return JsonResponse({'error': 'No pending transactions to mine'}, status=409)
+    
+    job = mining_jobs.submit(request.user.id, miner_address_for(request.user))
+    return JsonResponse({
+        'job_id': job.job_id,
+        'status': job.status,
+        'status_url': reverse('api_mining_job', args=[job.job_id]),
+    }, status=202)
+
+def api_mining_job(request, job_id):
+    """API endpoint reporting a mining job's progress and result"""
+    job = mining_jobs.get(job_id)
+    if job is None:
+        return JsonResponse({'error': 'Mining job not found'}, status=404)
+    return JsonResponse(job.to_dict())
 
 def api_create_transaction(request):
-    """API endpoint to create transaction"""
+    """API endpoint to create transaction
+
+    A signed transaction also sends the timestamp that was signed, the
+    sender's public_key and the signature, all hex encoded.
+    """
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
             sender = data.get('sender')
             receiver = data.get('receiver')
             amount = float(data.get('amount'))
+            timestamp = data.get('timestamp')
             
-            tx_id = blockchain.add_transaction(sender, receiver, amount)
+            tx_id = blockchain.add_transaction(
+                sender, receiver, amount, float(timestamp) if timestamp is not None else None,
+                data.get('public_key'), data.get('signature'))
             
             return JsonResponse({
                 'success': True,
@@ -204,6 +458,66 @@ def api_create_transaction(request):
     
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+@csrf_exempt
+def api_bulk_create_transactions(request):
+    """API endpoint to add many transactions in one request
+
+    Accepts a JSON array of {sender, receiver, amount} objects (plus
+    timestamp, public_key and signature for signed ones), or NDJSON
+    (one object per line) when sent as application/x-ndjson, and returns
+    a result for every item in order. Requires an API token or a logged-in
+    session (see api_auth_error).
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    error = api_auth_error(request)
+    if error is not None:
+        return error
+    
+    try:
+        if request.content_type == 'application/x-ndjson':
+            items = [json.loads(line) for line in request if line.strip()]
+        else:
+            items = json.loads(request.body)
+            if not isinstance(items, list):
+                raise ValueError("Expected a JSON array of transactions")
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    results = blockchain.add_transactions(items)
+    accepted = sum(result['success'] for result in results)
+    
+    return JsonResponse({
+        'success': accepted == len(results),
+        'accepted': accepted,
+        'rejected': len(results) - accepted,
+        'results': results,
+    })
+
+async def api_events(request):
+    """Server-sent events with the chain's height, tip, transaction count and mempool depth
+
+    The current state is sent on connect and again on every change; changes
+    made by other workers are picked up by the broker's watcher thread.
+    Under ASGI each open stream is a coroutine waiting on the event broker,
+    ended after STREAM_LIFETIME so the browser reconnects and a closed tab
+    cannot hold it forever;
+    under WSGI it would hold a worker thread, so only the current state is
+    sent and the browser reconnects after EVENTS_RETRY_MS.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(f'retry: {EVENTS_RETRY_MS}\n'.encode() + CHAIN_EVENTS.message,
+                            content_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    
+    response = StreamingHttpResponse(CHAIN_EVENTS.stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def metrics(request):
+    """Prometheus scrape endpoint"""
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 def register(request):
     """User registration view"""
     if request.method == 'POST':
@@ -1,33 +1,44 @@
 // Blockchain Explorer JavaScript
 
-// Auto-update blockchain stats every 30 seconds
+// Show a chain state event ({height, tip_hash, total_transactions, pending_transactions})
+function showBlockchainStats(data) {
+    const totalBlocks = document.getElementById('total-blocks');
+    const totalTransactions = document.getElementById('total-transactions');
+    const pendingTransactions = document.getElementById('pending-transactions');
+    
+    if (totalBlocks) totalBlocks.textContent = data.height + 1;
+    if (totalTransactions) totalTransactions.textContent = data.total_transactions;
+    if (pendingTransactions) pendingTransactions.textContent = data.pending_transactions;
+}
+
+// Fetch the stats once (fallback for browsers without EventSource)
 function updateBlockchainStats() {
-    fetch('/api/blockchain/')
+    fetch('/api/blockchain/?limit=0')
         .then(response => response.json())
-        .then(data => {
-            // Update stats if elements exist
-            const totalBlocks = document.getElementById('total-blocks');
-            const totalTransactions = document.getElementById('total-transactions');
-            const pendingTransactions = document.getElementById('pending-transactions');
-            
-            if (totalBlocks) totalBlocks.textContent = data.length;
-            if (totalTransactions) {
-                let txCount = 0;
-                data.chain.forEach(block => {
-                    txCount += block.transaction_count;
-                });
-                totalTransactions.textContent = txCount;
-            }
-            if (pendingTransactions) pendingTransactions.textContent = data.pending_transactions;
-        })
+        .then(data => showBlockchainStats({
+            height: data.length - 1,
+            total_transactions: data.total_transactions,
+            pending_transactions: data.pending_transactions
+        }))
         .catch(error => console.error('Error updating stats:', error));
 }
 
+// Receive stats as the server pushes them; EventSource reconnects by itself
+function subscribeBlockchainStats() {
+    if (!window.EventSource) {
+        setInterval(updateBlockchainStats, 30000);
+        return null;
+    }
+    const events = new EventSource('/api/events/');
+    events.addEventListener('chain', event => showBlockchainStats(JSON.parse(event.data)));
+    return events;
+}
+
 // Initialize when page loads
 document.addEventListener('DOMContentLoaded', function() {
-    // Start auto-update if on dashboard
+    // Live stats if on dashboard
     if (window.location.pathname === '/') {
-        setInterval(updateBlockchainStats, 30000); // Update every 30 seconds
+        subscribeBlockchainStats();
     }
     
     // Add copy functionality to all code blocks
@@ -48,19 +59,30 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
-    // Mining simulation (for mine page)
-    const mineButton = document.querySelector('button[type="submit"]');
-    if (mineButton && mineButton.textContent.includes('Mining')) {
-        mineButton.addEventListener('click', function(e) {
-            // Add mining animation
-            this.innerHTML = '<span class="mining-spinner"></span> Mining...';
-            this.disabled = true;
+    // Background mining (for mine page): start a job and poll its progress
+    const mineForm = document.getElementById('mine-form');
+    if (mineForm) {
+        mineForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+            const button = this.querySelector('button[type="submit"]');
+            const progress = document.getElementById('mining-progress');
+            button.innerHTML = '<span class="mining-spinner"></span> Mining...';
+            button.disabled = true;
             
-            // Simulate mining delay
-            setTimeout(() => {
-                this.innerHTML = '⛏️ Start Mining';
-                this.disabled = false;
-            }, 3000);
+            fetch(this.dataset.apiUrl, {
+                method: 'POST',
+                headers: {'X-CSRFToken': this.querySelector('[name=csrfmiddlewaretoken]').value}
+            })
+                .then(response => response.json())
+                .then(job => {
+                    if (!job.status_url) throw new Error(job.error || 'Mining failed');
+                    pollMiningJob(job.status_url, progress);
+                })
+                .catch(error => {
+                    progress.textContent = error.message;
+                    button.innerHTML = '⛏️ Start Mining';
+                    button.disabled = false;
+                });
         });
     }
     
@@ -84,6 +106,26 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// Poll a mining job until it finishes, showing nonces tried, hashrate and ETA
+function pollMiningJob(statusUrl, progressElement) {
+    fetch(statusUrl)
+        .then(response => response.json())
+        .then(job => {
+            if (job.status === 'queued' || job.status === 'running') {
+                const eta = job.eta_seconds === null ? '?' : Math.ceil(job.eta_seconds) + 's';
+                progressElement.textContent =
+                    `${job.status}: ${job.nonces_tried.toLocaleString()} nonces tried, ` +
+                    `${Math.round(job.hashrate).toLocaleString()} H/s, ETA ~${eta}`;
+                setTimeout(() => pollMiningJob(statusUrl, progressElement), 1000);
+            } else if (job.status === 'done') {
+                window.location.href = `/blocks/${job.block_index}/`;
+            } else {
+                progressElement.textContent = job.error || `Mining job ${job.status}`;
+            }
+        })
+        .catch(error => console.error('Error polling mining job:', error));
+}
+
 // Utility function to format Bitcoin amounts
 function formatBTC(amount) {
     return parseFloat(amount).toFixed(8) + ' BTC';
@@ -99,5 +141,7 @@ function formatDate(timestamp) {
 window.BlockchainUtils = {
     formatBTC,
     formatDate,
-    updateBlockchainStats
+    updateBlockchainStats,
+    subscribeBlockchainStats,
+    pollMiningJob
 };
\ No newline at end of file
@@ -0,0 +1,840 @@
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+from ledger.audit import audit_chain, check_record, check_records
+from ledger.blockchain_logic import Blockchain, Block, MinedTransactions, Transaction
+from ledger.cache import BlockSerializationCache
+from ledger.checkpoints import BalanceCheckpoint
+from ledger.events import EventBroker
+from ledger.filters import AddressProbe, build_filter
+from ledger.jobs import MiningJobManager
+from ledger.mempool import Mempool
+from ledger.metrics import SIGNATURES_VERIFIED, Registry
+from ledger.merkle import merkle_proof, merkle_root, verify_merkle_proof
+from ledger.mining import POOL_CONTEXT, ParallelMiner
+from ledger.signatures import (BATCH_SIZE, VERIFIER, SignatureVerifier, address_for, generate_keypair, sign,
+                               signing_message)
+
+class ParallelMinerTest(SimpleTestCase):
+    def make_block(self):
+        transactions = [
+            Transaction('Alice', 'Bob', 1.5, timestamp=1700000000.0),
+            Transaction('Bob', 'Carol', 0.5, timestamp=1700000001.0),
+        ]
+        return Block(1, transactions, '0' * 64, timestamp=1700000002.0)
+
+    def test_parallel_miner_matches_single_threaded(self):
+        expected = self.make_block()
+        expected.mine_block(difficulty=3)
+
+        block = self.make_block()
+        result = block.mine_block(difficulty=3, miner=ParallelMiner(workers=4, chunk_size=64))
+
+        self.assertEqual(block.nonce, expected.nonce)
+        self.assertEqual(block.hash, expected.hash)
+        self.assertEqual(result.nonce, expected.nonce)
+        self.assertEqual(len(result.workers), 4)
+        self.assertGreater(result.hashes, 0)
+        # Workers are started fresh, not forked from this threaded process
+        self.assertIn(POOL_CONTEXT.get_start_method(), ('forkserver', 'spawn'))
+
+    def test_mine_pending_transactions_with_parallel_miner(self):
+        chain = Blockchain(difficulty=2, miner=ParallelMiner(workers=2, chunk_size=32))
+        chain.add_transaction('Alice', 'Bob', 2.0)
+
+        block = chain.mine_pending_transactions('Miner')
+
+        self.assertTrue(block.hash.startswith('00'))
+        self.assertEqual(chain.last_mining_result.nonce, block.nonce)
+        self.assertTrue(chain.is_chain_valid())
+
+class BlockHashTest(SimpleTestCase):
+    def test_mined_hash_matches_calculate_hash(self):
+        transactions = [Transaction('Alice', 'Bob', 1.0, timestamp=1700000000.0)]
+        block = Block(1, transactions, '0' * 64, timestamp=1700000001.0)
+        block.mine_block(difficulty=2)
+
+        self.assertTrue(block.hash.startswith('00'))
+        self.assertEqual(block.hash, block.calculate_hash())
+
+    def test_tampered_transaction_invalidates_chain(self):
+        chain = Blockchain(difficulty=2)
+        chain.add_transaction('Alice', 'Bob', 2.0)
+        chain.mine_pending_transactions('Miner')
+        self.assertTrue(chain.is_chain_valid())
+
+        chain.chain[1].transactions[1].amount = 200.0
+        self.assertFalse(chain.is_chain_valid(full=True))
+
+    def test_repeated_transaction_invalidates_block(self):
+        chain = Blockchain(difficulty=1)
+        chain.add_transaction('Alice', 'Bob', 2.0)
+        chain.add_transaction('Bob', 'Carol', 1.0)
+        block = chain.mine_pending_transactions('Miner')
+        self.assertTrue(chain.is_chain_valid())
+
+        record = block.to_record()
+        record['transactions'].append(record['transactions'][-1])
+        self.assertEqual(check_record(record, chain.chain[0].hash, 1), "duplicate transaction")
+
+        chain.chain[1] = Block.from_record(record)
+        self.assertFalse(chain.is_chain_valid(full=True))
+
+class MerkleProofTest(SimpleTestCase):
+    def test_proofs_verify_for_every_position(self):
+        for size in (1, 2, 3, 5, 8):
+            ids = [f'tx{i:014d}' for i in range(size)]
+            root = merkle_root(ids)
+            for position, tx_id in enumerate(ids):
+                proof = merkle_proof(ids, position)
+                self.assertTrue(verify_merkle_proof(tx_id, proof, root))
+                self.assertFalse(verify_merkle_proof('not-in-tree', proof, root))
+
+    def test_root_commits_to_leaf_count(self):
+        ids = [f'tx{i:014d}' for i in range(3)]
+        self.assertNotEqual(merkle_root(ids), merkle_root(ids + ids[-1:]))
+
+    def test_blockchain_transaction_proof(self):
+        chain = Blockchain(difficulty=1)
+        tx_id = chain.add_transaction('Alice', 'Bob', 3.0)
+        chain.add_transaction('Bob', 'Carol', 1.0)
+        block = chain.mine_pending_transactions('Miner')
+
+        proof = chain.get_transaction_proof(tx_id)
+
+        self.assertEqual(proof['block_index'], block.index)
+        self.assertEqual(proof['merkle_root'], block.merkle_root)
+        self.assertTrue(verify_merkle_proof(tx_id, proof['proof'], block.merkle_root))
+        self.assertIsNone(chain.get_transaction_proof('missing'))
+
+class BalanceIndexTest(SimpleTestCase):
+    def test_balance_index_matches_full_scan(self):
+        chain = Blockchain(difficulty=1)
+        chain.add_transaction('Alice', 'Bob', 3.0)
+        chain.add_transaction('Bob', 'Carol', 1.25)
+        chain.mine_pending_transactions('Alice')
+        chain.add_transaction('Carol', 'Alice', 0.5)
+        chain.mine_pending_transactions('Bob')
+
+        for address in ('Alice', 'Bob', 'Carol', 'Nobody'):
+            self.assertEqual(chain.get_wallet_balance(address), chain.scan_wallet_balance(address))
+        self.assertEqual(chain.get_wallet_balances(['Alice', 'Carol']),
+                         {'Alice': 3.75, 'Carol': 0.75})
+        self.assertEqual(chain.verify_balance_index(), [])
+
+    def test_verify_balance_index_reports_drift(self):
+        chain = Blockchain(difficulty=1)
+        chain.add_transaction('Alice', 'Bob', 3.0)
+        chain.mine_pending_transactions('Miner')
+
+        chain.balances['Bob'] = 100.0
+        self.assertEqual(chain.verify_balance_index(), ['Bob'])
+
+        chain.rebuild_indexes()
+        self.assertEqual(chain.verify_balance_index(), [])
+
+class TransactionHistoryTest(SimpleTestCase):
+    def test_history_pages_newest_first_with_cursor(self):
+        chain = Blockchain(difficulty=1)
+        for amount in range(1, 6):
+            chain.add_transaction('Alice', 'Bob', float(amount))
+            chain.mine_pending_transactions('Miner')
+
+        first = chain.get_transaction_history_page('Alice', limit=2)
+        self.assertEqual(first['total'], 5)
+        self.assertEqual([tx['amount'] for tx in first['transactions']], [5.0, 4.0])
+
+        second = chain.get_transaction_history_page('Alice', first['next_cursor'], limit=2)
+        third = chain.get_transaction_history_page('Alice', second['next_cursor'], limit=2)
+        self.assertEqual([tx['amount'] for tx in second['transactions']], [3.0, 2.0])
+        self.assertEqual([tx['amount'] for tx in third['transactions']], [1.0])
+        self.assertIsNone(third['next_cursor'])
+
+        self.assertEqual([tx['amount'] for tx in chain.get_transaction_history('Alice')],
+                         [1.0, 2.0, 3.0, 4.0, 5.0])
+
+
+class IncrementalValidationTest(SimpleTestCase):
+    def test_only_new_blocks_are_checked_until_full_audit(self):
+        chain = Blockchain(difficulty=1)
+        chain.add_transaction('Alice', 'Bob', 1.0)
+        chain.mine_pending_transactions('Miner')
+        self.assertTrue(chain.is_chain_valid())
+        self.assertEqual(chain.validated_height, 1)
+
+        chain.chain[1].transactions[1].amount = 50.0
+        chain.add_transaction('Bob', 'Carol', 1.0)
+        chain.mine_pending_transactions('Miner')
+        self.assertTrue(chain.is_chain_valid())
+        self.assertEqual(chain.validated_height, 2)
+
+        self.assertFalse(chain.run_full_audit())
+        self.assertIsNotNone(chain.last_full_audit)
+        self.assertFalse(chain.is_chain_valid())
+
+
+class ParallelAuditTest(SimpleTestCase):
+    def make_chain(self, data_dir=None):
+        chain = Blockchain(difficulty=1, data_dir=data_dir)
+        for amount in range(1, 8):
+            chain.add_transaction('Alice', 'Bob', float(amount))
+            chain.mine_pending_transactions('Miner')
+        return chain
+
+    def test_parallel_audit_reports_first_invalid_block(self):
+        chain = self.make_chain()
+        result = chain.audit(workers=2)
+        self.assertTrue(result.valid)
+        self.assertEqual(result.blocks_checked, len(chain.chain))
+
+        chain.chain[5].transactions[1].amount = 99.0
+        chain.chain[3].nonce += 1
+        result = audit_chain(chain.chain, chain.difficulty, workers=2, range_size=2)
+
+        self.assertFalse(result.valid)
+        self.assertEqual((result.first_invalid_height, result.reason), (3, 'invalid hash'))
+        self.assertEqual(chain.audit().first_invalid_height, 3)
+        self.assertTrue(chain.audit_failed)
+
+    def test_parallel_audit_reads_block_store(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            chain = self.make_chain(data_dir)
+            chain.chain.flush()
+            result = audit_chain(chain.chain, chain.difficulty, workers=2, range_size=3)
+            self.assertTrue(result.valid)
+            self.assertEqual(result.blocks_checked, 8)
+
+    def test_audit_chain_command(self):
+        with self.assertRaises(CommandError):
+            call_command('audit_chain', workers=2, stdout=io.StringIO())
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            output = io.StringIO()
+            with mock.patch('ledger.management.commands.audit_chain.blockchain', self.make_chain(data_dir)):
+                call_command('audit_chain', workers=2, json=True, stdout=output)
+            result = json.loads(output.getvalue())
+            self.assertTrue(result['valid'])
+            self.assertEqual(result['blocks_checked'], 8)
+
+class BlockStoreTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_chain_survives_reopen(self):
+        chain = Blockchain(difficulty=1, data_dir=self.tmp.name)
+        tx_id = chain.add_transaction('Alice', 'Bob', 2.5)
+        chain.mine_pending_transactions('Miner')
+        chain.chain.close()
+
+        reopened = Blockchain(difficulty=1, data_dir=self.tmp.name)
+
+        self.assertEqual(len(reopened.chain), 2)
+        self.assertEqual(reopened.chain[-1].hash, chain.chain[-1].hash)
+        self.assertEqual(reopened.get_wallet_balance('Bob'), 2.5)
+        self.assertEqual(reopened.get_transaction_proof(tx_id)['block_index'], 1)
+        self.assertTrue(reopened.is_chain_valid(full=True))
+
+    def test_torn_append_is_discarded(self):
+        chain = Blockchain(difficulty=1, data_dir=self.tmp.name)
+        chain.add_transaction('Alice', 'Bob', 1.0)
+        chain.mine_pending_transactions('Miner')
+        chain.chain.close()
+
+        with open(os.path.join(self.tmp.name, 'blocks-000000.seg'), 'ab') as segment:
+            segment.write(b'{"index":2,')
+        with open(os.path.join(self.tmp.name, 'blocks.idx'), 'ab') as index:
+            index.write(b'\x00' * 7)
+
+        reopened = Blockchain(difficulty=1, data_dir=self.tmp.name)
+        self.assertEqual(len(reopened.chain), 2)
+        reopened.add_transaction('Bob', 'Carol', 0.5)
+        reopened.mine_pending_transactions('Miner')
+        self.assertTrue(reopened.is_chain_valid(full=True))
+
+    def test_threads_read_while_appending(self):
+        chain = Blockchain(difficulty=1, data_dir=self.tmp.name)
+        chain.chain.cache_size = 1
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+        errors = []
+        done = threading.Event()
+
+        def read():
+            # The tip forces the segment to be remapped; older blocks churn the cache
+            while not done.is_set():
+                try:
+                    height = len(chain.chain)
+                    for height in (height - 1, height // 2, 0):
+                        chain.chain[height]
+                        chain.chain.read_record(height)
+                except Exception as e:
+                    errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        try:
+            for i in range(30):
+                chain.add_transaction('Alice', 'Bob', 1.0 + i)
+                chain.mine_pending_transactions('Miner')
+        finally:
+            done.set()
+            for reader in readers:
+                reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(chain.chain), 31)
+
+class SharedChainTest(SimpleTestCase):
+    """Two Blockchain instances on one data dir stand in for two workers"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.first = Blockchain(difficulty=1, data_dir=self.tmp.name)
+        self.second = Blockchain(difficulty=1, data_dir=self.tmp.name)
+
+    def test_workers_share_genesis(self):
+        self.assertEqual(len(self.second.chain), 1)
+        self.assertEqual(self.second.chain[0].hash, self.first.chain[0].hash)
+
+    def test_transactions_are_visible_to_other_workers(self):
+        tx_id = self.first.add_transaction('Alice', 'Bob', 2.5)
+        self.second.add_transactions([{'sender': 'Carol', 'receiver': 'Dave', 'amount': 1}])
+
+        self.assertTrue(self.second.sync())
+        self.assertIn(tx_id, self.second.pending_transactions)
+        self.first.sync()
+        self.assertEqual(len(self.first.pending_transactions), 2)
+        self.assertFalse(self.first.sync())
+
+    def test_blocks_mined_by_one_worker_reach_the_others(self):
+        tx_id = self.second.add_transaction('Alice', 'Bob', 2.5)
+        block = self.first.mine_pending_transactions('Miner')
+
+        self.assertIn(tx_id, [tx.transaction_id for tx in block.transactions])
+        self.assertTrue(self.second.sync())
+        self.assertEqual(self.second.snapshot.tip_hash, block.hash)
+        self.assertEqual(self.second.get_wallet_balance('Bob'), 2.5)
+        self.assertEqual(len(self.second.pending_transactions), 0)
+        self.assertTrue(self.second.is_chain_valid())
+
+        # The next block is mined by the other worker on top of the shared tip
+        self.second.add_transaction('Bob', 'Carol', 1.0)
+        next_block = self.second.mine_pending_transactions('Miner')
+        self.assertEqual(next_block.previous_hash, block.hash)
+        self.first.sync()
+        self.assertEqual(len(self.first.chain), 3)
+        self.assertTrue(self.first.is_chain_valid(full=True))
+        self.assertEqual([b.index for b in self.first.blocks_involving('Carol')], [2])
+        self.assertEqual([b.index for b in self.second.blocks_involving('Carol')], [2])
+
+    def test_open_streams_are_pushed_other_workers_blocks(self):
+        broker = EventBroker()
+        self.second.add_snapshot_listener(lambda snapshot: broker.publish('chain', {'height': snapshot.height}))
+        broker.watch(self.second.sync, interval=0.05)
+
+        async def next_height(stream):
+            return json.loads((await asyncio.wait_for(anext(stream), 5)).split(b'data: ')[1])['height']
+
+        async def receive():
+            stream = broker.stream()
+            self.assertEqual(await next_height(stream), 0)
+            self.first.add_transaction('Alice', 'Bob', 1.0)
+            await asyncio.to_thread(self.first.mine_pending_transactions, 'Miner')
+            heights = [await next_height(stream)]
+            while heights[-1] < 1:
+                heights.append(await next_height(stream))
+            await stream.aclose()
+            return heights[-1]
+
+        self.assertEqual(asyncio.run(receive()), 1)
+
+    def test_one_worker_audits_and_the_others_follow(self):
+        self.assertTrue(self.first.shared.claim_audits())
+        self.assertFalse(self.second.shared.claim_audits())
+        self.assertTrue(self.first.shared.claim_audits())
+        self.assertFalse(self.second.follow_audit())
+
+        result = self.first.audit()
+        self.assertTrue(self.second.follow_audit())
+        self.assertEqual(self.second.last_audit, result)
+        self.assertEqual(self.second.last_full_audit, self.first.last_full_audit)
+        self.assertFalse(self.second.follow_audit())
+
+class EventBrokerTest(SimpleTestCase):
+    def test_stream_ends_with_retry_after_its_lifetime(self):
+        broker = EventBroker()
+        broker.publish('chain', {'height': 0})
+        polls = []
+        broker.watch(lambda: polls.append(1), interval=0.01)
+
+        async def drain():
+            return [part async for part in broker.stream(keepalive=0.05, lifetime=0.2)]
+
+        parts = asyncio.run(drain())
+
+        self.assertTrue(parts[0].startswith(b'id: 1\n'))
+        self.assertIn(b': keepalive\n\n', parts)
+        self.assertEqual(parts[-1], b'retry: 1000\n\n')
+        self.assertEqual(broker._streams, 0)
+        self.assertTrue(polls)
+        # With no streams left the watcher thread stops
+        watcher = broker._watcher
+        if watcher is not None:
+            watcher.join(1)
+        self.assertIsNone(broker._watcher)
+
+class CheckpointTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.chain = Blockchain(difficulty=1, data_dir=self.tmp.name, checkpoint_interval=2)
+        for amount in (1.0, 2.0, 3.0):
+            self.chain.add_transaction('Alice', 'Bob', amount)
+            self.chain.mine_pending_transactions('Miner')
+        self.chain.chain.close()
+
+    def test_restart_replays_only_blocks_after_checkpoint(self):
+        self.assertEqual(self.chain.checkpoints.heights(), [2])
+
+        restarted = Blockchain(difficulty=1, data_dir=self.tmp.name, checkpoint_interval=2)
+
+        self.assertEqual(restarted.balances, self.chain.balances)
+        self.assertEqual(restarted.total_transactions, self.chain.total_transactions)
+        self.assertEqual(restarted.snapshot.total_volume, 6.0)
+        self.assertEqual(restarted.snapshot.total_rewards, 18.75)
+        self.assertEqual(restarted.snapshot.average_block_time, self.chain.snapshot.average_block_time)
+        self.assertEqual(restarted.verify_balance_index(), [])
+        self.assertTrue(restarted.ensure_location_indexes(wait=True))
+        self.assertEqual(restarted.locations_height, 4)
+
+    def test_lookups_fall_back_while_history_index_builds(self):
+        mined = self.chain.chain[2].transactions[1]
+        with mock.patch.object(Blockchain, '_build_locations'):
+            restarted = Blockchain(difficulty=1, data_dir=self.tmp.name, checkpoint_interval=2)
+
+            self.assertEqual(restarted.locations_height, 0)
+            self.assertEqual(restarted.get_transaction_history('Bob'),
+                             self.chain.get_transaction_history('Bob'))
+            self.assertEqual(restarted.get_transaction_history_page('Bob', limit=2),
+                             self.chain.get_transaction_history_page('Bob', limit=2))
+            self.assertEqual(restarted.get_transaction_proof(mined.transaction_id),
+                             self.chain.get_transaction_proof(mined.transaction_id))
+            with self.assertRaises(ValueError):
+                restarted._admit_transaction(Transaction.from_record(mined.to_record()))
+
+        self.assertTrue(restarted.ensure_location_indexes(wait=True))
+        self.assertEqual(restarted.get_transaction_history_page('Bob', limit=2),
+                         self.chain.get_transaction_history_page('Bob', limit=2))
+
+    def test_checkpoint_not_matching_chain_is_ignored(self):
+        path = os.path.join(self.chain.checkpoints.directory, 'balances-000000000002.json.z')
+        with open(path, 'rb') as checkpoint_file:
+            checkpoint = BalanceCheckpoint.decode(checkpoint_file.read())
+        checkpoint.tip_hash = '0' * 64
+        checkpoint.balances['Bob'] = 1000.0
+        with open(path, 'wb') as checkpoint_file:
+            checkpoint_file.write(checkpoint.encode())
+
+        restarted = Blockchain(difficulty=1, data_dir=self.tmp.name, checkpoint_interval=2)
+
+        self.assertEqual(restarted.get_wallet_balance('Bob'), 6.0)
+        self.assertEqual(restarted.verify_balance_index(), [])
+
+
+class AddressFilterTest(SimpleTestCase):
+    def test_filter_has_no_false_negatives(self):
+        addresses = [f'addr_{i}' for i in range(50)]
+        address_filter = build_filter(addresses)
+        self.assertTrue(all(AddressProbe(address).might_contain(address_filter) for address in addresses))
+        false_positives = sum(AddressProbe(f'other_{i}').might_contain(address_filter) for i in range(2000))
+        self.assertLess(false_positives, 100)
+
+    def test_scans_skip_blocks_and_match_indexes(self):
+        chain = Blockchain(difficulty=1)
+        for sender, receiver in (('Alice', 'Bob'), ('Carol', 'Dave'), ('Bob', 'Erin')):
+            chain.add_transaction(sender, receiver, 1.5)
+            chain.mine_pending_transactions('Miner')
+
+        self.assertEqual([block.index for block in chain.blocks_involving('Dave')], [2])
+        self.assertEqual(chain.scan_transaction_history('Bob'), chain.get_transaction_history('Bob'))
+        self.assertEqual(chain.scan_wallet_balance('Bob'), chain.get_wallet_balance('Bob'))
+
+    def test_filter_is_stored_and_audited(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        chain = Blockchain(difficulty=1, data_dir=tmp.name)
+        chain.add_transaction('Alice', 'Bob', 1.5)
+        block = chain.mine_pending_transactions('Miner')
+
+        self.assertEqual(Block.from_record(chain.chain.read_record(1)).address_filter, block.address_filter)
+        self.assertEqual([b.index for b in chain.blocks_involving('Alice')], [1])
+
+        record = block.to_record()
+        record['address_filter'] = build_filter(['Alice']).hex()
+        self.assertEqual(check_record(record, chain.chain[0].hash, 1), "invalid address filter")
+
+    def test_scans_read_filters_from_side_file(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        chain = Blockchain(difficulty=1, data_dir=tmp.name)
+        for sender, receiver in (('Alice', 'Bob'), ('Carol', 'Dave')):
+            chain.add_transaction(sender, receiver, 1.5)
+            chain.mine_pending_transactions('Miner')
+        filters = [block.address_filter for block in chain.chain]
+        self.assertEqual(chain.chain.address_filters(), filters)
+
+        # Only the matching block's record is read
+        with mock.patch.object(chain.chain, 'read_record', wraps=chain.chain.read_record) as read_record:
+            self.assertEqual([block.index for block in chain.blocks_involving('Dave')], [2])
+        read_record.assert_called_once_with(2)
+        chain.chain.close()
+
+        # A torn trailing entry is dropped, and a missing file is backfilled from the records
+        with open(os.path.join(tmp.name, 'filters.dat'), 'ab') as filter_file:
+            filter_file.write(b'\x40\x00')
+        reopened = Blockchain(difficulty=1, data_dir=tmp.name)
+        reopened.add_transaction('Erin', 'Frank', 1.0)
+        reopened.mine_pending_transactions('Miner')
+        self.assertEqual([block.index for block in reopened.blocks_involving('Frank')], [3])
+        reopened.chain.close()
+
+        os.remove(os.path.join(tmp.name, 'filters.dat'))
+        reopened = Blockchain(difficulty=1, data_dir=tmp.name)
+        self.assertEqual(reopened.chain.address_filters()[:3], filters)
+        self.assertEqual([block.index for block in reopened.blocks_involving('Frank')], [3])
+
+
+class SignedTransactionTest(SimpleTestCase):
+    def setUp(self):
+        self.private_key, self.public_key = generate_keypair()
+        self.address = address_for(self.public_key)
+
+    def signed(self, receiver='Bob', amount=2.5, timestamp=1700000000.0):
+        signature = sign(self.private_key, signing_message(self.address, receiver, amount, timestamp))
+        return {'sender': self.address, 'receiver': receiver, 'amount': amount,
+                'timestamp': timestamp, 'public_key': self.public_key, 'signature': signature}
+
+    def test_signatures_checked_at_mempool_entry(self):
+        chain = Blockchain(difficulty=1)
+        tx_id = chain.add_transaction(**self.signed())
+        self.assertIn(tx_id, chain.pending_transactions)
+
+        forged = dict(self.signed(amount=3.0), amount=300.0)
+        with self.assertRaisesMessage(ValueError, "Invalid signature"):
+            chain.add_transaction(**forged)
+        with self.assertRaisesMessage(ValueError, "Unsigned transaction"):
+            chain.add_transaction(self.address, 'Bob', 1.0)
+        other_key = generate_keypair()[1]
+        with self.assertRaisesMessage(ValueError, "Public key does not match sender"):
+            chain.add_transaction(**dict(self.signed(), public_key=other_key))
+
+        results = chain.add_transactions([self.signed(amount=1.0), forged, {'sender': 'Carol', 'receiver': 'Dave', 'amount': 1}])
+        self.assertEqual([result['success'] for result in results], [True, False, True])
+
+        strict = Blockchain(difficulty=1, require_signatures=True)
+        with self.assertRaisesMessage(ValueError, "Unsigned transaction"):
+            strict.add_transaction('Carol', 'Dave', 1.0)
+        strict.add_transaction(**self.signed())
+
+    def test_mined_signatures_are_stored_and_not_verified_twice(self):
+        chain = Blockchain(difficulty=1, require_signatures=True)
+        chain.add_transaction(**self.signed())
+        verified = SIGNATURES_VERIFIED.value
+        block = chain.mine_pending_transactions('Miner')
+
+        self.assertIsInstance(block.transactions, MinedTransactions)
+        self.assertEqual(block.transactions[1].public_key, self.public_key)
+        self.assertIsNone(block.transactions[0].signature)
+        self.assertEqual(Block.from_record(json.loads(json.dumps(block.to_record()))).to_record(),
+                         block.to_record())
+        self.assertTrue(chain.is_chain_valid(full=True))
+        self.assertEqual(SIGNATURES_VERIFIED.value, verified)
+
+        block.transactions[1].signature = sign(self.private_key, b'something else')
+        self.assertFalse(chain.is_chain_valid(full=True))
+        self.assertEqual(chain.last_audit.reason, "invalid signature")
+
+    def test_audit_ranges_verify_each_signature_once(self):
+        chain = Blockchain(difficulty=1, require_signatures=True)
+        for amount in (1.0, 2.0):
+            chain.add_transaction(**self.signed(amount=amount))
+            chain.mine_pending_transactions('Miner')
+        records = [chain.chain[height].to_record() for height in (1, 2)]
+        records[1]['transactions'][1][6] = sign(self.private_key, b'something else')
+
+        # Like a fresh audit worker, with nothing cached
+        VERIFIER.clear()
+        verified = SIGNATURES_VERIFIED.value
+        self.assertEqual(check_records(records, 1, chain.chain[0].hash, 1, require_signatures=True),
+                         (2, "invalid signature"))
+        self.assertEqual(SIGNATURES_VERIFIED.value, verified + 2)
+
+    def test_batch_verification(self):
+        verifier = SignatureVerifier(workers=2)
+        items = [(self.public_key, sign(self.private_key, b'%d' % i), b'%d' % i) for i in range(BATCH_SIZE * 2 + 1)]
+        items[5] = (self.public_key, items[5][1], b'tampered')
+
+        results = verifier.verify_many(items)
+        self.assertEqual(results.count(False), 1)
+        self.assertFalse(results[5])
+        verified = SIGNATURES_VERIFIED.value
+        self.assertEqual(verifier.verify_many(items), results)
+        self.assertEqual(SIGNATURES_VERIFIED.value, verified + 1)
+
+
+class CompactBlockTest(SimpleTestCase):
+    def test_mined_transactions_are_packed_into_columns(self):
+        chain = Blockchain(difficulty=1)
+        tx_id = chain.add_transaction('Alice', 'Bob', 2.5)
+        block = chain.mine_pending_transactions('Miner')
+
+        self.assertIsInstance(block.transactions, MinedTransactions)
+        self.assertEqual(block.transaction_ids()[1], tx_id)
+        self.assertEqual(block.transactions[1].to_record()[1:4], ['Alice', 'Bob', 2.5])
+        self.assertEqual(block.transactions[-1].transaction_id, tx_id)
+        self.assertEqual(block.merkle_root, block.calculate_merkle_root())
+        self.assertEqual(len(block._hash), 32)
+        # The genesis block's integer amount keeps it in plain objects
+        self.assertIsInstance(chain.chain[0].transactions, list)
+
+    def test_record_round_trip_packs_columns(self):
+        transactions = [Transaction('Alice', 'Bob', 1.5, timestamp=1700000000.0)]
+        block = Block(1, transactions, '0' * 64, timestamp=1700000001.0)
+        block.mine_block(difficulty=1)
+
+        loaded = Block.from_record(json.loads(json.dumps(block.to_record())))
+
+        self.assertIsInstance(loaded.transactions, MinedTransactions)
+        self.assertEqual(loaded.to_dict(), block.to_dict())
+        self.assertEqual(loaded.calculate_hash(), block.hash)
+
+    def test_views_write_through(self):
+        columns = MinedTransactions.pack([
+            Transaction('Alice', 'Bob', 1.0, timestamp=1700000000.0).to_record()
+        ])
+        columns[0].receiver = 'Carol'
+        columns[0].amount = 3.0
+
+        self.assertEqual(columns[0].receiver, 'Carol')
+        self.assertEqual(columns[0].amount, 3.0)
+        self.assertNotEqual(columns[0].transaction_id, columns[0].generate_id())
+
+class AnalyticsTest(SimpleTestCase):
+    def test_aggregates_match_python_scans(self):
+        chain = Blockchain(difficulty=1)
+        store = chain.get_analytics()
+        chain.add_transaction('Alice', 'Bob', 3.0)
+        chain.add_transaction('Bob', 'Carol', 1.25)
+        chain.mine_pending_transactions('Alice')
+        chain.add_transaction('Carol', 'Alice', 0.5)
+        chain.mine_pending_transactions('Bob')
+
+        self.assertEqual(len(store), chain.get_total_transactions())
+        richest = {entry['address']: entry['balance'] for entry in store.richest(100)}
+        for address in ('Alice', 'Bob', 'Carol'):
+            self.assertEqual(richest[address], chain.scan_wallet_balance(address))
+        self.assertNotIn('0', richest)
+
+        # Tied miners come back in address ID order, which depends on interning order
+        self.assertEqual(sorted((m['address'], m['rewards'], m['blocks']) for m in store.miner_rewards()),
+                         [('Alice', 6.25, 1), ('Bob', 6.25, 1)])
+        self.assertEqual(store.block_volume(1), [
+            {'block_index': 1, 'transfers': 2, 'volume': 4.25},
+            {'block_index': 2, 'transfers': 1, 'volume': 0.5},
+        ])
+        self.assertEqual(store.block_volume(2, limit=5), [{'block_index': 2, 'transfers': 1, 'volume': 0.5}])
+
+        summary = store.summary()
+        self.assertEqual((summary['blocks'], summary['transfers'], summary['volume'], summary['rewards']),
+                         (3, 3, 4.75, 12.5))
+        # The running totals published with each snapshot agree with the columnar scan
+        self.assertEqual((chain.snapshot.total_volume, chain.snapshot.total_rewards), (4.75, 12.5))
+        self.assertEqual(sum(day['transactions'] for day in store.daily_counts()), len(store))
+
+class MetricsRegistryTest(SimpleTestCase):
+    def test_render_prometheus_text(self):
+        registry = Registry()
+        counter = registry.counter('jobs', 'Jobs run')
+        histogram = registry.histogram('latency_seconds', 'Latency', ['view'], buckets=(0.1, 1.0))
+        registry.gauge('depth', 'Queue depth', function=lambda: 7)
+
+        counter.inc()
+        counter.inc(2)
+        histogram.labels('index').observe(0.05)
+        histogram.labels('index').observe(0.5)
+        histogram.labels('say "hi"').observe(5)
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE jobs counter', lines)
+        self.assertIn('jobs_total 3.0', lines)
+        self.assertIn('depth 7.0', lines)
+        self.assertIn('latency_seconds_bucket{view="index",le="0.1"} 1.0', lines)
+        self.assertIn('latency_seconds_bucket{view="index",le="1.0"} 2.0', lines)
+        self.assertIn('latency_seconds_bucket{view="index",le="+Inf"} 2.0', lines)
+        self.assertIn('latency_seconds_count{view="index"} 2.0', lines)
+        self.assertIn('latency_seconds_sum{view="say \\"hi\\""} 5.0', lines)
+
+class SerializationCacheTest(SimpleTestCase):
+    def test_mined_blocks_are_serialized_once(self):
+        chain = Blockchain(difficulty=1)
+        chain.add_transaction('Alice', 'Bob', 1.0)
+        chain.mine_pending_transactions('Miner')
+
+        misses = chain.serialization_cache.misses
+        first = chain.get_chain_data()
+        second = chain.get_chain_data()
+
+        self.assertIs(first[1], second[1])
+        self.assertEqual(chain.serialization_cache.misses - misses, 2)
+        self.assertEqual(b''.join(chain.iter_chain_json(1)), json.dumps(first[1]).encode())
+
+    def test_cache_is_bounded(self):
+        chain = Blockchain(difficulty=1)
+        chain.serialization_cache = BlockSerializationCache(maxsize=2)
+        for _ in range(3):
+            chain.add_transaction('Alice', 'Bob', 1.0)
+            chain.mine_pending_transactions('Miner')
+
+        chain.get_chain_data()
+        self.assertEqual(len(chain.serialization_cache), 2)
+
+class MempoolTest(SimpleTestCase):
+    def test_duplicates_are_rejected_and_senders_indexed(self):
+        pool = Mempool()
+        tx = Transaction('Alice', 'Bob', 1.0, timestamp=1700000000.0)
+        pool.add(tx)
+
+        with self.assertRaises(ValueError):
+            pool.add(Transaction('Alice', 'Bob', 1.0, timestamp=1700000000.0))
+        self.assertIs(pool.get(tx.transaction_id), tx)
+        self.assertEqual(pool.by_sender('Alice'), [tx])
+
+        pool.remove(tx.transaction_id)
+        self.assertEqual(len(pool), 0)
+        self.assertEqual(pool.by_sender('Alice'), [])
+        self.assertEqual(pool.stats()['bytes'], 0)
+
+    def test_lowest_amount_is_evicted_when_full(self):
+        pool = Mempool(max_size=2)
+        small = Transaction('Alice', 'Bob', 1.0, timestamp=1.0)
+        large = Transaction('Alice', 'Bob', 5.0, timestamp=2.0)
+        pool.add(small)
+        pool.add(large)
+
+        evicted = pool.add(Transaction('Carol', 'Bob', 3.0, timestamp=3.0))
+
+        self.assertEqual(evicted, [small])
+        self.assertNotIn(small.transaction_id, pool)
+        with self.assertRaises(ValueError):
+            pool.add(Transaction('Dave', 'Bob', 0.5, timestamp=4.0))
+
+    def test_stats_age_percentiles(self):
+        pool = Mempool()
+        for second in range(1, 11):
+            pool.add(Transaction('Alice', 'Bob', 1.0, timestamp=float(second)))
+
+        stats = pool.stats(now=11.0)
+        self.assertEqual(stats['count'], 10)
+        self.assertEqual(stats['age_p50'], 5.0)
+        self.assertEqual(stats['oldest_age'], 10.0)
+
+    def test_mining_drains_mined_transactions(self):
+        chain = Blockchain(difficulty=1, mempool_size=5)
+        chain.add_transaction('Alice', 'Bob', 1.0)
+        chain.mine_pending_transactions('Miner')
+        self.assertEqual(len(chain.pending_transactions), 0)
+
+class MiningJobManagerTest(SimpleTestCase):
+    def test_job_mines_in_background_and_reports_result(self):
+        chain = Blockchain(difficulty=2)
+        chain.add_transaction('Alice', 'Bob', 1.0)
+        mined = []
+        manager = MiningJobManager(chain, on_mined=lambda job, block: mined.append(block) or {'ok': True})
+
+        job = manager.submit(1, 'Miner')
+        self.assertIs(manager.submit(1, 'Other'), job)
+        self.assertTrue(job.finished.wait(timeout=30))
+
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.block_index, 1)
+        self.assertEqual(job.record, {'ok': True})
+        self.assertEqual(mined[0].hash, chain.get_latest_block().hash)
+        self.assertGreater(job.to_dict()['nonces_tried'], 0)
+        self.assertIs(manager.get(job.job_id), job)
+
+    def test_job_without_pending_transactions_is_empty(self):
+        manager = MiningJobManager(Blockchain(difficulty=1))
+        job = manager.submit(1, 'Miner')
+        self.assertTrue(job.finished.wait(timeout=30))
+        self.assertEqual(job.status, 'empty')
+
+    def test_jobs_are_visible_to_other_workers(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        first = MiningJobManager(Blockchain(difficulty=1, data_dir=tmp.name))
+        second = MiningJobManager(Blockchain(difficulty=1, data_dir=tmp.name))
+        first.blockchain.add_transaction('Alice', 'Bob', 1.0)
+
+        job = first.submit(1, 'Miner')
+        self.assertTrue(job.finished.wait(timeout=30))
+        seen = second.get(job.job_id)
+        self.assertEqual(seen.to_dict(), job.to_dict())
+        self.assertTrue(seen.finished.is_set())
+        self.assertIsNone(second.get('missing'))
+
+class ConcurrencyTest(SimpleTestCase):
+    def test_no_transaction_is_lost_while_mining(self):
+        chain = Blockchain(difficulty=2, mempool_size=100_000)
+        submitted = []
+        done = threading.Event()
+
+        def submit(worker):
+            for i in range(300):
+                submitted.append(chain.add_transaction(f'sender_{worker}', 'Bob', 1.0 + i))
+
+        def mine():
+            while not done.is_set():
+                chain.mine_pending_transactions('Miner')
+
+        miner = threading.Thread(target=mine)
+        senders = [threading.Thread(target=submit, args=(worker,)) for worker in range(4)]
+        miner.start()
+        for sender in senders:
+            sender.start()
+        for sender in senders:
+            sender.join()
+        done.set()
+        miner.join()
+        chain.mine_pending_transactions('Miner')
+
+        mined = [tx.transaction_id for block in chain.chain for tx in block.transactions]
+        self.assertEqual(len(submitted), 1200)
+        self.assertEqual(len(chain.pending_transactions), 0)
+        for tx_id in submitted:
+            self.assertEqual(mined.count(tx_id), 1)
+        self.assertGreater(len(chain.chain), 2)
+        self.assertEqual(chain.snapshot.total_transactions, len(mined))
+        self.assertTrue(chain.is_chain_valid(full=True))
+        self.assertEqual(chain.verify_balance_index(), [])
+
+    def test_admission_waits_for_appends(self):
+        chain = Blockchain(difficulty=1)
+        sender = threading.Thread(target=chain.add_transaction, args=('Alice', 'Bob', 1.0))
+        with chain._write_lock:
+            sender.start()
+            sender.join(0.2)
+            self.assertEqual(len(chain.pending_transactions), 0)
+        sender.join()
+        self.assertEqual(len(chain.pending_transactions), 1)
@@ -1,7 +1,15 @@
-from django.test import TestCase, Client
+import asyncio
+import json
+from unittest import mock
+from django.db import OperationalError
+from django.db.models.query import QuerySet
+from django.test import AsyncClient, TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
-from ledger.models import Wallet
+from ledger.audit import check_record
+from ledger.models import Wallet, sync_wallet_balances
+from ledger.blockchain_logic import blockchain
+from ledger.signatures import VERIFIER
 
 class ViewTests(TestCase):
     def setUp(self):
@@ -16,6 +24,8 @@ class ViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'index.html')
         self.assertContains(response, 'Blockchain Dashboard')
+        self.assertEqual(response.context['total_volume'], blockchain.snapshot.total_volume)
+        self.assertContains(response, 'Average Block Time')
     
     def test_block_explorer_view(self):
         response = self.client.get(reverse('block_explorer'))
@@ -53,4 +63,225 @@ class ViewTests(TestCase):
         data = response.json()
         self.assertIn('chain', data)
         self.assertIn('length', data)
-        self.assertIn('valid', data)
\ No newline at end of file
+        self.assertIn('valid', data)
+    
+    def test_transaction_proof_api(self):
+        tx_id = blockchain.chain[0].transactions[0].transaction_id
+        response = self.client.get(reverse('api_transaction_proof', args=[tx_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['block_index'], 0)
+        
+        response = self.client.get(reverse('api_transaction_proof', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+    
+    def test_transaction_history_api(self):
+        response = self.client.get(reverse('api_transaction_history', args=['Genesis']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 1)
+        
+        response = self.client.get(reverse('api_transaction_history', args=['Genesis']), {'limit': 'x'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_api_blockchain_pagination_and_streaming(self):
+        response = self.client.get(reverse('api_blockchain'), {'limit': 1, 'headers_only': '1'})
+        data = response.json()
+        self.assertEqual(len(data['chain']), 1)
+        self.assertNotIn('transactions', data['chain'][0])
+        self.assertEqual(data['total_transactions'], blockchain.get_total_transactions())
+        
+        response = self.client.get(reverse('api_blockchain'), {'format': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), len(blockchain.chain))
+        self.assertEqual(json.loads(lines[0])['index'], 0)
+        
+        response = self.client.get(reverse('api_blockchain'), {'from_height': '-1'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_api_blockchain_answers_304_when_unchanged(self):
+        response = self.client.get(reverse('api_blockchain'))
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        
+        response = self.client.get(reverse('api_blockchain'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        blockchain.add_transaction('Alice', 'Bob', 1.0)
+        self.addCleanup(blockchain.pending_transactions.clear)
+        response = self.client.get(reverse('api_blockchain'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+    
+    def test_bulk_transaction_api(self):
+        self.addCleanup(blockchain.pending_transactions.clear)
+        self.client.login(username='testuser', password='testpass123')
+        items = [
+            {'sender': 'Alice', 'receiver': 'Bob', 'amount': 1.5},
+            {'sender': 'Alice', 'receiver': 'Bob', 'amount': -1},
+            {'sender': 'Alice'},
+            {'sender': 'Alice', 'receiver': 'Bob', 'amount': float('nan')},
+            {'sender': 'Alice', 'receiver': 'Bob', 'amount': float('inf')},
+        ]
+        response = self.client.post(reverse('api_bulk_create_transactions'),
+                                    json.dumps(items), content_type='application/json')
+        data = response.json()
+        self.assertEqual(data['accepted'], 1)
+        self.assertEqual([result['success'] for result in data['results']],
+                         [True, False, False, False, False])
+        self.assertIn(data['results'][0]['transaction_id'], blockchain.pending_transactions)
+        
+        ndjson = '\n'.join(json.dumps({'sender': 'Carol', 'receiver': 'Dave', 'amount': amount})
+                           for amount in (2.0, 3.0))
+        response = self.client.post(reverse('api_bulk_create_transactions'),
+                                    ndjson, content_type='application/x-ndjson')
+        self.assertEqual(response.json()['accepted'], 2)
+        
+        response = self.client.post(reverse('api_bulk_create_transactions'),
+                                    '{"not": "a list"}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+    
+    @override_settings(LEDGER_API_TOKENS=['ingest-token'])
+    def test_bulk_transaction_api_requires_authentication(self):
+        self.addCleanup(blockchain.pending_transactions.clear)
+        url = reverse('api_bulk_create_transactions')
+        body = json.dumps([{'sender': 'Erin', 'receiver': 'Frank', 'amount': 1.0}])
+        
+        response = self.client.post(url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        response = self.client.post(url, body, content_type='application/json',
+                                    HTTP_AUTHORIZATION='Bearer wrong-token')
+        self.assertEqual(response.status_code, 401)
+        
+        # Token clients need no CSRF token; session clients do
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(url, body, content_type='application/json',
+                               HTTP_AUTHORIZATION='Bearer ingest-token')
+        self.assertEqual(response.json()['accepted'], 1)
+        client.login(username='testuser', password='testpass123')
+        response = client.post(url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+    
+    def test_mining_job_api(self):
+        response = self.client.post(reverse('api_mine'))
+        self.assertEqual(response.status_code, 401)
+        
+        response = self.client.get(reverse('api_mining_job', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+    
+    def test_stats_api(self):
+        blockchain.add_transaction('StatsAlice', 'StatsBob', 4.0)
+        blockchain.mine_pending_transactions('StatsMiner')
+        
+        response = self.client.get(reverse('api_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['transactions'], blockchain.get_total_transactions())
+        
+        richest = self.client.get(reverse('api_stats_richest'), {'limit': 1000}).json()['addresses']
+        self.assertIn({'address': 'StatsBob', 'balance': blockchain.get_wallet_balance('StatsBob')}, richest)
+        
+        miners = self.client.get(reverse('api_stats_miners')).json()['miners']
+        self.assertIn('StatsMiner', [miner['address'] for miner in miners])
+        
+        blocks = self.client.get(reverse('api_stats_block_volume'),
+                                 {'from_height': len(blockchain.chain) - 1}).json()['blocks']
+        self.assertEqual(blocks, [{'block_index': len(blockchain.chain) - 1, 'transfers': 1, 'volume': 4.0}])
+        
+        self.assertEqual(self.client.get(reverse('api_stats_daily')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('api_stats_richest'), {'limit': -1}).status_code, 400)
+    
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('index'))
+        
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn(f'ledger_chain_height {float(blockchain.snapshot.height)!r}', body)
+        self.assertIn('ledger_http_request_duration_seconds_count{view="index"}', body)
+        self.assertIn('ledger_mempool_transactions', body)
+    
+    async def test_ndjson_streams_asynchronously_under_asgi(self):
+        response = await AsyncClient().get(reverse('api_blockchain'), {'format': 'ndjson'})
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        lines = body.decode().splitlines()
+        self.assertEqual(len(lines), len(blockchain.chain))
+        self.assertEqual([json.loads(line)['index'] for line in lines], list(range(len(lines))))
+    
+    async def test_events_stream(self):
+        response = await AsyncClient().get(reverse('api_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        
+        first = await asyncio.wait_for(anext(stream), 5)
+        self.assertIn(b'event: chain\n', first)
+        self.assertEqual(json.loads(first.split(b'data: ')[1])['tip_hash'], blockchain.snapshot.tip_hash)
+        
+        tx_id = await asyncio.to_thread(blockchain.add_transaction, 'EventAlice', 'EventBob', 1.0)
+        self.addCleanup(blockchain.pending_transactions.remove_many, [tx_id])
+        pushed = json.loads((await asyncio.wait_for(anext(stream), 5)).split(b'data: ')[1])
+        self.assertEqual(pushed['pending_transactions'], blockchain.snapshot.pending_transactions)
+        await stream.aclose()
+    
+    def test_events_without_asgi_send_current_state(self):
+        response = self.client.get(reverse('api_events'))
+        self.assertTrue(response.content.startswith(b'retry: '))
+        data = json.loads(response.content.split(b'data: ')[1])
+        self.assertEqual(data['height'], blockchain.snapshot.height)
+    
+    def test_wallet_balances_are_written_behind(self):
+        wallet = Wallet.objects.create(user=self.user, address='SyncBob')
+        sync_wallet_balances()
+        blockchain.add_transaction('SyncAlice', 'SyncBob', 2.0)
+        blockchain.mine_pending_transactions('SyncMiner')
+        
+        self.assertEqual(sync_wallet_balances(), 1)
+        wallet.refresh_from_db()
+        self.assertEqual(float(wallet.balance), blockchain.get_wallet_balance('SyncBob'))
+        self.assertEqual(sync_wallet_balances(), 0)
+        
+        # Page views show the chain's balance without writing it
+        Wallet.objects.filter(pk=wallet.pk).update(balance=99)
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('index'))
+        self.assertEqual(response.context['wallet_balance'], blockchain.get_wallet_balance('SyncBob'))
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.balance, 99)
+    
+    def test_wallet_sync_failure_is_retried_and_pages_still_render(self):
+        Wallet.objects.create(user=self.user, address='LockedBob')
+        sync_wallet_balances()
+        blockchain.add_transaction('LockedAlice', 'LockedBob', 2.0)
+        blockchain.mine_pending_transactions('LockedMiner')
+        
+        locked = mock.patch.object(QuerySet, 'bulk_update', side_effect=OperationalError('database is locked'))
+        with locked, self.assertLogs('ledger.models', 'ERROR'):
+            self.assertEqual(sync_wallet_balances(), 0)
+        self.assertIn('LockedBob', blockchain.dirty_addresses)
+        
+        with locked:
+            self.assertEqual(self.client.get(reverse('index')).status_code, 200)
+        self.assertEqual(sync_wallet_balances(), 1)
+    
+    def test_wallet_transactions_are_signed(self):
+        wallet = Wallet.create_for(self.user)
+        self.assertEqual(len(wallet.public_key), 64)
+        self.client.login(username='testuser', password='testpass123')
+        
+        self.client.post(reverse('create_transaction'),
+                         {'sender': wallet.address, 'receiver': 'SignedBob', 'amount': '1.5'})
+        
+        pending = blockchain.pending_transactions.by_sender(wallet.address)
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(pending[0].public_key, wallet.public_key)
+        
+        # The signature survives mining and is checked from scratch by validation
+        block = blockchain.mine_pending_transactions('SignedMiner')
+        record = block.to_record()
+        signed = [tx for tx in record['transactions'] if tx[1] == wallet.address]
+        self.assertEqual(signed[0][5], wallet.public_key)
+        VERIFIER.clear()
+        previous_hash = blockchain.chain[block.index - 1].hash
+        self.assertIsNone(check_record(record, previous_hash, blockchain.difficulty, require_signatures=True))
+        
+        signed[0][6] = signed[0][6][:-2] + ('00' if signed[0][6][-2:] != '00' else '01')
+        self.assertEqual(check_record(record, previous_hash, blockchain.difficulty), "invalid signature")